@@ -21,7 +21,7 @@ The exported files will be placed in the specified output directory (default: _s
 # ]
 # ///
 
-import subprocess, os
+import subprocess, os, shutil
 from typing import List, Union
 from pathlib import Path
 
@@ -146,8 +146,9 @@ def _export_data(folder: Path, output_dir: Path) -> List[dict]:
         logger.warning(f"Directory not found: {folder}")
         return []
 
-    # Find all Python files recursively in the folder
-    datafiles = list(folder.rglob("*.parquet"))
+    # Find all Parquet files recursively in the folder (skipping the pages of
+    # interrupted fetches in .partial/)
+    datafiles = [f for f in folder.rglob("*.parquet") if ".partial" not in f.parts]
     logger.debug(f"Found {len(datafiles)} Parquet files in {folder}")
 
     # Exit if no notebooks were found
@@ -155,20 +156,31 @@ def _export_data(folder: Path, output_dir: Path) -> List[dict]:
         logger.warning(f"No parquet files found in {folder}!")
         return []
 
-    # For each Parquet data file copy it to the output_dir / "data" folder
+    # For each Parquet data file copy it to the output_dir / "data" folder, keeping
+    # the period partitions (data/{id}/TypedDataSet/Perioden=.../part-*.parquet) in place
     output_data_dir = output_dir / "data"
     output_data_dir.mkdir(parents=True, exist_ok=True)
     processed = []
     for datafile in datafiles:
         try:
             # Copy the data file to the output directory
-            output_file = output_data_dir / datafile.name
-            datafile.replace(output_file)
+            output_file = output_data_dir / datafile.relative_to(folder)
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(datafile, output_file)
             processed.append(output_file)
             logger.info(f"Copied {datafile} to {output_file}")
         except Exception as e:
             logger.error(f"Error copying {datafile}: {e}")
     
+    # The catalog lists the tables, endpoints and period partitions, as GitHub Pages
+    # can't list a folder (see util.list_cloud_data and util.get_cloud_partitions)
+    catalog_file = folder / "catalog.json"
+    if catalog_file.exists():
+        shutil.copy2(catalog_file, output_data_dir / catalog_file.name)
+        logger.info(f"Copied {catalog_file} to {output_data_dir}")
+    else:
+        logger.warning(f"No {catalog_file}: list_cloud_data() will find no files (run data_fetcher.py --catalog)")
+
     logger.info(f"Successfully exported {len(processed)} out of {len(datafiles)} files from {folder}")
     return processed
 
@@ -193,9 +205,10 @@ def _export(folder: Path, output_dir: Path, as_app: bool=False) -> List[dict]:
         logger.warning(f"Directory not found: {folder}")
         return []
 
-    # Find all Python files recursively in the folder
-    notebooks = list(folder.rglob("*.py"))
-    logger.debug(f"Found {len(notebooks)} Python files in {folder}")
+    # Find all marimo notebooks recursively in the folder (skipping library
+    # modules such as nl/cbs/loaders.py that live next to them)
+    notebooks = [nb for nb in folder.rglob("*.py") if "marimo.App(" in nb.read_text()]
+    logger.debug(f"Found {len(notebooks)} notebooks in {folder}")
 
     # Exit if no notebooks were found
     if not notebooks:
@@ -251,10 +264,10 @@ def main(
     notebooks_data += _export(Path("nl/cbs"), output_dir, as_app=False)
     notebooks_data += _export(Path("gb-sct/personal-transport"), output_dir, as_app=False)
 
-    # Zip up the nl/cbs directory:
-    os.system(f"zip {output_dir}/cbs.zip nl/cbs/*")
+    # Zip up the nl/cbs directory (with nl/__init__.py so nl.cbs is importable):
+    os.system(f"zip {output_dir}/cbs.zip nl/__init__.py nl/cbs/*")
     os.system(f"zip {output_dir}/cbs.zip util.py")
-    os.system(f"zip {output_dir}/cbs.zip data/*")
+    os.system(f"zip -r {output_dir}/cbs.zip data -x 'data/.partial/*'")
 
     os.system(f"mkdir {output_dir}/images")
     os.system(f"cp images/* {output_dir}/images")
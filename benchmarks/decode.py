@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+OData response decoding benchmark
+
+Decodes the pages of every TypedDataSet in the data folder, encoded the way
+the CBS API (and benchmarks/odata_server.py) sends them, into one DataFrame:
+
+    stdlib     json.loads per page, all rows collected as dicts, pd.DataFrame at the end
+               (the decoding of util.get_cbs_url_paginated before the columnar path)
+    orjson     the same with orjson.loads
+    columnar   util's path: each page is decoded (orjson when installed) and turned
+               into a pyarrow Table right away, the tables are concatenated at the end
+
+No HTTP is involved, so the numbers are the decoding CPU cost per fetch. Every
+path is checked to produce the same DataFrame as the stdlib path.
+
+Usage:
+    python benchmarks/decode.py
+    python benchmarks/decode.py --page-size 1000 --page-size 10000
+    python benchmarks/decode.py --data-dir benchmarks/.cache/synthetic/x10 --rounds 3
+"""
+
+import argparse
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import pandas as pd
+
+from benchmarks.harness import measure, save_results, compare_results
+from benchmarks.odata_server import to_records
+from util import _decode_json, _rows_to_page, _pages_to_frame
+
+DEFAULT_PAGE_SIZES = [5000]
+
+
+def encode_pages(df, page_size):
+    """Encode a data set as the JSON bodies of its OData pages."""
+    return [
+        json.dumps({"odata.metadata": "", "value": to_records(df.iloc[start:start + page_size])},
+                   ensure_ascii=False).encode("utf-8")
+        for start in range(0, len(df), page_size)
+    ]
+
+
+def decode_stdlib(bodies):
+    """Decode pages with the json module into row dicts, then one DataFrame."""
+    rows = []
+    for body in bodies:
+        rows.extend(json.loads(body)["value"])
+    return pd.DataFrame(rows)
+
+
+def decode_orjson(bodies):
+    """Decode pages with orjson into row dicts, then one DataFrame."""
+    import orjson
+
+    rows = []
+    for body in bodies:
+        rows.extend(orjson.loads(body)["value"])
+    return pd.DataFrame(rows)
+
+
+def decode_columnar(bodies):
+    """Decode pages the way util.get_cbs_url_paginated does."""
+    return _pages_to_frame([_rows_to_page(_decode_json(body)["value"]) for body in bodies])
+
+
+DECODERS = {
+    "stdlib": decode_stdlib,
+    "orjson": decode_orjson,
+    "columnar": decode_columnar,
+}
+
+
+def bench_decode(data_dir, page_sizes, rounds):
+    """
+    Benchmark every decoder on the TypedDataSets of a data folder.
+
+    Args:
+        data_dir: Folder with {id}_TypedDataSet.parquet files
+        page_sizes: Rows per page ($top)
+        rounds: Timed rounds per benchmark
+
+    Returns:
+        List of result dicts
+    """
+    decoders = dict(DECODERS)
+    if importlib.util.find_spec("orjson") is None:
+        print("  orjson is not installed, skipping the orjson decoder")
+        del decoders["orjson"]
+
+    results = []
+    for path in sorted(Path(data_dir).glob("*_TypedDataSet.parquet")):
+        dataset_id = path.name.split("_")[0]
+        df = pd.read_parquet(path)
+
+        for page_size in page_sizes:
+            bodies = encode_pages(df, page_size)
+            size_mb = sum(len(body) for body in bodies) / (1024 * 1024)
+            expected_df = decode_stdlib(bodies)
+
+            for name, decode in decoders.items():
+                identical = decode(bodies).equals(expected_df)
+                result = measure(f"decode/{name}/{dataset_id}/top={page_size}", lambda: decode(bodies),
+                                 rounds=rounds, rows=len(df), json_mb=round(size_mb, 2), identical=identical)
+                result["rows_per_s"] = round(len(df) / result["median"])
+                result["mb_per_s"] = round(size_mb / result["median"], 1)
+                if not identical:
+                    print(f"  ✗ {name} decodes {dataset_id} differently from the stdlib path")
+                results.append(result)
+    return results
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark decoding OData JSON pages into a DataFrame")
+    parser.add_argument("--page-size", type=int, action="append",
+                        help=f"Rows per page (repeatable, default: {DEFAULT_PAGE_SIZES[0]})")
+    parser.add_argument("--data-dir", default=str(REPO_ROOT / "data"), help="Folder with the TypedDataSet files")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per benchmark")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/decode-{timestamp}.json)")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+
+    args = parser.parse_args()
+
+    results = bench_decode(args.data_dir, args.page_size or DEFAULT_PAGE_SIZES, args.rounds)
+    output = save_results("decode", results, args.output)
+
+    different = [r["name"] for r in results if not r["identical"]]
+
+    regressions = []
+    if args.compare:
+        print(f"\n=== Compared to {args.compare} ===")
+        regressions = compare_results(args.compare, output)
+
+    sys.exit(1 if different or regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Fetch throughput and resilience benchmark
+
+Runs util.get_cbs_url_paginated against the local OData emulator
+(benchmarks/odata_server.py) for every TypedDataSet in the data folder, under
+a few network scenarios:
+
+    clean      no latency, no failures
+    latency    50 ms per response (about a round trip to opendata.cbs.nl)
+    flaky      10 ms per response, 10% throttled, 5% server errors, 5% truncated
+
+Every benchmark records the throughput (rows/s) and whether the fetched data
+set was complete, so retries that lose or duplicate pages show up as failures.
+
+Usage:
+    python benchmarks/fetch.py
+    python benchmarks/fetch.py --scenario flaky --page-size 1000 --page-size 5000
+    python benchmarks/fetch.py --data-dir benchmarks/.cache/synthetic/x10 --rounds 1
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import pandas as pd
+
+from benchmarks.harness import measure, quiet, save_results, compare_results
+from benchmarks.odata_server import ODataServer
+from util import get_cbs_url_paginated
+
+SCENARIOS = {
+    "clean": {},
+    "latency": {"latency": 0.05},
+    "flaky": {"latency": 0.01, "throttle_rate": 0.10, "error_rate": 0.05,
+              "truncate_rate": 0.05, "retry_after": 0.01},
+}
+
+DEFAULT_PAGE_SIZES = [5000]
+
+
+def is_complete(fetched_df, expected_df):
+    """Check that a fetched data set holds exactly the rows of the served file."""
+    if len(fetched_df) != len(expected_df) or "ID" not in fetched_df.columns:
+        return False
+    return fetched_df["ID"].tolist() == expected_df["ID"].tolist()
+
+
+def bench_scenario(scenario, data_dir, page_sizes, rounds, seed=1):
+    """
+    Benchmark paginated fetches of every TypedDataSet under one scenario.
+
+    Args:
+        scenario: Name of the scenario in SCENARIOS
+        data_dir: Folder served by the emulator
+        page_sizes: $top values to fetch with
+        rounds: Timed rounds per benchmark
+        seed: Random seed for the failure injection
+
+    Returns:
+        List of result dicts
+    """
+    results = []
+    with ODataServer(data_dir=data_dir, seed=seed, **SCENARIOS[scenario]) as server:
+        for path in sorted(Path(data_dir).glob("*_TypedDataSet.parquet")):
+            dataset_id = path.name.split("_")[0]
+            expected_df = pd.read_parquet(path)
+            url = f"{server.base_url}/{dataset_id}/TypedDataSet"
+
+            for page_size in page_sizes:
+                fetch = quiet(lambda: get_cbs_url_paginated(url, page_size=page_size, page_delay=0,
+                                                            retries=5, max_pages=10 ** 6))
+                requests_before = server.stats["requests"]
+                complete = is_complete(fetch(), expected_df)
+                result = measure(f"fetch/{scenario}/{dataset_id}/top={page_size}", fetch,
+                                 rounds=rounds, warmup=0, rows=len(expected_df), complete=complete)
+                result["rows_per_s"] = round(len(expected_df) / result["median"])
+                result["requests_per_fetch"] = (server.stats["requests"] - requests_before) / (rounds + 1)
+                if not complete:
+                    print(f"  ✗ {dataset_id}: fetched data set is incomplete")
+                results.append(result)
+
+        print(f"  Server: {server.stats}")
+    return results
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark CBS fetches against the local OData emulator")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="Network scenario (repeatable, default: all)")
+    parser.add_argument("--page-size", type=int, action="append",
+                        help=f"$top per page (repeatable, default: {DEFAULT_PAGE_SIZES[0]})")
+    parser.add_argument("--data-dir", default=str(REPO_ROOT / "data"), help="Folder served by the emulator")
+    parser.add_argument("--rounds", type=int, default=3, help="Timed rounds per benchmark")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the failure injection")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/fetch-{timestamp}.json)")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+
+    args = parser.parse_args()
+
+    results = []
+    for scenario in args.scenario or list(SCENARIOS):
+        print(f"\n=== {scenario} ===")
+        results += bench_scenario(scenario, args.data_dir, args.page_size or DEFAULT_PAGE_SIZES,
+                                  args.rounds, args.seed)
+
+    output = save_results("fetch", results, args.output)
+
+    incomplete = [r["name"] for r in results if not r["complete"]]
+    if incomplete:
+        print(f"✗ Incomplete fetches: {', '.join(incomplete)}")
+
+    regressions = []
+    if args.compare:
+        print(f"\n=== Compared to {args.compare} ===")
+        regressions = compare_results(args.compare, output)
+
+    sys.exit(1 if incomplete or regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Minimal benchmark harness shared by the scripts in benchmarks/.
+
+Each benchmark is a named callable timed over several rounds. Results are
+plain dicts that are written to JSON, so runs from different commits can be
+compared with compare_results() or `python benchmarks/harness.py old.json new.json`.
+"""
+
+import contextlib
+import gc
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+
+
+def quiet(fn):
+    """Wrap a callable so the progress prints of util's loaders don't flood the output."""
+    def wrapper(*args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def measure(name, fn, rounds=5, warmup=1, **extra):
+    """
+    Time a callable over several rounds.
+
+    Args:
+        name: Benchmark name (e.g. "load/85236NED/TypedDataSet")
+        fn: Callable taking no arguments
+        rounds: Number of timed rounds
+        warmup: Number of untimed rounds run first
+        **extra: Additional fields stored with the result (e.g. rows=1234)
+
+    Returns:
+        Dict with min/median/mean/max/stdev in seconds
+    """
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    result = {
+        "name": name,
+        "rounds": rounds,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "max": max(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+    result.update(extra)
+    print(f"  {name:<55} median {result['median'] * 1000:10.3f} ms  (min {result['min'] * 1000:.3f} ms)")
+    return result
+
+
+def machine_info():
+    """Describe the machine and commit a run was made on."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def save_results(suite, benchmarks, output=None):
+    """
+    Write benchmark results to JSON.
+
+    Args:
+        suite: Suite name, used in the default filename
+        benchmarks: List of result dicts from measure()
+        output: Output path, defaults to benchmarks/results/{suite}-{timestamp}.json
+
+    Returns:
+        Path: The written file
+    """
+    info = machine_info()
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = info["timestamp"].replace(":", "").replace("-", "").replace("+0000", "Z")
+        output = RESULTS_DIR / f"{suite}-{stamp}.json"
+
+    output = Path(output)
+    with open(output, "w") as f:
+        json.dump({"suite": suite, "machine": info, "benchmarks": benchmarks}, f, indent=2)
+    print(f"Results written to {output}")
+    return output
+
+
+def compare_results(old_path, new_path, threshold=0.10):
+    """
+    Print the median change of every benchmark present in both result files.
+
+    Args:
+        old_path: Baseline results JSON
+        new_path: New results JSON
+        threshold: Relative slowdown reported as a regression (0.10 = 10%)
+
+    Returns:
+        List of names of regressed benchmarks
+    """
+    with open(old_path) as f:
+        old = {b["name"]: b for b in json.load(f)["benchmarks"]}
+    with open(new_path) as f:
+        new = {b["name"]: b for b in json.load(f)["benchmarks"]}
+
+    regressions = []
+    for name, result in new.items():
+        if name not in old:
+            continue
+        before, after = old[name]["median"], result["median"]
+        change = (after - before) / before if before else 0.0
+        marker = ""
+        if change > threshold:
+            marker = "  ✗ slower"
+            regressions.append(name)
+        elif change < -threshold:
+            marker = "  ✓ faster"
+        print(f"  {name:<55} {before * 1000:10.3f} ms -> {after * 1000:10.3f} ms  ({change:+.1%}){marker}")
+    return regressions
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python benchmarks/harness.py OLD.json NEW.json")
+        sys.exit(2)
+    sys.exit(1 if compare_results(sys.argv[1], sys.argv[2]) else 0)
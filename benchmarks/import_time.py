@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for util.py
+
+Runs `python -X importtime -c "import util"` in fresh interpreters and fails
+when importing util gets slower than the budget or starts pulling in heavy
+dependencies (pandas, requests, marimo, ...) at import time. Those must stay
+lazy so that every notebook cold start, especially in Pyodide, stays fast.
+
+The module is byte-compiled before measuring, so the timings don't include
+compiling util.py's source. Without that a fresh checkout (or
+PYTHONDONTWRITEBYTECODE=1) recompiles it in every run, which costs several
+times the import itself and made the check flaky.
+
+Usage:
+    python benchmarks/import_time.py                  # Check against the default budget
+    python benchmarks/import_time.py --budget-ms 10   # Use a stricter budget
+    python benchmarks/import_time.py --runs 10 --top 15
+"""
+
+import argparse
+import importlib.util
+import json
+import py_compile
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that util.py must only import inside the functions that use them
+FORBIDDEN_MODULES = ["pandas", "pyarrow", "numpy", "requests", "urllib3", "marimo"]
+
+DEFAULT_BUDGET_MS = 20.0
+
+
+def precompile(module="util"):
+    """
+    Write the bytecode cache of a module so fresh interpreters don't recompile it.
+
+    Args:
+        module: Module name, resolved from the repository root
+
+    Returns:
+        Path of the compiled .pyc file
+    """
+    sys.path.insert(0, str(REPO_ROOT))
+    try:
+        spec = importlib.util.find_spec(module)
+    finally:
+        sys.path.remove(str(REPO_ROOT))
+    return py_compile.compile(spec.origin, doraise=True)
+
+
+def run_importtime(module="util"):
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module: Module name to import
+
+    Returns:
+        List of (self_us, cumulative_us, module_name) tuples in import order
+    """
+    cmd = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    result = subprocess.run(cmd, cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((int(self_us), int(cumulative_us), name.strip()))
+    return entries
+
+
+def measure(module="util", runs=5):
+    """
+    Measure the cumulative import time of a module over several runs.
+
+    Args:
+        module: Module name to import
+        runs: Number of fresh interpreters to run
+
+    Returns:
+        Dict with timings (ms), the imported modules and the slowest imports
+    """
+    precompile(module)
+    timings_ms = []
+    entries = []
+    for _ in range(runs):
+        entries = run_importtime(module)
+        cumulative_us = next(c for _, c, name in entries if name == module)
+        timings_ms.append(cumulative_us / 1000)
+
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": round(statistics.median(timings_ms), 3),
+        "min_ms": round(min(timings_ms), 3),
+        "max_ms": round(max(timings_ms), 3),
+        "imported": [name for _, _, name in entries],
+        "slowest": sorted(entries, reverse=True),
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Check the cold import time of util.py")
+    parser.add_argument("--module", default="util", help="Module to import (default: util)")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to run")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Maximum median cumulative import time (default: {DEFAULT_BUDGET_MS} ms)")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to show")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+
+    args = parser.parse_args()
+
+    results = measure(args.module, args.runs)
+
+    print(f"import {args.module}: median {results['median_ms']} ms "
+          f"(min {results['min_ms']} ms, max {results['max_ms']} ms, {args.runs} runs)")
+    print("Slowest imports (self time):")
+    for self_us, cumulative_us, name in results["slowest"][:args.top]:
+        print(f"  {self_us / 1000:8.3f} ms  {name}")
+
+    heavy = sorted({
+        name.split(".")[0] for name in results["imported"]
+        if name.split(".")[0] in FORBIDDEN_MODULES
+    })
+
+    if args.json:
+        results["budget_ms"] = args.budget_ms
+        results["heavy_imports"] = heavy
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+    success = True
+    if heavy:
+        print(f"✗ Heavy modules imported at import time: {', '.join(heavy)}")
+        success = False
+    if results["median_ms"] > args.budget_ms:
+        print(f"✗ Import time {results['median_ms']} ms exceeds budget of {args.budget_ms} ms")
+        success = False
+
+    if success:
+        print(f"✓ Import time within budget of {args.budget_ms} ms")
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
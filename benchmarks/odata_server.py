@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the CBS OData API
+
+Serves the data/ parquet files through the same URL shapes as
+https://opendata.cbs.nl/ODataApi/OData/, so get_cbs_url, get_cbs_url_paginated
+and data_fetcher.py can be exercised without the live service:
+
+    /ODataApi/OData/{id}                      service document ({id}.parquet)
+    /ODataApi/OData/{id}/{endpoint}           endpoint rows ({id}_{endpoint}.parquet)
+    /ODataApi/OData/{id}/{endpoint}/$count    number of (filtered) rows
+
+Endpoints support $skip, $top, $select and $filter. Like CBS, a single
+response holds at most 10000 rows. Filters support eq/ne/gt/ge/lt/le
+comparisons on strings and numbers joined by `and`/`or`, plus
+substringof('x', Field) and startswith(Field, 'x'), which covers what the
+CBS API documents for the TypedDataSet endpoints.
+
+Latency and failures can be injected to test the fetch code's resilience:
+throttling (429 with Retry-After), server errors (503) and truncated bodies
+(the connection drops halfway through the response).
+
+Usage:
+    python benchmarks/odata_server.py                                 # http://127.0.0.1:8765
+    python benchmarks/odata_server.py --latency-ms 200 --throttle-rate 0.1
+    python benchmarks/odata_server.py --data-dir benchmarks/.cache/synthetic/x100
+    python data_fetcher.py --base-url http://127.0.0.1:8765/ODataApi/OData
+
+Or in-process:
+    with ODataServer(latency=0.05, error_rate=0.1) as server:
+        df = get_cbs_url_paginated(f"{server.base_url}/85236NED/TypedDataSet")
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+API_PREFIX = "/ODataApi/OData"
+
+# CBS returns at most this many rows per response
+MAX_TOP = 10000
+
+
+class ODataError(Exception):
+    """A request the emulator rejects with an HTTP error status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Tokens of an OData $filter expression
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^']|'')*')
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<punct>[(),])
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+
+_COMPARISONS = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "gt": lambda column, value: column > value,
+    "ge": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "le": lambda column, value: column <= value,
+}
+
+
+def _tokenize(expression):
+    """Split a $filter expression into (kind, value) tokens."""
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN_RE.match(expression, position)
+        if not match:
+            raise ODataError(400, f"Invalid $filter near: {expression[position:]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            value = value[1:-1].replace("''", "'")
+        elif kind == "number":
+            value = float(value) if "." in value else int(value)
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+class _FilterParser:
+    """Recursive-descent parser turning a $filter expression into a boolean row mask."""
+
+    def __init__(self, df, expression):
+        self.df = df
+        self.tokens = _tokenize(expression)
+        self.position = 0
+
+    def parse(self):
+        mask = self._or()
+        if self.position != len(self.tokens):
+            raise ODataError(400, f"Unexpected token in $filter: {self.tokens[self.position][1]!r}")
+        return mask
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _take(self, kind=None, value=None):
+        token = self._peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+            raise ODataError(400, f"Expected {value or kind} in $filter, got {token[1]!r}")
+        self.position += 1
+        return token[1]
+
+    def _or(self):
+        mask = self._and()
+        while self._peek() == ("name", "or"):
+            self._take()
+            mask = mask | self._and()
+        return mask
+
+    def _and(self):
+        mask = self._term()
+        while self._peek() == ("name", "and"):
+            self._take()
+            mask = mask & self._term()
+        return mask
+
+    def _term(self):
+        kind, value = self._peek()
+        if (kind, value) == ("punct", "("):
+            self._take()
+            mask = self._or()
+            self._take("punct", ")")
+            return mask
+        if (kind, value) == ("name", "not"):
+            self._take()
+            return ~self._term()
+        if (kind, value) in (("name", "substringof"), ("name", "startswith")):
+            return self._function()
+
+        column = self._column(self._take("name"))
+        operator = self._take("name")
+        if operator not in _COMPARISONS:
+            raise ODataError(400, f"Unsupported operator in $filter: {operator}")
+        literal = self._literal()
+        # CBS keys are padded with spaces (e.g. 'NL01  '), compare them trimmed
+        if isinstance(literal, str):
+            column = column.astype(str).str.strip()
+            literal = literal.strip()
+        return _COMPARISONS[operator](column, literal).fillna(False).astype(bool)
+
+    def _function(self):
+        name = self._take("name")
+        self._take("punct", "(")
+        if name == "substringof":
+            needle = self._literal()
+            self._take("punct", ",")
+            column = self._column(self._take("name"))
+            mask = column.astype(str).str.contains(needle, regex=False)
+        else:
+            column = self._column(self._take("name"))
+            self._take("punct", ",")
+            mask = column.astype(str).str.strip().str.startswith(self._literal())
+        self._take("punct", ")")
+        return mask.fillna(False).astype(bool)
+
+    def _literal(self):
+        kind, value = self._peek()
+        if kind not in ("string", "number"):
+            raise ODataError(400, f"Expected a literal in $filter, got {value!r}")
+        self.position += 1
+        return value
+
+    def _column(self, name):
+        if name not in self.df.columns:
+            raise ODataError(400, f"Unknown property in $filter: {name}")
+        return self.df[name]
+
+
+def apply_query(df, query):
+    """
+    Apply the OData system query options of a request to an endpoint.
+
+    Args:
+        df: The endpoint rows
+        query: Dict of query options ($filter, $select, $skip, $top)
+
+    Returns:
+        pandas.DataFrame: The selected rows and columns (at most MAX_TOP rows)
+    """
+    if query.get("$filter"):
+        df = df[_FilterParser(df, query["$filter"]).parse()]
+
+    if query.get("$select"):
+        columns = [c.strip() for c in query["$select"].split(",") if c.strip()]
+        unknown = [c for c in columns if c not in df.columns]
+        if unknown:
+            raise ODataError(400, f"Unknown property in $select: {', '.join(unknown)}")
+        df = df[columns]
+
+    try:
+        skip = int(query.get("$skip", 0))
+        top = min(int(query.get("$top", MAX_TOP)), MAX_TOP)
+    except ValueError:
+        raise ODataError(400, "$skip and $top must be integers")
+
+    return df.iloc[skip:skip + top]
+
+
+def to_records(df):
+    """Convert rows to JSON-ready dicts, with missing values as null."""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+class ODataServer:
+    """
+    Threaded OData emulator over a folder of {id}_{endpoint}.parquet files.
+
+    Args:
+        data_dir: Folder with the parquet files (default: data/)
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        latency: Seconds added to every response
+        jitter: Random extra seconds (uniform 0..jitter) added to every response
+        throttle_rate: Fraction of requests answered with 429 Too Many Requests
+        error_rate: Fraction of requests answered with 503 Service Unavailable
+        truncate_rate: Fraction of responses whose body is cut off halfway
+        retry_after: Retry-After seconds sent with 429/503 responses
+        seed: Random seed for the failure injection
+    """
+
+    def __init__(self, data_dir=None, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 throttle_rate=0.0, error_rate=0.0, truncate_rate=0.0, retry_after=1.0, seed=None):
+        self.data_dir = Path(data_dir) if data_dir else REPO_ROOT / "data"
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "truncated": 0, "rows": 0}
+
+        self._frames = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        """Base URL to use instead of https://opendata.cbs.nl/ODataApi/OData."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def load(self, dataset_id, endpoint=""):
+        """Read (and keep) the parquet file behind an OData path."""
+        filename = f"{dataset_id}_{endpoint}.parquet" if endpoint else f"{dataset_id}.parquet"
+        with self._lock:
+            if filename not in self._frames:
+                path = self.data_dir / filename
+                if not path.exists():
+                    raise ODataError(404, f"Resource not found: {dataset_id}/{endpoint}")
+                self._frames[filename] = pd.read_parquet(path)
+            return self._frames[filename]
+
+    def inject(self):
+        """Decide the fate of a request: None, "throttle", "error" or "truncate"."""
+        with self._lock:
+            self.stats["requests"] += 1
+            roll = self.random.random()
+            for outcome, rate in (("throttle", self.throttle_rate), ("error", self.error_rate),
+                                  ("truncate", self.truncate_rate)):
+                if roll < rate:
+                    self.stats[{"throttle": "throttled", "error": "errors", "truncate": "truncated"}[outcome]] += 1
+                    return outcome
+                roll -= rate
+            return None
+
+    def delay(self):
+        """Seconds to wait before answering a request."""
+        with self._lock:
+            return self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def respond(self, path, query):
+        """
+        Build the JSON document for an OData path.
+
+        Args:
+            path: Request path below /ODataApi/OData (e.g. "/85236NED/TypedDataSet")
+            query: Dict of query options
+
+        Returns:
+            The JSON document (dict, or int for $count)
+        """
+        parts = [unquote(p) for p in path.strip("/").split("/") if p]
+        if not parts or len(parts) > 3 or (len(parts) == 3 and parts[2] != "$count"):
+            raise ODataError(404, f"Resource not found: {path}")
+
+        dataset_id = parts[0]
+        endpoint = parts[1] if len(parts) > 1 else ""
+        df = self.load(dataset_id, endpoint)
+
+        if len(parts) == 3:
+            if query.get("$filter"):
+                df = df[_FilterParser(df, query["$filter"]).parse()]
+            return len(df)
+
+        page = apply_query(df, query) if endpoint else df
+        with self._lock:
+            self.stats["rows"] += len(page)
+        metadata = f"{self.base_url}/{dataset_id}/$metadata"
+        return {
+            "odata.metadata": f"{metadata}#{endpoint}" if endpoint else metadata,
+            "value": to_records(page),
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                time.sleep(server.delay())
+
+                if not url.path.startswith(API_PREFIX):
+                    return self.send_json(404, {"error": f"Resource not found: {url.path}"})
+
+                outcome = server.inject()
+                if outcome == "throttle":
+                    return self.send_json(429, {"error": "Too many requests"}, retry_after=True)
+                if outcome == "error":
+                    return self.send_json(503, {"error": "Service unavailable"}, retry_after=True)
+
+                try:
+                    document = server.respond(url.path[len(API_PREFIX):], query)
+                except ODataError as e:
+                    return self.send_json(e.status, {"error": str(e)})
+                self.send_json(200, document, truncate=outcome == "truncate")
+
+            def send_json(self, status, document, retry_after=False, truncate=False):
+                body = json.dumps(document, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json;charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if retry_after:
+                    self.send_header("Retry-After", f"{server.retry_after:g}")
+                if truncate:
+                    self.send_header("Connection", "close")
+                    self.close_connection = True
+                self.end_headers()
+                self.wfile.write(body[:math.ceil(len(body) / 2)] if truncate else body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Serve data/ through a local CBS OData emulator")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8765, help="Port to bind")
+    parser.add_argument("--data-dir", default=str(REPO_ROOT / "data"), help="Folder with the parquet files")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra latency per response")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Fraction of responses cut off halfway")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429/503")
+    parser.add_argument("--seed", type=int, help="Random seed for the failure injection")
+
+    args = parser.parse_args()
+
+    server = ODataServer(
+        data_dir=args.data_dir, host=args.host, port=args.port,
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        throttle_rate=args.throttle_rate, error_rate=args.error_rate,
+        truncate_rate=args.truncate_rate, retry_after=args.retry_after, seed=args.seed,
+    )
+    print(f"Serving {server.data_dir} at {server.base_url}")
+    print(f"Example: {server.base_url}/85405NED/TypedDataSet?$top=5")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStopped. {server.stats}")
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
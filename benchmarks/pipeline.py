@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the load -> annotate -> compute pipeline
+
+Measures each stage of the playbooks separately against the real data/ files:
+
+    load/{id}/{endpoint}      util.get_local_data per endpoint
+    annotate/{id}             nl.cbs annotate_data_set per dataset
+    compute/...               the computation cells of nl-personal-vehicles.py, and the whole notebook
+    sweep/...                 a grid of nl-personal-vehicles scenarios, through the notebook cells one by one and with nl.personal_vehicles
+    roads/...                 the cells of roads.py, on locally cached copies of its xlsx sources
+
+The compute, sweep and roads stages run the notebooks themselves through app.run()
+(with the runner of profile_notebook.py) and then time single cells re-run
+on the notebook's state, so they measure the code the notebooks run.
+
+Results are written to benchmarks/results/pipeline-{timestamp}.json and can be
+compared with `python benchmarks/harness.py OLD.json NEW.json`.
+
+Usage:
+    python benchmarks/pipeline.py                        # Run all stages
+    python benchmarks/pipeline.py --stage load --stage annotate
+    python benchmarks/pipeline.py --stage sweep --sweep-scenarios 10000
+    python benchmarks/pipeline.py --rounds 10 --output results.json
+    python benchmarks/pipeline.py --roads-cache ~/xlsx   # Directory with the roads.py xlsx files
+
+The roads stage is skipped unless both xlsx files (see ROADS_FILES) are in
+the cache directory; the benchmark never downloads them.
+"""
+
+import argparse
+import contextlib
+import math
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.harness import measure, quiet, save_results, compare_results
+from benchmarks.profile_notebook import profile_notebook
+
+STAGES = ["load", "annotate", "compute", "sweep", "roads"]
+
+# Endpoints per dataset, as stored in data/
+ENDPOINTS = {
+    "85236NED": ["", "DataProperties", "Perioden", "RegioS", "TypedDataSet"],
+    "85237NED": ["", "Bouwjaar", "DataProperties", "Perioden", "TypedDataSet"],
+    "85405NED": ["", "BrandstofsoortVoertuig", "LeeftijdVoertuig", "Perioden", "TypedDataSet"],
+}
+
+# Filtered reads per TypedDataSet, which the data_fetcher parquet layout lets skip row groups
+FILTERED_READS = {
+    "85236NED": [("Perioden", "==", "2023JJ00"), ("RegioS", "==", "GM0363")],
+    "85237NED": [("Perioden", "==", "2023JJ00")],
+    "85405NED": [("Perioden", "==", "2023JJ00")],
+}
+
+PERSONAL_VEHICLES_NOTEBOOK = REPO_ROOT / "nl" / "personal-transport" / "nl-personal-vehicles.py"
+ROADS_NOTEBOOK = REPO_ROOT / "gb-sct" / "personal-transport" / "roads.py"
+
+# Cells of nl-personal-vehicles.py timed by the compute stage, by a variable each one defines
+COMPUTE_CELLS = {
+    "average_mileage": "average_petrol_km_per_year",
+    "registered_cars": "registered_cars",
+    "fuel_type_distribution": "passenger_cars_distribution_petrol",
+    "number_fuel_types": "number_fuel_types",
+    "vehicle_operations": "vehicle_operations",
+}
+
+# Source files roads.py downloads; the roads stage serves them from a local cache
+# so the benchmark doesn't depend on the network
+ROADS_FILES = {
+    "fuel_consumption": "https://assets.publishing.service.gov.uk/media/685a855272588f418862071f/subnational-road-transport-fuel-consumption-tables-2005-2023.xlsx",
+    "conversion_factors": "https://assets.publishing.service.gov.uk/media/6846b6ea57f3515d9611f0dd/ghg-conversion-factors-2025-flat-format.xlsx",
+}
+
+# Cells of roads.py timed by the roads stage, by a variable each one defines
+ROADS_CELLS = {
+    "read_fuel_consumption_xlsx": "subnational_road_transport_fuel_consumption_dataframe",
+    "read_conversion_factors_xlsx": "conversion_factors",
+    "consumption_ktoe": "subnational_road_transport_fuel_consumption_ktoe",
+    "consumption_kwh": "subnational_road_transport_fuel_consumption_kwh",
+    "emission_factors": "petrol_emission_factor_kwh",
+    "emissions": "subnational_road_transport_emissions",
+    "operations_factors": "average_local_bus_factor",
+    "operations": "subnational_road_transport_operations",
+    "energy_intensity": "subnational_road_transport_energy_intensity",
+}
+
+
+def run_notebook(notebook):
+    """
+    Run a notebook through app.run() from the repository root.
+
+    Returns:
+        The profile_notebook.Profiler of the run, holding its cells and their globals
+    """
+    profiler, error = quiet(profile_notebook)(notebook, memory=False)
+    if error is not None:
+        raise error
+    return profiler
+
+
+def find_cell(profiler, variable):
+    """Return (cell, globals, graph, executor) of the notebook's own (not an embedded app's) cell defining `variable`."""
+    for record in profiler.records:
+        if record["kind"] == "cell" and record["depth"] == 1 and variable in record["defs"]:
+            return profiler.cells[record["cell_id"]]
+    raise KeyError(f"No cell defines {variable}")
+
+
+def notebook_cell(profiler, variable):
+    """Return a callable re-running the (synchronous) cell that defines `variable` on the notebook's globals."""
+    cell, glbls, graph, executor = find_cell(profiler, variable)
+    return quiet(lambda: executor.execute_cell(cell, glbls, graph))
+
+
+def bench_load(rounds):
+    """Time util.get_local_data for every endpoint of every dataset."""
+    from util import get_local_data
+
+    results = []
+    for dataset_id, endpoints in ENDPOINTS.items():
+        for endpoint in endpoints:
+            load = quiet(lambda: get_local_data(dataset_id, endpoint))
+            rows = len(load())
+            name = f"load/{dataset_id}/{endpoint or 'metadata'}"
+            results.append(measure(name, load, rounds=rounds, rows=rows))
+
+        for column, op, value in FILTERED_READS.get(dataset_id, []):
+            filters = [(column, op, value)]
+            load = quiet(lambda: get_local_data(dataset_id, "TypedDataSet", filters=filters))
+            rows = len(load())
+            name = f"load/{dataset_id}/TypedDataSet[{column}={value}]"
+            results.append(measure(name, load, rounds=rounds, rows=rows))
+    return results
+
+
+def load_annotation_inputs():
+    """Load the raw endpoints each dataset's annotation needs."""
+    from util import get_local_data
+
+    get = quiet(get_local_data)
+    return {
+        "85236NED": dict(
+            typed_data_set_df=get("85236NED", "TypedDataSet"),
+            dimensions={"RegioS": get("85236NED", "RegioS")},
+            data_time_periods_df=get("85236NED", "Perioden"),
+            data_properties_df=get("85236NED", "DataProperties"),
+        ),
+        "85237NED": dict(
+            typed_data_set_df=get("85237NED", "TypedDataSet"),
+            dimensions={"Bouwjaar": get("85237NED", "Bouwjaar")},
+            data_time_periods_df=get("85237NED", "Perioden"),
+            data_properties_df=get("85237NED", "DataProperties"),
+        ),
+        "85405NED": dict(
+            typed_data_set_df=get("85405NED", "TypedDataSet"),
+            dimensions={
+                "LeeftijdVoertuig": get("85405NED", "LeeftijdVoertuig"),
+                "BrandstofsoortVoertuig": get("85405NED", "BrandstofsoortVoertuig"),
+            },
+            data_time_periods_df=get("85405NED", "Perioden"),
+        ),
+    }
+
+
+def bench_annotate(rounds):
+    """Time the annotation of every dataset (inputs loaded once, outside the timing)."""
+    from nl.cbs import annotate_data_set
+
+    results = []
+    for dataset_id, inputs in load_annotation_inputs().items():
+        rows = len(inputs["typed_data_set_df"])
+        results.append(measure(f"annotate/{dataset_id}", lambda: annotate_data_set(**inputs),
+                               rounds=rounds, rows=rows))
+    return results
+
+
+def bench_compute(rounds):
+    """Time the computation cells of nl-personal-vehicles.py, and the notebook as a whole."""
+    profiler = run_notebook(PERSONAL_VEHICLES_NOTEBOOK)
+    regions = len(find_cell(profiler, "registered_cars")[1]["registered_cars"])
+
+    results = [measure(f"compute/{name}", notebook_cell(profiler, variable), rounds=rounds, regions=regions)
+               for name, variable in COMPUTE_CELLS.items()]
+    results.append(measure("compute/notebook", lambda: run_notebook(PERSONAL_VEHICLES_NOTEBOOK),
+                           rounds=max(1, rounds // 2), warmup=0))
+    return results
+
+
+def sweep_grid(scenarios):
+    """A grid of about `scenarios` 2023 scenarios: BEV share x mileage factor."""
+    import numpy as np
+
+    factors = max(1, round(math.sqrt(scenarios / 10)))
+    return {
+        "bev_share": np.linspace(0, 1, max(1, round(scenarios / factors))),
+        "mileage_factor": np.linspace(0.8, 1.2, factors),
+    }
+
+
+# Globals of nl-personal-vehicles.py a sweep scenario overrides before re-running
+# the number_fuel_types and vehicle_operations cells
+SWEEP_DISTRIBUTIONS = {
+    "Petrol": "passenger_cars_distribution_petrol",
+    "Diesel": "passenger_cars_distribution_diesel",
+    "LPG": "passenger_cars_distribution_lpg",
+    "Electricity": "passenger_cars_distribution_electricity",
+    "CNG": "passenger_cars_distribution_cng",
+    "Other/Unknown": "passenger_cars_distribution_other_unknown",
+}
+SWEEP_MILEAGES = [
+    "average_petrol_km_per_year",
+    "average_diesel_km_per_year",
+    "average_electric_km_per_year",
+    "average_plug_in_hybrid_km_per_year",
+    "average_lpg_km_per_year",
+    "average_cng_km_per_year",
+]
+
+
+def sweep_loop(profiler, grid):
+    """
+    The scenarios of a grid one at a time, by re-running the notebook's own cells.
+
+    For each scenario the fuel type shares are rescaled to the BEV share and the
+    mileages multiplied by the factor in the notebook's globals, then the
+    number_fuel_types and vehicle_operations cells are re-run on them. The
+    globals are restored afterwards.
+
+    Returns:
+        {(bev_share, mileage_factor): vehicle_operations}
+    """
+    number_fuel_types = notebook_cell(profiler, "number_fuel_types")
+    operations = notebook_cell(profiler, "vehicle_operations")
+    glbls = find_cell(profiler, "vehicle_operations")[1]
+    original = {name: glbls[name] for name in [*SWEEP_DISTRIBUTIONS.values(), *SWEEP_MILEAGES]}
+
+    results = {}
+    try:
+        for bev_share in grid["bev_share"]:
+            scale = (1 - bev_share) / (1 - original[SWEEP_DISTRIBUTIONS["Electricity"]])
+            for fuel, name in SWEEP_DISTRIBUTIONS.items():
+                glbls[name] = bev_share if fuel == "Electricity" else original[name] * scale
+            for factor in grid["mileage_factor"]:
+                for name in SWEEP_MILEAGES:
+                    glbls[name] = original[name] * factor
+                number_fuel_types()
+                operations()
+                results[bev_share, factor] = glbls["vehicle_operations"]
+    finally:
+        glbls.update(original)
+    return results
+
+
+def bench_sweep(rounds, scenarios):
+    """Time a scenario grid evaluated one scenario at a time and with the vectorized sweep."""
+    from nl.personal_vehicles import load_inputs, sweep
+
+    profiler = run_notebook(PERSONAL_VEHICLES_NOTEBOOK)
+    regions = len(find_cell(profiler, "registered_cars")[1]["registered_cars"])
+    sweep_inputs = quiet(load_inputs)()
+
+    grid = sweep_grid(scenarios)
+    scenario_count = len(grid["bev_share"]) * len(grid["mileage_factor"])
+    results = [
+        measure("sweep/loop", lambda: sweep_loop(profiler, grid),
+                rounds=rounds, scenarios=scenario_count, regions=regions),
+        measure("sweep/vectorized", lambda: sweep(grid, sweep_inputs),
+                rounds=rounds, scenarios=scenario_count, regions=len(sweep_inputs["regions"])),
+    ]
+    for result in results:
+        result["scenarios_per_s"] = round(scenario_count / result["median"])
+    return results
+
+
+@contextlib.contextmanager
+def cached_roads_files(cache_dir):
+    """
+    Answer roads.py's requests.get calls for ROADS_FILES from the cache directory.
+
+    Yields:
+        True if both files are cached (the stage is skipped otherwise)
+    """
+    import requests
+
+    paths = {url: Path(cache_dir) / Path(url).name for url in ROADS_FILES.values()}
+    missing = [url for url, path in paths.items() if not path.exists()]
+    if missing:
+        yield False
+        return
+
+    original_get = requests.get
+
+    def get(url, *args, **kwargs):
+        if url not in paths:
+            return original_get(url, *args, **kwargs)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = paths[url].read_bytes()
+        return response
+
+    requests.get = get
+    try:
+        yield True
+    finally:
+        requests.get = original_get
+
+
+def bench_roads(rounds, cache_dir):
+    """Time the cells of roads.py (xlsx parsing, emissions, operations) on the cached xlsx files."""
+    with cached_roads_files(cache_dir) as cached:
+        if not cached:
+            print(f"  ⚠ Skipping roads stage: download these files into {cache_dir} to run it:")
+            for url in ROADS_FILES.values():
+                print(f"    {url}")
+            return []
+
+        profiler = run_notebook(ROADS_NOTEBOOK)
+        return [
+            measure(f"roads/{name}", notebook_cell(profiler, variable),
+                    rounds=max(1, rounds // 2) if name.endswith("_xlsx") else rounds)
+            for name, variable in ROADS_CELLS.items()
+        ]
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the load -> annotate -> compute pipeline")
+    parser.add_argument("--stage", action="append", choices=STAGES,
+                        help="Stage to run (repeatable, default: all)")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per benchmark")
+    parser.add_argument("--sweep-scenarios", type=int, default=1000, help="Scenarios in the sweep stage's grid")
+    parser.add_argument("--roads-cache", default=str(REPO_ROOT / "benchmarks" / ".cache"),
+                        help="Directory holding the roads.py xlsx files (the roads stage is skipped without them)")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/pipeline-{timestamp}.json)")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+
+    args = parser.parse_args()
+
+    # util resolves data/ relative to the working directory
+    os.chdir(REPO_ROOT)
+
+    stages = args.stage or STAGES
+    results = []
+    for stage in stages:
+        print(f"\n=== {stage} ===")
+        if stage == "load":
+            results += bench_load(args.rounds)
+        elif stage == "annotate":
+            results += bench_annotate(args.rounds)
+        elif stage == "compute":
+            results += bench_compute(args.rounds)
+        elif stage == "sweep":
+            results += bench_sweep(args.rounds, args.sweep_scenarios)
+        elif stage == "roads":
+            results += bench_roads(args.rounds, args.roads_cache)
+
+    output = save_results("pipeline", results, args.output)
+
+    if args.compare:
+        print(f"\n=== Compared to {args.compare} ===")
+        regressions = compare_results(args.compare, output)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
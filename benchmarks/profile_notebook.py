@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Per-cell runtime and memory profiler for the playbook notebooks
+
+Runs a marimo notebook headlessly (like `python notebook.py`) and records,
+for every cell and every app it embeds, the wall time, CPU time and peak
+memory (tracemalloc). Embedded apps are nested under the cell that embeds
+them, so the cost of e.g. the data-table apps in nl-personal-vehicles shows
+up both per embed and per embedded cell.
+
+Outputs:
+- a report sorted by self time (wall time minus nested cells/apps)
+- --trace FILE: Chrome trace events (open in https://ui.perfetto.dev,
+  chrome://tracing or https://www.speedscope.app)
+- --folded FILE: folded stacks for flamegraph.pl / speedscope
+
+Usage:
+    python benchmarks/profile_notebook.py nl/personal-transport/nl-personal-vehicles.py
+    python benchmarks/profile_notebook.py gb-sct/personal-transport/roads.py --trace roads.trace.json
+    python benchmarks/profile_notebook.py nl/cbs/data_table_85236NED.py --no-memory --top 10
+
+The runner hooks into marimo's script runner (marimo._runtime.app.script_runner),
+which is private API: check it when upgrading marimo.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+class Profiler:
+    """
+    Collects nested wall/CPU/memory measurements of notebook runs and cells.
+
+    Runs are serialized (nested embeds block their parent cell), so a single
+    stack shared by all threads describes the nesting. `cells` keeps every
+    executed cell by id as (cell, globals, graph, executor), so a benchmark
+    can re-run one on the notebook's state (see benchmarks/pipeline.py).
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.records = []
+        self.cells = {}
+        self._stack = []
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def measure(self, kind, name, **attributes):
+        """
+        Measure a block as a child of the innermost open block.
+
+        Args:
+            kind: "app" or "cell"
+            name: Display name
+            **attributes: Extra fields stored with the record
+        """
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+        else:
+            current = 0
+
+        frame = {
+            "kind": kind,
+            "name": name,
+            "path": [f["name"] for f in self._stack] + [name],
+            "depth": len(self._stack),
+            "start": time.perf_counter(),
+            "cpu_start": time.process_time(),
+            "memory_start": current,
+            "peak": current,
+            "children_wall": 0.0,
+            "thread": threading.get_ident(),
+            "error": None,
+            **attributes,
+        }
+        self._stack.append(frame)
+        try:
+            yield frame
+        except BaseException as e:
+            frame["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._stack.pop()
+            wall = time.perf_counter() - frame["start"]
+            cpu = time.process_time() - frame["cpu_start"]
+            if self.memory:
+                frame["peak"] = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+                if self._stack:
+                    self._stack[-1]["peak"] = max(self._stack[-1]["peak"], frame["peak"])
+                    tracemalloc.reset_peak()
+            if self._stack:
+                self._stack[-1]["children_wall"] += wall
+
+            self.records.append({
+                "kind": kind,
+                "name": name,
+                "path": frame["path"],
+                "depth": frame["depth"],
+                "start_s": frame["start"] - self._origin,
+                "wall_s": wall,
+                "self_s": wall - frame["children_wall"],
+                "cpu_s": cpu,
+                "peak_mb": (frame["peak"] - frame["memory_start"]) / (1024 * 1024) if self.memory else None,
+                "thread": frame["thread"],
+                "error": frame["error"],
+                **attributes,
+            })
+
+    def report(self, top=None):
+        """Print the records sorted by self time."""
+        records = sorted(self.records, key=lambda r: r["self_s"], reverse=True)[:top]
+        total = max((r["wall_s"] for r in self.records if r["depth"] == 0), default=0.0)
+
+        print(f"\n{'self s':>8} {'wall s':>8} {'cpu s':>8} {'peak MB':>8} {'% run':>6}  cell")
+        for r in records:
+            peak = f"{r['peak_mb']:8.1f}" if r["peak_mb"] is not None else f"{'-':>8}"
+            share = r["self_s"] / total if total else 0.0
+            name = " > ".join(r["path"][1:]) or r["path"][0]
+            marker = "  ✗ " + r["error"] if r["error"] else ""
+            print(f"{r['self_s']:8.3f} {r['wall_s']:8.3f} {r['cpu_s']:8.3f} {peak} {share:6.1%}  "
+                  f"{'[app] ' if r['kind'] == 'app' else ''}{name}{marker}")
+        print(f"\nTotal: {total:.3f} s wall")
+
+    def write_trace(self, path):
+        """Write Chrome trace events (complete "X" events, microseconds)."""
+        threads = {thread: i for i, thread in enumerate(dict.fromkeys(r["thread"] for r in self.records))}
+        events = [
+            {
+                "name": r["name"],
+                "cat": r["kind"],
+                "ph": "X",
+                "ts": round(r["start_s"] * 1e6, 3),
+                "dur": round(r["wall_s"] * 1e6, 3),
+                "pid": os.getpid(),
+                "tid": threads[r["thread"]],
+                "args": {
+                    "cpu_s": round(r["cpu_s"], 6),
+                    "peak_mb": round(r["peak_mb"], 3) if r["peak_mb"] is not None else None,
+                    **({"error": r["error"]} if r["error"] else {}),
+                },
+            }
+            for r in self.records
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"Trace written to {path}")
+
+    def write_folded(self, path):
+        """Write folded stacks ("app;cell;... self_microseconds") for flamegraph tools."""
+        with open(path, "w") as f:
+            for r in self.records:
+                stack = ";".join(name.replace(";", ",") for name in r["path"])
+                f.write(f"{stack} {max(0, round(r['self_s'] * 1e6))}\n")
+        print(f"Folded stacks written to {path}")
+
+
+def cell_label(cell):
+    """Name a cell by the variables it defines, or its first line of code."""
+    defs = sorted(name for name in cell.defs if not name.startswith("_"))
+    if defs:
+        label = ", ".join(defs[:3]) + (", ..." if len(defs) > 3 else "")
+    else:
+        lines = [line.strip() for line in cell.code.splitlines() if line.strip()]
+        label = lines[0] if lines else "(empty)"
+    # Cells of embedded (cloned) apps get a per-app prefix before the 4-character cell id
+    return f"{str(cell.cell_id)[-4:]}: {label[:60]}"
+
+
+def _run_coroutine(coro):
+    """
+    asyncio.run that also works inside a running event loop.
+
+    Embedding an app with async cells from an async cell calls asyncio.run
+    while the parent's loop is running, which marimo's script runner doesn't
+    support. Run the nested loop in a worker thread (the parent is blocked on
+    the embed anyway) with the parent's runtime context.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    from marimo._runtime.context import types as context_types
+
+    parent_context = context_types.get_context() if context_types.runtime_context_installed() else None
+    outcome = {}
+
+    def target():
+        if parent_context is not None:
+            context_types.initialize_context(parent_context)
+        try:
+            outcome["value"] = asyncio.run(coro)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            if parent_context is not None:
+                context_types.teardown_context()
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
+
+
+@contextmanager
+def profiling(profiler):
+    """Hook the profiler into marimo's script runner for the duration of the block."""
+    from marimo._runtime.app import script_runner
+
+    runner_class = script_runner.AppScriptRunner
+    original_run = runner_class.run
+    original_get_executor = script_runner.get_executor
+    original_asyncio = script_runner.asyncio
+
+    class ProfilingExecutor:
+        def __init__(self, inner):
+            self.inner = inner
+
+        def execute_cell(self, cell, glbls, graph):
+            profiler.cells[cell.cell_id] = (cell, glbls, graph, self.inner)
+            with profiler.measure("cell", cell_label(cell), cell_id=cell.cell_id, defs=sorted(cell.defs)):
+                return self.inner.execute_cell(cell, glbls, graph)
+
+        async def execute_cell_async(self, cell, glbls, graph):
+            profiler.cells[cell.cell_id] = (cell, glbls, graph, self.inner)
+            with profiler.measure("cell", cell_label(cell), cell_id=cell.cell_id, defs=sorted(cell.defs)):
+                return await self.inner.execute_cell_async(cell, glbls, graph)
+
+    def run(self):
+        name = Path(self.filename).name if self.filename else "app"
+        with profiler.measure("app", name, filename=self.filename):
+            return original_run(self)
+
+    class NestedAsyncio:
+        run = staticmethod(_run_coroutine)
+
+    runner_class.run = run
+    script_runner.get_executor = lambda config: ProfilingExecutor(original_get_executor(config))
+    script_runner.asyncio = NestedAsyncio
+    try:
+        yield profiler
+    finally:
+        runner_class.run = original_run
+        script_runner.get_executor = original_get_executor
+        script_runner.asyncio = original_asyncio
+
+
+def load_app(notebook):
+    """Import a notebook file and return its marimo App."""
+    spec = importlib.util.spec_from_file_location(Path(notebook).stem.replace("-", "_"), notebook)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def profile_notebook(notebook, memory=True):
+    """
+    Run a notebook headlessly under the profiler.
+
+    The notebook runs from the repository root, like the export workflow,
+    so util.py and data/ resolve the same way.
+
+    Args:
+        notebook: Path to the notebook file
+        memory: Track peak memory with tracemalloc (slows execution down)
+
+    Returns:
+        Tuple of (Profiler, exception or None)
+    """
+    notebook = Path(notebook).resolve()
+    os.chdir(REPO_ROOT)
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+
+    profiler = Profiler(memory=memory)
+    if memory:
+        tracemalloc.start()
+
+    error = None
+    try:
+        app = load_app(notebook)
+        with profiling(profiler):
+            app.run()
+    except Exception as e:
+        error = e
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return profiler, error
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Profile a marimo notebook cell by cell")
+    parser.add_argument("notebook", help="Notebook file (e.g. nl/personal-transport/nl-personal-vehicles.py)")
+    parser.add_argument("--top", type=int, help="Only show the N slowest cells")
+    parser.add_argument("--trace", help="Write Chrome trace events to this file")
+    parser.add_argument("--folded", help="Write folded stacks to this file")
+    parser.add_argument("--json", help="Write the raw records to this file")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (lower overhead)")
+
+    args = parser.parse_args()
+    output_paths = {k: Path(v).resolve() for k, v in vars(args).items()
+                    if k in ("trace", "folded", "json") and v}
+
+    profiler, error = profile_notebook(args.notebook, memory=not args.no_memory)
+
+    profiler.report(args.top)
+    if "trace" in output_paths:
+        profiler.write_trace(output_paths["trace"])
+    if "folded" in output_paths:
+        profiler.write_folded(output_paths["folded"])
+    if "json" in output_paths:
+        with open(output_paths["json"], "w") as f:
+            json.dump(profiler.records, f, indent=2)
+        print(f"Records written to {output_paths['json']}")
+
+    if error is not None:
+        print(f"\n✗ Notebook failed: {type(error).__name__}: {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Remote parquet read benchmark
+
+Loads the TypedDataSets of a data folder from the local static server
+(benchmarks/static_server.py) the way notebooks load them in the cloud, with
+a few typical selections:
+
+    all        every column and row
+    columns    the dimension columns only
+    period     the rows of the latest period (Perioden filter)
+
+Each selection is read two ways:
+
+    download   GET the whole file, then read the selection from memory
+    range      util.read_remote_parquet: footer first, then only the column
+               chunks of the selected columns and row groups (HTTP Range)
+
+and the result records the time, the requests and the bytes transferred, and
+whether both ways return the same DataFrame. Row groups are only skipped in
+files written with the current layout (python data_fetcher.py --relayout).
+
+Usage:
+    python benchmarks/remote_parquet.py
+    python benchmarks/remote_parquet.py --latency-ms 50 --rounds 3
+    python benchmarks/remote_parquet.py --data-dir benchmarks/.cache/synthetic/x10
+"""
+
+import argparse
+import io
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import pandas as pd
+import pyarrow.parquet as pq
+import requests
+
+from benchmarks.harness import measure, save_results, compare_results
+from benchmarks.static_server import StaticServer
+from util import read_remote_parquet
+
+
+def selections(path):
+    """The column and row selections benchmarked for a TypedDataSet file."""
+    schema = pq.read_schema(path)
+    periods = pd.read_parquet(path, columns=["Perioden"])["Perioden"]
+    dimensions = [name for name in schema.names
+                  if name in ("ID", "Perioden", "RegioS", "Bouwjaar", "BrandstofsoortVoertuig", "LeeftijdVoertuig")]
+    return {
+        "all": {},
+        "columns": {"columns": dimensions},
+        "period": {"filters": [("Perioden", "==", periods.astype(str).max())]},
+    }
+
+
+def read_download(url, columns=None, filters=None):
+    """GET the whole file and read the selection from memory."""
+    response = requests.get(url, timeout=60)
+    response.raise_for_status()
+    return pd.read_parquet(io.BytesIO(response.content), columns=columns, filters=filters)
+
+
+def bench_remote(data_dir, latency, rounds):
+    """
+    Benchmark whole-file and range reads of every TypedDataSet in a folder.
+
+    Args:
+        data_dir: Folder served by the static server
+        latency: Seconds added to every response
+        rounds: Timed rounds per benchmark
+
+    Returns:
+        List of result dicts
+    """
+    results = []
+    with StaticServer(data_dir=data_dir, latency=latency) as server:
+        for path in sorted(Path(data_dir).glob("*_TypedDataSet.parquet")):
+            dataset_id = path.name.split("_")[0]
+            url = f"{server.base_url}{path.name}"
+            row_groups = pq.ParquetFile(path).num_row_groups
+
+            for selection, options in selections(path).items():
+                expected_df = read_download(url, **options).reset_index(drop=True)
+                for method, read in (("download", read_download), ("range", read_remote_parquet)):
+                    server.reset_stats()
+                    identical = read(url, **options).reset_index(drop=True).equals(expected_df)
+                    transferred = dict(server.stats)
+                    result = measure(f"remote/{method}/{dataset_id}/{selection}", lambda: read(url, **options),
+                                     rounds=rounds, warmup=0, rows=len(expected_df), row_groups=row_groups,
+                                     file_kb=round(path.stat().st_size / 1024, 1),
+                                     requests=transferred["requests"],
+                                     transferred_kb=round(transferred["bytes"] / 1024, 1),
+                                     identical=identical)
+                    if not identical:
+                        print(f"  ✗ {method} reads {dataset_id}/{selection} differently")
+                    results.append(result)
+    return results
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark whole-file vs HTTP Range reads of remote parquet")
+    parser.add_argument("--data-dir", default=str(REPO_ROOT / "data"), help="Folder served by the static server")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every response")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per benchmark")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/remote-{timestamp}.json)")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+
+    args = parser.parse_args()
+
+    results = bench_remote(args.data_dir, args.latency_ms / 1000, args.rounds)
+
+    print(f"\n{'benchmark':<45} {'requests':>8} {'KB':>10}")
+    for r in results:
+        print(f"{r['name']:<45} {r['requests']:>8} {r['transferred_kb']:>10.1f}")
+
+    output = save_results("remote", results, args.output)
+
+    different = [r["name"] for r in results if not r["identical"]]
+
+    regressions = []
+    if args.compare:
+        print(f"\n=== Compared to {args.compare} ===")
+        regressions = compare_results(args.compare, output)
+
+    sys.exit(1 if different or regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
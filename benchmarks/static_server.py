@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the GitHub Pages data folder
+
+Serves the files of a folder the way a static host like GitHub Pages does,
+including single-range requests (Range: bytes=start-end, bytes=start- and
+bytes=-suffix answered with 206 Partial Content), so get_cloud_data and
+read_remote_parquet can be exercised without publishing the site. Every
+request and every byte sent is counted in stats.
+
+Usage:
+    python benchmarks/static_server.py                          # http://127.0.0.1:8766/data/
+    python benchmarks/static_server.py --latency-ms 50 --no-ranges
+
+Or in-process:
+    with StaticServer(latency=0.05) as server:
+        df = get_cloud_data("85236NED", "TypedDataSet", base_url=server.base_url)
+"""
+
+import argparse
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, unquote
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+URL_PREFIX = "/data/"
+
+
+class StaticServer:
+    """
+    Threaded static file server over a folder, with HTTP Range support.
+
+    Args:
+        data_dir: Folder to serve (default: data/)
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        latency: Seconds added to every response
+        ranges: Answer Range requests with 206 (False: always send the whole file)
+    """
+
+    def __init__(self, data_dir=None, host="127.0.0.1", port=0, latency=0.0, ranges=True):
+        self.data_dir = Path(data_dir) if data_dir else REPO_ROOT / "data"
+        self.latency = latency
+        self.ranges = ranges
+        self.stats = {"requests": 0, "range_requests": 0, "bytes": 0}
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        """Base URL to use instead of the GitHub Pages data folder."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{URL_PREFIX}"
+
+    def record(self, sent, partial):
+        """Count a response of `sent` bytes."""
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["range_requests"] += int(partial)
+            self.stats["bytes"] += sent
+
+    def reset_stats(self):
+        """Zero the request and byte counters."""
+        with self._lock:
+            self.stats = {key: 0 for key in self.stats}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_HEAD(self):
+                self.handle_request(send_body=False)
+
+            def do_GET(self):
+                self.handle_request(send_body=True)
+
+            def handle_request(self, send_body):
+                path = unquote(urlsplit(self.path).path)
+                file = server.data_dir / path[len(URL_PREFIX):] if path.startswith(URL_PREFIX) else None
+                if file is None or ".." in Path(path).parts or not file.is_file():
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                content = file.read_bytes()
+                size = len(content)
+                start, end = 0, size
+                byte_range = self.headers.get("Range", "")
+                match = re.fullmatch(r"bytes=(\d*)-(\d*)", byte_range.strip())
+                partial = bool(server.ranges and match and (match.group(1) or match.group(2)))
+                if partial:
+                    first, last = match.groups()
+                    if first:
+                        start, end = int(first), min(int(last) + 1, size) if last else size
+                    else:
+                        start = max(size - int(last), 0)
+                    if start >= size or start >= end:
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{size}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+
+                if server.latency:
+                    time.sleep(server.latency)
+                body = content[start:end]
+                self.send_response(206 if partial else 200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Accept-Ranges", "bytes" if server.ranges else "none")
+                if partial:
+                    self.send_header("Content-Range", f"bytes {start}-{end - 1}/{size}")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+                server.record(len(body) if send_body else 0, partial)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Serve data/ like the GitHub Pages data folder")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8766, help="Port to bind")
+    parser.add_argument("--data-dir", default=str(REPO_ROOT / "data"), help="Folder to serve")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every response")
+    parser.add_argument("--no-ranges", action="store_true", help="Ignore Range headers (send whole files)")
+
+    args = parser.parse_args()
+
+    server = StaticServer(data_dir=args.data_dir, host=args.host, port=args.port,
+                          latency=args.latency_ms / 1000, ranges=not args.no_ranges)
+    print(f"Serving {server.data_dir} at {server.base_url}")
+    print(f"Example: get_cloud_data(\"85236NED\", \"TypedDataSet\", base_url=\"{server.base_url}\")")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStopped. {server.stats}")
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Synthetic scaled CBS datasets for stress testing
+
+Takes the real files of each dataset (from data/, or PLAYBOOK_DATA_DIR if
+set, flat or period-partitioned) and writes statistically similar copies at a
+larger scale, in the {id}_{endpoint}.parquet layout that util.get_local_data
+reads:
+
+- The largest non-time dimension of each dataset (RegioS, Bouwjaar,
+  LeeftijdVoertuig) is replicated `scale` times. Replica 0 keeps the real
+  keys and titles, so lookups such as "Nederland" or "Petrol" in the
+  notebooks keep working; the other replicas get suffixed keys and titles
+  but keep their CategoryGroupID, so get_regions() grows with the scale.
+  The country total (NL01) is not replicated.
+- With `--period-scale`, the periods are replicated too: replica r of a
+  period lies r times the covered span of years earlier (2019JJ00-2023JJ00
+  x2 adds 2014JJ00-2018JJ00), so the real periods stay the latest ones.
+- TypedDataSet rows are replicated for every combination of replicas. Measure
+  values are multiplied by log-normal noise (integers stay integers and
+  non-negative values stay non-negative); missing values stay missing.
+- Metadata, DataProperties and the other dimensions are copied as-is.
+- The derived region hierarchy and rollups (see data_fetcher.write_region_rollups)
+  are rebuilt from the scaled files instead of being copied.
+
+Point the loaders at the generated folder with PLAYBOOK_DATA_DIR:
+
+    python benchmarks/synthetic_data.py --scale 10 --scale 100
+    PLAYBOOK_DATA_DIR=benchmarks/.cache/synthetic/x100 python benchmarks/pipeline.py --stage compute
+
+Usage:
+    python benchmarks/synthetic_data.py                       # 10x, 100x and 1000x of all datasets
+    python benchmarks/synthetic_data.py --scale 100 --dataset 85405NED
+    python benchmarks/synthetic_data.py --scale 10 --period-scale 4   # 10x the regions, 4x the years
+    python benchmarks/synthetic_data.py --scale 10 --output-dir /tmp/synthetic --seed 1
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+DEFAULT_OUTPUT_DIR = REPO_ROOT / "benchmarks" / ".cache" / "synthetic"
+
+DEFAULT_SCALES = [10, 100, 1000]
+
+# Dimension that is replicated to scale each dataset up
+SCALED_DIMENSIONS = {
+    "85236NED": "RegioS",
+    "85237NED": "Bouwjaar",
+    "85405NED": "LeeftijdVoertuig",
+}
+
+# Keys that are not replicated: the country total stays a single region, so
+# the rebuilt region hierarchy keeps one root (see util.build_region_hierarchy)
+UNREPLICATED_KEYS = {
+    "RegioS": {"NL01"},
+}
+
+# Relative spread of the multiplicative noise applied to measure values
+NOISE_SIGMA = 0.05
+
+
+def replica_key(key, replica):
+    """Key of a dimension value in the given replica (replica 0 keeps the real key)."""
+    if replica == 0:
+        return key
+    return f"{key.strip()}_{replica}"
+
+
+def period_span(periods):
+    """Number of years covered by period keys such as "2019JJ00"."""
+    years = [int(key[:4]) for key in periods]
+    return max(years) - min(years) + 1
+
+
+def period_replica_key(key, replica, span):
+    """Key of a period in the given replica, `replica * span` years earlier (replica 0 keeps the real key)."""
+    if replica == 0:
+        return key
+    return f"{int(key[:4]) - replica * span}{key[4:]}"
+
+
+def scale_dimension(dimension_df, scale, unreplicated=()):
+    """
+    Replicate a dimension table (Key/Title/...) `scale` times.
+
+    Args:
+        dimension_df: Dimension endpoint with Key and Title columns
+        scale: Number of replicas
+        unreplicated: Keys that are only kept in replica 0
+
+    Returns:
+        pandas.DataFrame: The scaled dimension table, replica by replica
+    """
+    replicated = ~dimension_df["Key"].astype(str).str.strip().isin(unreplicated)
+    replicas = []
+    for replica in range(scale):
+        replica_df = dimension_df.copy()
+        if replica > 0:
+            replica_df["Key"] = [replica_key(key, replica) for key in dimension_df["Key"]]
+            replica_df["Title"] = dimension_df["Title"] + f" ({replica})"
+            replica_df = replica_df[replicated]
+        replicas.append(replica_df)
+    return pd.concat(replicas, ignore_index=True)
+
+
+def scale_periods(periods_df, scale):
+    """
+    Replicate the Perioden endpoint `scale` times into earlier years.
+
+    Args:
+        periods_df: The real Perioden endpoint
+        scale: Number of replicas
+
+    Returns:
+        pandas.DataFrame: The scaled periods, in period order
+    """
+    span = period_span(periods_df["Key"])
+    replicas = []
+    for replica in range(scale - 1, -1, -1):
+        replica_df = periods_df.copy()
+        if replica > 0:
+            replica_df["Key"] = [period_replica_key(key, replica, span) for key in periods_df["Key"]]
+            replica_df["Title"] = [title.replace(key[:4], new_key[:4], 1) for title, key, new_key
+                                   in zip(periods_df["Title"], periods_df["Key"], replica_df["Key"])]
+        replicas.append(replica_df)
+    return pd.concat(replicas, ignore_index=True)
+
+
+def replicate_rows(df, column, scale, key, unreplicated=()):
+    """
+    Repeat every row `scale` times, re-keying `column` with key(value, replica).
+
+    Args:
+        df: Rows to replicate
+        column: The replicated dimension column
+        scale: Number of replicas
+        key: Function of the original key and the replica number
+        unreplicated: Keys whose rows are only kept in replica 0
+
+    Returns:
+        pandas.DataFrame: The replicas one after the other, replica 0 first
+    """
+    scaled_df = df.iloc[np.tile(np.arange(len(df)), scale)].reset_index(drop=True)
+    keys = df[column].astype(str).tolist()
+    scaled_df[column] = [key(value, replica) for replica in range(scale) for value in keys]
+    replicated = np.tile(~df[column].astype(str).str.strip().isin(unreplicated).to_numpy(), scale)
+    first = np.arange(len(scaled_df)) < len(df)
+    return scaled_df[first | replicated].reset_index(drop=True)
+
+
+def perturb(values, rng):
+    """
+    Multiply a measure column by log-normal noise, keeping its dtype and missing values.
+
+    Args:
+        values: A numeric measure column (pandas Series, nullable dtypes included)
+        rng: numpy random Generator
+
+    Returns:
+        pandas.Series: The perturbed values
+    """
+    noise = rng.lognormal(mean=0.0, sigma=NOISE_SIGMA, size=len(values))
+    perturbed = values.to_numpy(dtype="float64", na_value=np.nan) * noise
+    if pd.api.types.is_integer_dtype(values):
+        perturbed = np.rint(perturbed)
+    return pd.Series(perturbed, index=values.index).astype(values.dtype)
+
+
+def scale_typed_data_set(typed_data_set_df, dimension_column, scale, rng, period_scale=1):
+    """
+    Replicate a TypedDataSet for every replica of one dimension and of the periods.
+
+    Args:
+        typed_data_set_df: The real TypedDataSet endpoint
+        dimension_column: The replicated dimension column (e.g. "RegioS")
+        scale: Number of replicas of the dimension
+        rng: numpy random Generator
+        period_scale: Number of replicas of the periods
+
+    Returns:
+        pandas.DataFrame: The scaled data set with a fresh ID column
+    """
+    n = len(typed_data_set_df)
+    span = period_span(typed_data_set_df["Perioden"].unique())
+    scaled_df = replicate_rows(typed_data_set_df, dimension_column, scale, replica_key,
+                               UNREPLICATED_KEYS.get(dimension_column, ()))
+    scaled_df = replicate_rows(scaled_df, "Perioden", period_scale,
+                               lambda key, replica: period_replica_key(key, replica, span))
+    scaled_df["ID"] = np.arange(len(scaled_df))
+
+    # Keep replica 0 identical to the real data, perturb the others
+    for column in typed_data_set_df.columns:
+        if column == "ID" or not pd.api.types.is_numeric_dtype(typed_data_set_df[column]):
+            continue
+        scaled_df[column] = pd.concat([scaled_df[column].iloc[:n], perturb(scaled_df[column].iloc[n:], rng)])
+
+    # The re-keyed dimensions hold new keys, so they stay strings (not categories of the real keys)
+    dtypes = typed_data_set_df.dtypes.drop([dimension_column, "Perioden"]).to_dict()
+    return scaled_df.astype(dtypes)
+
+
+def get_source_dir():
+    """Folder with the real data files: PLAYBOOK_DATA_DIR if set, else data/ (as data_fetcher.py)."""
+    from data_fetcher import get_data_dir
+    return get_data_dir().resolve()
+
+
+def rebuild_region_rollups(dataset_id, output_dir):
+    """Write the region hierarchy and rollups of the scaled files, like data_fetcher.py does for real ones."""
+    from data_fetcher import write_region_rollups
+    from util import clear_schemas
+
+    previous = os.environ.get("PLAYBOOK_DATA_DIR")
+    os.environ["PLAYBOOK_DATA_DIR"] = str(output_dir.resolve())
+    try:
+        clear_schemas()
+        return write_region_rollups(dataset_id, force=True)
+    finally:
+        if previous is None:
+            del os.environ["PLAYBOOK_DATA_DIR"]
+        else:
+            os.environ["PLAYBOOK_DATA_DIR"] = previous
+        clear_schemas()
+
+
+def generate_dataset(dataset_id, scale, output_dir, seed=0, period_scale=1, source_dir=None):
+    """
+    Write a scaled copy of one dataset.
+
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
+        scale: Scale factor (number of replicas of the scaled dimension)
+        output_dir: Folder receiving the {id}_{endpoint}.parquet files
+        seed: Random seed, so every run produces the same files
+        period_scale: Number of replicas of the periods
+        source_dir: Folder with the real files (default: see get_source_dir)
+
+    Returns:
+        int: Number of TypedDataSet rows written
+    """
+    from data_fetcher import DERIVED_ENDPOINTS
+    from util import get_partitioned_data
+
+    source_dir = Path(source_dir) if source_dir else get_source_dir()
+    dimension_column = SCALED_DIMENSIONS[dataset_id]
+    rng = np.random.default_rng(seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    sources = {path.stem[len(dataset_id) + 1:]: path for path in sorted(source_dir.glob(f"{dataset_id}*.parquet"))}
+    # Period partitions (data_fetcher.py --partitioned) take the place of the flat TypedDataSet
+    partition_dir = source_dir / dataset_id / "TypedDataSet"
+    if partition_dir.is_dir():
+        sources["TypedDataSet"] = partition_dir
+
+    rows = 0
+    for endpoint, source in sources.items():
+        if endpoint in DERIVED_ENDPOINTS:
+            # Rebuilt from the scaled files below
+            continue
+        target_file = output_dir / (f"{dataset_id}_{endpoint}.parquet" if endpoint else f"{dataset_id}.parquet")
+
+        if endpoint == dimension_column:
+            scaled_df = scale_dimension(pd.read_parquet(source), scale, UNREPLICATED_KEYS.get(endpoint, ()))
+            scaled_df.to_parquet(target_file, index=False)
+        elif endpoint == "Perioden" and period_scale > 1:
+            scale_periods(pd.read_parquet(source), period_scale).to_parquet(target_file, index=False)
+        elif endpoint == "TypedDataSet":
+            typed_data_set_df = get_partitioned_data(source) if source.is_dir() else pd.read_parquet(source)
+            scaled_df = scale_typed_data_set(typed_data_set_df, dimension_column, scale, rng, period_scale)
+            scaled_df.to_parquet(target_file, index=False)
+            rows = len(scaled_df)
+        else:
+            shutil.copyfile(source, target_file)
+
+    if DERIVED_ENDPOINTS & set(sources) and not rebuild_region_rollups(dataset_id, output_dir):
+        print(f"  ✗ {dataset_id} x{scale}: region rollups not rebuilt")
+
+    size_mb = sum(f.stat().st_size for f in output_dir.glob(f"{dataset_id}*.parquet")) / (1024 * 1024)
+    print(f"  {dataset_id} x{scale}: {rows} TypedDataSet rows, {size_mb:.1f} MB")
+    return rows
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Generate scaled synthetic copies of the CBS datasets")
+    parser.add_argument("--scale", type=int, action="append",
+                        help=f"Scale factor (repeatable, default: {', '.join(map(str, DEFAULT_SCALES))})")
+    parser.add_argument("--period-scale", type=int, default=1,
+                        help="Also replicate the periods this many times, into earlier years (default: 1)")
+    parser.add_argument("--dataset", action="append", choices=list(SCALED_DIMENSIONS),
+                        help="Dataset to generate (repeatable, default: all)")
+    parser.add_argument("--source-dir",
+                        help="Folder with the real data files (default: PLAYBOOK_DATA_DIR, else data/)")
+    parser.add_argument("--output-dir", default=str(DEFAULT_OUTPUT_DIR),
+                        help="Folder receiving one x{scale}/ subfolder per scale")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    args = parser.parse_args()
+
+    scales = args.scale or DEFAULT_SCALES
+    datasets = args.dataset or list(SCALED_DIMENSIONS)
+
+    if any(scale < 1 for scale in scales + [args.period_scale]):
+        print("Scale factors must be at least 1")
+        sys.exit(2)
+
+    source_dir = Path(args.source_dir) if args.source_dir else get_source_dir()
+    suffix = f"_p{args.period_scale}" if args.period_scale > 1 else ""
+    for scale in scales:
+        output_dir = Path(args.output_dir) / f"x{scale}{suffix}"
+        print(f"Generating x{scale}{suffix} in {output_dir} from {source_dir}")
+        for dataset_id in datasets:
+            generate_dataset(dataset_id, scale, output_dir, args.seed, args.period_scale, source_dir)
+
+    print("\nLoad a scaled copy with:")
+    print(f"  PLAYBOOK_DATA_DIR={Path(args.output_dir) / f'x{scales[0]}{suffix}'} python benchmarks/pipeline.py")
+
+
+if __name__ == "__main__":
+    main()
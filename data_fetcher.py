@@ -9,130 +9,763 @@ a local data folder approach that works better with Marimo Community Cloud.
 Usage:
     uv run data_fetcher.py          # Fetch all known datasets
     uv run data_fetcher.py --refresh # Force refresh all data
-    uv run data_fetcher.py --dataset 85236NED  # Fetch specific dataset
+    uv run data_fetcher.py 85236NED 83668NED  # Fetch specific tables (any CBS table id)
+    uv run data_fetcher.py --list      # List the known and cataloged tables
+    uv run data_fetcher.py --base-url http://127.0.0.1:8765/ODataApi/OData  # Fetch from a local emulator
+    uv run data_fetcher.py --relayout  # Rewrite existing files with the current parquet layout
+    uv run data_fetcher.py --partitioned  # Store TypedDataSet per period, fetching only new periods
 """
 
 import argparse
+import inspect
+import json
+import math
 import sys, os
+import uuid
+from datetime import datetime, timezone
 from pathlib import Path
-from util import get_cbs_url, get_cbs_url_paginated, get_cache_stats
+from util import (get_cbs_url, get_cbs_url_paginated, get_cbs_count, odata_query_url, PageCheckpoint,
+                  get_cache_stats, count, timer, timed,
+                  enable_metrics, metrics_to_json, metrics_to_prometheus,
+                  span, add_span_exporter, JsonLinesSpanExporter, get_partition_dir, list_partitions,
+                  get_schema, clear_schemas, enforce_schema, get_partitioned_data,
+                  build_region_hierarchy, region_rollup_endpoint, REGION_LEVELS, REGION_HIERARCHY_ENDPOINT)
 
-# Known datasets and their endpoints that we need to fetch
+# CBS OData API, override with --base-url (e.g. benchmarks/odata_server.py)
+CBS_ODATA_URL = "https://opendata.cbs.nl/ODataApi/OData"
+
+# Datasets used by the playbooks, fetched when no table ids are given.
+# Their endpoints are discovered from the OData service document (see
+# discover_dataset); an entry only holds settings for the table. The
+# TypedDataSet can be narrowed down on the server with optional "select"
+# (list of columns, OData $select) and "filter" (OData $filter expression,
+# e.g. "Perioden ge '2019JJ00'" or "startswith(RegioS,'GM')") keys.
 DATASETS = {
     "85236NED": {
         "name": "Motor vehicles by type and region",
-        "endpoints": [
-            "",  # Base metadata
-            "DataProperties",
-            "Perioden", 
-            "RegioS",
-            "TypedDataSet"  # Large dataset - needs pagination
-        ]
+        # Country, parts of the country, provinces, COROP areas and municipalities
+        # (see nl.cbs.get_regions); postal code areas are 92% of the rows
+        "filter": " or ".join(f"startswith(RegioS,'{prefix}')" for prefix in ("NL", "LD", "PV", "CR", "GM"))
     },
     "85237NED": {
         "name": "Active passenger cars by characteristics",
-        "endpoints": [
-            "",  # Base metadata
-            "Bouwjaar",
-            "DataProperties", 
-            "Perioden",
-            "TypedDataSet"  # Large dataset - needs pagination
-        ]
     },
     "85405NED": {
         "name": "Vehicle kilometers by fuel type and age",
-        "endpoints": [
-            "",  # Base metadata
-            "BrandstofsoortVoertuig",
-            "LeeftijdVoertuig",
-            "Perioden",
-            "TypedDataSet"  # Large dataset - needs pagination
-        ]
     }
 }
 
+# Endpoints of the service document that aren't fetched: TableInfos and
+# CategoryGroups aren't used and UntypedDataSet duplicates TypedDataSet
+SKIPPED_ENDPOINTS = ("TableInfos", "UntypedDataSet", "CategoryGroups")
+
+# Endpoints with more rows than fit in one OData response are fetched page by page
+LARGE_ENDPOINT_ROWS = 10000
+
+# Rows per page of paginated fetches. The pages fetched so far are kept in
+# data/.partial/ until an endpoint is complete (see fetch_pages).
+PAGE_SIZE = 5000
+
+# Discovered endpoints are kept in data/catalog.json and rediscovered after this many days
+CATALOG_FILE = "catalog.json"
+CATALOG_MAX_AGE_DAYS = 30
+
+# Files built from the fetched endpoints (see write_region_rollups), not fetched themselves
+DERIVED_ENDPOINTS = {REGION_HIERARCHY_ENDPOINT} | {region_rollup_endpoint(level) for level in REGION_LEVELS}
+
+# Parquet layout of the written files. TypedDataSet rows are sorted by their
+# dimension keys (period first) and split into row groups, so the min/max
+# statistics and bloom filters of RegioS/Perioden/... let filtered reads skip
+# most row groups.
+PARQUET_COMPRESSION = "zstd"
+MIN_ROW_GROUP_SIZE = 1024
+MAX_ROW_GROUP_SIZE = 128 * 1024
+TARGET_ROW_GROUPS = 16
+BLOOM_FILTER_FPP = 0.01
+
 def get_data_dir():
-    """Get the data directory path."""
-    return Path(__file__).parent / "data"
+    """Get the data directory path (PLAYBOOK_DATA_DIR if set)."""
+    return Path(os.environ.get("PLAYBOOK_DATA_DIR") or Path(__file__).parent / "data")
 
-def fetch_dataset(dataset_id, force_refresh=False):
+def get_checkpoint_dir(dataset_id, endpoint, period=None):
+    """Get the folder of the pages fetched so far of an endpoint (or one period of it)."""
+    name = f"{dataset_id}_{endpoint}" + (f"_{period}" if period else "")
+    return get_data_dir() / ".partial" / name
+
+def fetch_pages(endpoint_url, checkpoint_dir, force_refresh=False, select=None, filter=None):
     """
-    Fetch all endpoints for a specific dataset.
+    Fetch a paginated endpoint through a checkpoint and check that it is complete.
+    
+    The fetched pages are kept in checkpoint_dir until the data set has as many
+    rows as the server's $count, so an interrupted fetch is resumed by the next
+    run instead of published truncated.
+    
+    Args:
+        endpoint_url: OData URL of the endpoint
+        checkpoint_dir: Folder for the pages fetched so far (see get_checkpoint_dir)
+        force_refresh: Passed on to get_cbs_url_paginated
+        select: Only fetch these columns (OData $select)
+        filter: Only fetch rows matching this OData $filter expression
+    
+    Returns:
+        Tuple of (DataFrame, expected number of rows); the DataFrame is only
+        complete if its length equals the expected number of rows
+    """
+    url = odata_query_url(endpoint_url, select, filter)
+    expected = get_cbs_count(url)
+    df = get_cbs_url_paginated(endpoint_url, force_refresh=force_refresh, select=select, filter=filter,
+                               page_size=PAGE_SIZE, max_pages=math.ceil(expected / PAGE_SIZE) + 1,
+                               checkpoint_dir=checkpoint_dir)
+
+    checkpoint = PageCheckpoint(checkpoint_dir, url, PAGE_SIZE)
+    if len(df) != expected:
+        checkpoint.load()
+        if not checkpoint.complete:
+            return df, expected
+        # All pages were fetched but the data changed on the server meanwhile
+        print(f"  ✗ {len(df)} records fetched, {expected} expected: discarding the checkpoint")
+        count("checkpoint.discarded")
+    checkpoint.clear()
+    return df, expected
+
+def load_catalog():
+    """Read the catalog of discovered tables from the data folder (empty if there is none)."""
+    path = get_data_dir() / CATALOG_FILE
+    return json.loads(path.read_text()) if path.exists() else {}
+
+def save_catalog(catalog):
+    """Write the catalog of discovered tables to the data folder."""
+    path = get_data_dir() / CATALOG_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(catalog, indent=2, sort_keys=True) + "\n")
+
+def classify_endpoint(rows):
+    """Size class of an endpoint: "large" endpoints are fetched page by page."""
+    return "large" if rows > LARGE_ENDPOINT_ROWS else "small"
+
+def discover_dataset(dataset_id, base_url=CBS_ODATA_URL):
+    """
+    Discover the endpoints of a CBS table from its OData service document.
+    
+    Every endpoint that is fetched gets its row count ($count), so endpoints
+    the service document lists but doesn't serve are left out and large ones
+    are fetched page by page.
+    
+    Args:
+        dataset_id: CBS table id (e.g., "85236NED")
+        base_url: OData API root
+    
+    Returns:
+        Catalog entry: {"name", "base_url", "discovered", "endpoints": {endpoint: {"rows", "size"}}}
+    
+    Raises:
+        ValueError: If the table has no service document
+    """
+    dataset_url = f"{base_url.rstrip('/')}/{dataset_id}"
+    with span("discover_dataset", dataset_id=dataset_id) as s:
+        service_df = get_cbs_url(dataset_url)
+        if service_df.empty or "name" not in service_df.columns:
+            raise ValueError(f"No OData service document at {dataset_url}")
+
+        name = DATASETS.get(dataset_id, {}).get("name")
+        if name is None and "TableInfos" in service_df["name"].values:
+            table_infos_df = get_cbs_url(f"{dataset_url}/TableInfos")
+            if "Title" in table_infos_df.columns and not table_infos_df.empty:
+                name = table_infos_df["Title"].iloc[0]
+
+        endpoints = {}
+        for endpoint in service_df["name"]:
+            if endpoint in SKIPPED_ENDPOINTS:
+                continue
+            try:
+                rows = get_cbs_count(f"{dataset_url}/{endpoint}")
+            except Exception as e:
+                print(f"  Skipping {endpoint} (not served: {e})")
+                continue
+            endpoints[endpoint] = {"rows": rows, "size": classify_endpoint(rows)}
+        s.set_attribute("endpoints", len(endpoints))
+
+    return {
+        "name": name or dataset_id,
+        "base_url": base_url,
+        "discovered": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "endpoints": endpoints,
+    }
+
+def get_catalog_entry(dataset_id, base_url=CBS_ODATA_URL, refresh=False):
+    """
+    Get a table's catalog entry, discovering it when it's missing, stale or from another API root.
+    
+    Args:
+        dataset_id: CBS table id (e.g., "85236NED")
+        base_url: OData API root
+        refresh: Always rediscover
+    
+    Returns:
+        The catalog entry (see discover_dataset)
+    """
+    catalog = load_catalog()
+    entry = catalog.get(dataset_id)
+    # Entries cataloged from local files (see catalog_local_files) have no discovery date
+    if entry is not None and not refresh and entry.get("base_url") == base_url and entry.get("discovered"):
+        discovered = datetime.fromisoformat(entry["discovered"])
+        if (datetime.now(timezone.utc) - discovered).days < CATALOG_MAX_AGE_DAYS:
+            return entry
+
+    print(f"Discovering endpoints of {dataset_id}...")
+    previous = entry
+    entry = discover_dataset(dataset_id, base_url)
+    # The stored partitions don't change with the discovery (see record_partitions)
+    for endpoint, info in (previous or {}).get("endpoints", {}).items():
+        if "partitions" in info and endpoint in entry["endpoints"]:
+            entry["endpoints"][endpoint]["partitions"] = info["partitions"]
+    catalog[dataset_id] = entry
+    save_catalog(catalog)
+    return entry
+
+def catalog_local_files(dataset_ids):
+    """
+    Catalog tables from their files in the data folder, without fetching.
+    
+    For tables fetched before there was a catalog: their fetched endpoints and
+    row counts are taken from the parquet files (the derived hierarchy and
+    rollup files are left out). These entries have no discovery date, so the
+    next fetch rediscovers the table. Tables that are cataloged already are kept.
+    
+    Args:
+        dataset_ids: CBS table ids (e.g. ["85236NED"])
+    
+    Returns:
+        bool: True if every table had files
+    """
+    import pyarrow.parquet as pq
+
+    data_dir = get_data_dir()
+    catalog = load_catalog()
+    success = True
+    for dataset_id in dataset_ids:
+        if dataset_id in catalog:
+            print(f"  ✓ {dataset_id} (cataloged already)")
+            continue
+        endpoints = {}
+        for path in sorted(data_dir.glob(f"{dataset_id}_*.parquet")):
+            endpoint = path.stem[len(dataset_id) + 1:]
+            if endpoint not in DERIVED_ENDPOINTS:
+                rows = pq.ParquetFile(path).metadata.num_rows
+                endpoints[endpoint] = {"rows": rows, "size": classify_endpoint(rows)}
+        partition_dir = get_partition_dir(dataset_id)
+        if "TypedDataSet" not in endpoints and partition_dir.is_dir():
+            partitions = list_partitions(partition_dir)
+            rows = sum(pq.ParquetFile(path).metadata.num_rows for path in partitions)
+            endpoints["TypedDataSet"] = {
+                "rows": rows, "size": classify_endpoint(rows),
+                "partitions": [f"{dataset_id}/TypedDataSet/{path.parent.name}/{path.name}" for path in partitions],
+            }
+        if not endpoints:
+            print(f"  ✗ {dataset_id} (no files in {data_dir})")
+            success = False
+            continue
+        catalog[dataset_id] = {
+            "name": DATASETS.get(dataset_id, {}).get("name", dataset_id),
+            "base_url": CBS_ODATA_URL,
+            "discovered": None,
+            "endpoints": {endpoint: endpoints[endpoint] for endpoint in get_fetch_order(endpoints)[1:]},
+        }
+        print(f"  ✓ {dataset_id} ({len(endpoints)} endpoints)")
+    save_catalog(catalog)
+    return success
+
+def get_fetch_order(endpoints):
+    """
+    Order a table's endpoints for fetching: metadata, DataProperties, dimensions, TypedDataSet.
+    
+    The TypedDataSet comes last as it is written with the DataProperties schema
+    and sorted by the dimensions.
+    """
+    first = [e for e in ("DataProperties",) if e in endpoints]
+    last = [e for e in ("TypedDataSet",) if e in endpoints]
+    return [""] + first + [e for e in endpoints if e not in first + last] + last
+
+def get_dimension_endpoints(dataset_id):
+    """
+    Get the dimension endpoints of a table (e.g. RegioS, Perioden).
+    
+    Uses the catalog, or the files in the data folder for tables fetched before there was one.
+    """
+    endpoints = load_catalog().get(dataset_id, {}).get("endpoints")
+    if endpoints is None:
+        endpoints = [path.stem[len(dataset_id) + 1:] for path in get_data_dir().glob(f"{dataset_id}_*.parquet")]
+    return [e for e in endpoints if e not in ("DataProperties", "TypedDataSet")]
+
+def get_dimension_columns(dataset_id, df):
+    """
+    Get the dimension key columns of a TypedDataSet in sort order.
+    
+    The dimensions are the dataset's endpoints that appear as columns
+    (e.g. Perioden, RegioS). Perioden comes first, the others follow from
+    lowest to highest cardinality, so every key ends up in few row groups.
     
     Args:
         dataset_id: Dataset ID (e.g., "85236NED")
-        force_refresh: Force refresh even if data exists
+        df: The TypedDataSet
+    
+    Returns:
+        List of column names
+    """
+    endpoints = get_dimension_endpoints(dataset_id)
+    dimensions = [e for e in endpoints if e in df.columns and e != "Perioden"]
+    dimensions.sort(key=lambda column: df[column].nunique())
+    return (["Perioden"] if "Perioden" in df.columns else []) + dimensions
+
+def get_row_group_size(num_rows):
+    """Rows per row group: about TARGET_ROW_GROUPS groups, within the min/max bounds."""
+    return min(MAX_ROW_GROUP_SIZE, max(MIN_ROW_GROUP_SIZE, math.ceil(num_rows / TARGET_ROW_GROUPS)))
+
+def write_parquet(df, output_path, dataset_id, endpoint="", sort_by=None):
+    """
+    Write an endpoint to parquet with the data folder's layout.
+    
+    Every file gets zstd compression and min/max statistics. A TypedDataSet is
+    also cast to the compact dtypes of its DataProperties schema (failing on
+    schema drift), sorted by its dimension keys, split into tuned row groups and
+    gets bloom filters on the key columns (when the installed pyarrow supports them).
+    
+    Args:
+        df: The endpoint data
+        output_path: Parquet file to write
+        dataset_id: Dataset ID (e.g., "85236NED")
+        endpoint: Endpoint name (e.g., "TypedDataSet")
+        sort_by: Key columns to lay the file out by like a TypedDataSet
+                 (default: the dimension columns of a TypedDataSet)
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    options = {"compression": PARQUET_COMPRESSION, "write_statistics": True}
+
+    if endpoint == "TypedDataSet":
+        schema = get_schema(dataset_id)
+        if schema is not None:
+            df = enforce_schema(df, schema, strict=True)
+
+    if sort_by is not None:
+        keys = list(sort_by)
+    else:
+        keys = get_dimension_columns(dataset_id, df) if endpoint == "TypedDataSet" else []
+    if keys:
+        # Stable sort keeps the API order within equal keys
+        df = df.sort_values(keys, kind="stable").reset_index(drop=True)
+        options["row_group_size"] = get_row_group_size(len(df))
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    if keys:
+        write_table_parameters = inspect.signature(pq.write_table).parameters
+        if "sorting_columns" in write_table_parameters:
+            options["sorting_columns"] = pq.SortingColumn.from_ordering(
+                table.schema, [(key, "ascending") for key in keys])
+        if "bloom_filter_options" in write_table_parameters:
+            options["bloom_filter_options"] = {
+                key: {"ndv": max(1, int(df[key].nunique())), "fpp": BLOOM_FILTER_FPP} for key in keys
+            }
+
+    pq.write_table(table, output_path, **options)
+
+def write_partition(df, dataset_id, period, endpoint="TypedDataSet"):
+    """
+    Write (or replace) one period partition of an endpoint.
+    
+    The new part file is written under a temporary name and renamed into place
+    before older parts of the period are removed, so readers never see a
+    partition without data.
+    
+    Args:
+        df: Rows of the period (keeping the Perioden column)
+        dataset_id: Dataset ID (e.g., "85236NED")
+        period: Period key (e.g., "2023JJ00")
+        endpoint: Endpoint name
+    
+    Returns:
+        Path: The written part file
+    """
+    period_dir = get_partition_dir(dataset_id, endpoint) / f"Perioden={period}"
+    period_dir.mkdir(parents=True, exist_ok=True)
+    old_parts = list(period_dir.glob("part-*.parquet"))
+
+    part_path = period_dir / f"part-{uuid.uuid4().hex[:12]}.parquet"
+    tmp_path = part_path.with_suffix(".parquet.tmp")
+    write_parquet(df, tmp_path, dataset_id, endpoint)
+    tmp_path.replace(part_path)
+
+    for old_part in old_parts:
+        old_part.unlink()
+    return part_path
+
+def get_stale_periods(dataset_id, periods_df, force_refresh=False):
+    """
+    Get the periods whose partition has to be (re)fetched.
+    
+    That is every period without a partition, plus provisional periods
+    (Status other than "Definitief"), which CBS revises in later releases.
+    
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
+        periods_df: The Perioden endpoint
+        force_refresh: Refetch every period
+    
+    Returns:
+        List of period keys
+    """
+    partition_dir = get_partition_dir(dataset_id)
+    existing = {f.parent.name.split("=", 1)[1] for f in list_partitions(partition_dir)}
+    provisional = set()
+    if "Status" in periods_df.columns:
+        provisional = set(periods_df.loc[periods_df["Status"] != "Definitief", "Key"])
+
+    return [key for key in periods_df["Key"]
+            if force_refresh or key not in existing or key in provisional]
+
+def fetch_partitioned(dataset_id, base_url, force_refresh=False, select=None, filter=None):
+    """
+    Fetch a TypedDataSet into period partitions, one period at a time.
+    
+    Only new and provisional periods are fetched, so a yearly update costs one
+    period's download and one small write instead of rewriting the data set.
+    The partitions replace the flat {id}_TypedDataSet.parquet (see record_partitions).
+    
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
+        base_url: OData URL of the dataset (e.g. https://opendata.cbs.nl/ODataApi/OData/85236NED)
+        force_refresh: Refetch every period
+        select: Only fetch these columns (OData $select)
+        filter: Only fetch rows matching this OData $filter expression, within each period
+    
+    Returns:
+        bool: True if all stale periods were fetched
     """
-    if dataset_id not in DATASETS:
-        print(f"Unknown dataset: {dataset_id}")
-        print(f"Known datasets: {', '.join(DATASETS.keys())}")
+    periods_df = get_cbs_url(f"{base_url}/Perioden", force_refresh=force_refresh)
+    if periods_df.empty:
+        print("  ✗ TypedDataSet (no periods returned)")
         return False
+
+    stale = get_stale_periods(dataset_id, periods_df, force_refresh)
+    up_to_date = len(periods_df) - len(stale)
+    if up_to_date:
+        print(f"  ✓ TypedDataSet: {up_to_date} period partition(s) up to date")
+        count("cache.hits", up_to_date, dataset_id=dataset_id)
+
+    success = True
+    for period in stale:
+        count("cache.misses", dataset_id=dataset_id)
+        with timer("fetch_endpoint", dataset_id=dataset_id, endpoint="TypedDataSet"), \
+                span("fetch_partition", dataset_id=dataset_id, period=period) as s:
+            period_filter = f"Perioden eq '{period}'"
+            if filter:
+                period_filter = f"({period_filter}) and ({filter})"
+            df, expected = fetch_pages(f"{base_url}/TypedDataSet",
+                                       get_checkpoint_dir(dataset_id, "TypedDataSet", period),
+                                       force_refresh=force_refresh, select=select, filter=period_filter)
+            s.set_attributes(rows=len(df), expected_rows=expected)
+        if df.empty:
+            print(f"  ✗ TypedDataSet Perioden={period} (no data returned)")
+            success = False
+            continue
+        if len(df) != expected:
+            print(f"  ✗ TypedDataSet Perioden={period} incomplete ({len(df)}/{expected} records), "
+                  f"rerun to resume")
+            success = False
+            continue
+
+        with timer("parquet.write", dataset_id=dataset_id):
+            part_path = write_partition(df, dataset_id, period)
+        count("bytes.written", part_path.stat().st_size, dataset_id=dataset_id)
+        print(f"  ✓ TypedDataSet Perioden={period} ({len(df)} records, {part_path.name})")
+
+    if success:
+        record_partitions(dataset_id)
+    return success
+
+def record_partitions(dataset_id, endpoint="TypedDataSet"):
+    """
+    Make the period partitions the only stored layout of an endpoint.
     
-    dataset_info = DATASETS[dataset_id]
-    base_url = f"https://opendata.cbs.nl/ODataApi/OData/{dataset_id}"
+    The partition files are listed in the catalog, where the cloud readers find
+    them (GitHub Pages can't list a folder), and the flat {id}_{endpoint}.parquet
+    is removed, so the build publishes the data once.
+    
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
+        endpoint: Endpoint name
+    """
+    partitions = [f"{dataset_id}/{endpoint}/{path.parent.name}/{path.name}"
+                  for path in list_partitions(get_partition_dir(dataset_id, endpoint))]
+    catalog = load_catalog()
+    if dataset_id in catalog:
+        catalog[dataset_id]["endpoints"].setdefault(endpoint, {})["partitions"] = partitions
+        save_catalog(catalog)
+    else:
+        print(f"  ⚠ {dataset_id} is not in {CATALOG_FILE}: the cloud readers won't find the partitions "
+              f"(run data_fetcher.py --catalog)")
+
+    flat_path = get_data_dir() / f"{dataset_id}_{endpoint}.parquet"
+    if flat_path.exists():
+        flat_path.unlink()
+        print(f"  ✓ Removed {flat_path.name} (replaced by {len(partitions)} period partitions)")
+
+def partition_dataset(dataset_id):
+    """
+    Split an existing flat {id}_TypedDataSet.parquet into period partitions, without fetching.
+    
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
+    
+    Returns:
+        bool: True if the file was partitioned
+    """
+    import pandas as pd
+
+    path = get_data_dir() / f"{dataset_id}_TypedDataSet.parquet"
+    if not path.exists():
+        print(f"  ✗ {path.name} (not found)")
+        return False
+
+    df = pd.read_parquet(path)
+    for period, period_df in df.groupby("Perioden", sort=True):
+        part_path = write_partition(period_df, dataset_id, period)
+        print(f"  ✓ {dataset_id}/TypedDataSet/Perioden={period} ({len(period_df)} records, {part_path.name})")
+    record_partitions(dataset_id)
+    return True
+
+def relayout_dataset(dataset_id):
+    """
+    Rewrite a dataset's existing files with the current parquet layout, without fetching.
+    
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
+    
+    Returns:
+        bool: True if all existing files were rewritten
+    """
+    import pandas as pd
+
     data_dir = get_data_dir()
+    success = True
+    for path in sorted(data_dir.glob(f"{dataset_id}*.parquet")):
+        filename = path.name
+        endpoint = path.stem[len(dataset_id) + 1:]
+        if endpoint in DERIVED_ENDPOINTS:
+            # Rebuilt from the rewritten files below
+            continue
+        try:
+            before = path.stat().st_size
+            write_parquet(pd.read_parquet(path), path, dataset_id, endpoint)
+            print(f"  ✓ {filename} ({before / 1024:.0f} KB -> {path.stat().st_size / 1024:.0f} KB)")
+        except Exception as e:
+            print(f"  ✗ {filename} (error: {e})")
+            success = False
+    return write_region_rollups(dataset_id, force=True) and success
+
+def write_region_rollups(dataset_id, force=False):
+    """
+    Materialize the region hierarchy and per-level rollups of a table with a RegioS dimension.
     
-    print(f"\nFetching dataset {dataset_id}: {dataset_info['name']}")
-    print(f"Data will be saved to: {data_dir}")
+    Writes {id}_RegioSHierarchy.parquet (see util.build_region_hierarchy) and
+    one {id}_TypedDataSet_{level}.parquet per region level (see
+    util.get_region_data): the TypedDataSet rows of the level's regions with
+    the keys of their ancestors, sorted by ancestor, region and period, so a
+    province's municipalities are a few adjacent row groups. CBS publishes the
+    totals of every level as rows of their own, so a rollup holds those rows
+    rather than sums of the level below.
+    
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
+        force: Rewrite the files even if they are newer than the RegioS and TypedDataSet
+    
+    Returns:
+        bool: True if the files are up to date (or the table has no regions)
+    """
+    import pandas as pd
+
+    data_dir = get_data_dir()
+    regions_path = data_dir / f"{dataset_id}_RegioS.parquet"
+    typed_path = data_dir / f"{dataset_id}_TypedDataSet.parquet"
+    partition_dir = get_partition_dir(dataset_id)
+    sources = list_partitions(partition_dir) if partition_dir.is_dir() else [typed_path]
+    if not regions_path.exists() or not all(source.exists() for source in sources):
+        return True
+
+    hierarchy_path = data_dir / f"{dataset_id}_{REGION_HIERARCHY_ENDPOINT}.parquet"
+    newest_source = max(path.stat().st_mtime for path in [regions_path, *sources])
+    if not force and hierarchy_path.exists() and hierarchy_path.stat().st_mtime >= newest_source:
+        return True
+
+    try:
+        with span("write_region_rollups", dataset_id=dataset_id) as s:
+            df = get_partitioned_data(partition_dir) if partition_dir.is_dir() else pd.read_parquet(typed_path)
+            if "RegioS" not in df.columns:
+                return True
+            schema = get_schema(dataset_id)
+            if schema is not None:
+                # The rollups are stored with the compact dtypes, like the TypedDataSet (see write_parquet)
+                df = enforce_schema(df, schema)
+
+            hierarchy_df = build_region_hierarchy(pd.read_parquet(regions_path), df)
+            write_parquet(hierarchy_df, hierarchy_path, dataset_id, REGION_HIERARCHY_ENDPOINT)
+            print(f"  ✓ {hierarchy_path.name} ({len(hierarchy_df)} regions)")
+
+            ancestor_levels = [level for level in REGION_LEVELS if level in hierarchy_df.columns]
+            ancestors = hierarchy_df.set_index("Key")
+            keys = df["RegioS"].astype(str)
+            levels = keys.map(ancestors["Level"]).to_numpy()
+            for depth, level in enumerate(REGION_LEVELS):
+                rows = levels == level
+                if not rows.any():
+                    continue
+                level_df = df[rows].copy()
+                for up in ancestor_levels:
+                    level_df[up] = keys[rows].map(ancestors[up]).to_numpy()
+                sort_by = ancestor_levels[1:depth] + ["RegioS", "Perioden"]
+                rollup_path = data_dir / f"{dataset_id}_{region_rollup_endpoint(level)}.parquet"
+                write_parquet(level_df, rollup_path, dataset_id, region_rollup_endpoint(level), sort_by=sort_by)
+                print(f"  ✓ {rollup_path.name} ({len(level_df)} records)")
+            s.set_attribute("regions", len(hierarchy_df))
+        return True
+    except Exception as e:
+        print(f"  ✗ {dataset_id} region rollups (error: {e})")
+        return False
+
+@timed("fetch_dataset")
+def fetch_dataset(dataset_id, force_refresh=False, base_url=CBS_ODATA_URL, partitioned=False):
+    """
+    Fetch all endpoints for a specific dataset.
+    
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
+        force_refresh: Force refresh even if data exists
+        base_url: OData API root the dataset is fetched from
+        partitioned: Store TypedDataSet as period partitions, fetching only new periods
+    """
+    dataset_info = DATASETS.get(dataset_id, {})
+    data_dir = get_data_dir()
     
     # Ensure data directory exists
     data_dir.mkdir(exist_ok=True)
     
+    try:
+        entry = get_catalog_entry(dataset_id, base_url, refresh=force_refresh)
+    except Exception as e:
+        print(f"\n✗ {dataset_id}: can't discover endpoints ({e})")
+        return False
+    
+    endpoints = get_fetch_order(entry['endpoints'])
+    base_url = f"{base_url.rstrip('/')}/{dataset_id}"
+    
+    print(f"\nFetching dataset {dataset_id}: {entry['name']}")
+    print(f"Data will be saved to: {data_dir}")
+    
     success_count = 0
-    total_count = len(dataset_info['endpoints'])
+    total_count = len(endpoints)
     
-    for endpoint in dataset_info['endpoints']:
-        try:
-            if endpoint == "":
-                # Base metadata endpoint
-                endpoint_url = base_url
-                filename = f"{dataset_id}.parquet"
-            else:
-                # Specific endpoint
-                endpoint_url = f"{base_url}/{endpoint}"
-                filename = f"{dataset_id}_{endpoint}.parquet"
-            
-            output_path = data_dir / filename
-            
-            # Skip if file exists and not forcing refresh
-            if output_path.exists() and not force_refresh:
-                print(f"  ✓ {filename} (already exists)")
-                success_count += 1
-                continue
-            
-            print(f"  Fetching {endpoint if endpoint else 'metadata'}...")
-            
-            # Use appropriate fetching method
-            if endpoint == "TypedDataSet":
-                # Large dataset - use pagination
-                df = get_cbs_url_paginated(endpoint_url, force_refresh=force_refresh)
-            else:
-                # Regular endpoint
-                df = get_cbs_url(endpoint_url, force_refresh=force_refresh)
-            
-            if df is not None and not df.empty:
-                # Save directly to data folder
-                df.to_parquet(output_path, index=False)
-                print(f"  ✓ {filename} ({len(df)} records)")
-                success_count += 1
-            else:
-                print(f"  ✗ {filename} (no data returned)")
+    with span("fetch_dataset", dataset_id=dataset_id, base_url=base_url) as dataset_span:
+        for endpoint in endpoints:
+            try:
+                if endpoint == "":
+                    # Base metadata endpoint
+                    endpoint_url = base_url
+                    filename = f"{dataset_id}.parquet"
+                else:
+                    # Specific endpoint
+                    endpoint_url = f"{base_url}/{endpoint}"
+                    filename = f"{dataset_id}_{endpoint}.parquet"
                 
-        except Exception as e:
-            print(f"  ✗ {filename} (error: {e})")
+                output_path = data_dir / filename
+                
+                # Once partitioned, a fetch keeps the one layout
+                if endpoint == "TypedDataSet" and (partitioned or get_partition_dir(dataset_id).is_dir()):
+                    with span("fetch_endpoint", dataset_id=dataset_id, endpoint=endpoint, partitioned=True):
+                        if fetch_partitioned(dataset_id, base_url, force_refresh,
+                                             dataset_info.get('select'), dataset_info.get('filter')):
+                            success_count += 1
+                    continue
+                
+                # Skip if file exists and not forcing refresh
+                if output_path.exists() and not force_refresh:
+                    print(f"  ✓ {filename} (already exists)")
+                    count("cache.hits", dataset_id=dataset_id)
+                    success_count += 1
+                    continue
+                
+                print(f"  Fetching {endpoint if endpoint else 'metadata'}...")
+                count("cache.misses", dataset_id=dataset_id)
+                
+                # Use appropriate fetching method
+                expected = None
+                with timer("fetch_endpoint", dataset_id=dataset_id, endpoint=endpoint), \
+                        span("fetch_endpoint", dataset_id=dataset_id, endpoint=endpoint) as s:
+                    if endpoint == "TypedDataSet":
+                        # Use pagination, the filter can make a large data set small
+                        df, expected = fetch_pages(endpoint_url, get_checkpoint_dir(dataset_id, endpoint),
+                                                   force_refresh=force_refresh,
+                                                   select=dataset_info.get('select'),
+                                                   filter=dataset_info.get('filter'))
+                    elif entry['endpoints'].get(endpoint, {}).get('size') == "large":
+                        df, expected = fetch_pages(endpoint_url, get_checkpoint_dir(dataset_id, endpoint),
+                                                   force_refresh=force_refresh)
+                    else:
+                        # Regular endpoint
+                        df = get_cbs_url(endpoint_url, force_refresh=force_refresh)
+                    s.set_attribute("rows", 0 if df is None else len(df))
+                
+                if expected is not None and len(df) != expected and not df.empty:
+                    print(f"  ✗ {filename} incomplete ({len(df)}/{expected} records), rerun to resume")
+                    continue
+                
+                if df is not None and not df.empty:
+                    # Save directly to data folder
+                    with timer("parquet.write", dataset_id=dataset_id), \
+                            span("parquet.write", dataset_id=dataset_id, endpoint=endpoint, rows=len(df)) as s:
+                        write_parquet(df, output_path, dataset_id, endpoint)
+                        s.set_attribute("bytes", output_path.stat().st_size)
+                    count("bytes.written", output_path.stat().st_size, dataset_id=dataset_id)
+                    if endpoint == "DataProperties":
+                        # The TypedDataSet is written with the new schema
+                        clear_schemas()
+                    print(f"  ✓ {filename} ({len(df)} records)")
+                    success_count += 1
+                else:
+                    print(f"  ✗ {filename} (no data returned)")
+                    
+            except Exception as e:
+                print(f"  ✗ {filename} (error: {e})")
+        dataset_span.set_attributes(endpoints=total_count, successful=success_count)
+    
+    # Derived from the endpoints, so only once they are all complete
+    rollups = success_count == total_count and write_region_rollups(dataset_id, force=force_refresh)
     
     print(f"Completed {dataset_id}: {success_count}/{total_count} endpoints successful")
-    return success_count == total_count
+    return success_count == total_count and rollups
+
+def write_metrics(path):
+    """Write the collected metrics as Prometheus text (.prom/.txt) or JSON."""
+    if Path(path).suffix in (".prom", ".txt"):
+        Path(path).write_text(metrics_to_prometheus())
+    else:
+        metrics_to_json(path)
+    print(f"Metrics written to {path}")
 
-def fetch_all_datasets(force_refresh=False):
-    """Fetch all known datasets."""
+def fetch_all_datasets(force_refresh=False, base_url=CBS_ODATA_URL, partitioned=False, dataset_ids=None):
+    """
+    Fetch all known datasets: the DATASETS and every table in the catalog, or the given table ids.
+    """
     print("Fetching all CBS datasets...")
     
+    if not dataset_ids:
+        dataset_ids = list(dict.fromkeys(list(DATASETS) + list(load_catalog())))
     total_success = 0
-    total_datasets = len(DATASETS)
+    total_datasets = len(dataset_ids)
     
-    for dataset_id in DATASETS:
-        if fetch_dataset(dataset_id, force_refresh):
+    for dataset_id in dataset_ids:
+        if fetch_dataset(dataset_id, force_refresh, base_url, partitioned):
             total_success += 1
     
     print(f"\n=== Summary ===")
@@ -158,23 +791,66 @@ def fetch_all_datasets(force_refresh=False):
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description="Fetch CBS data to local data folder")
-    parser.add_argument("--dataset", help="Specific dataset to fetch (e.g., 85236NED)")
+    parser.add_argument("tables", nargs="*", help="CBS table ids to fetch (default: all known tables)")
+    parser.add_argument("--dataset", action="append", default=[], help="Specific dataset to fetch (e.g., 85236NED)")
     parser.add_argument("--refresh", action="store_true", help="Force refresh all data")
     parser.add_argument("--list", action="store_true", help="List available datasets")
+    parser.add_argument("--metrics", help="Collect timings and counters and write them to this file (.json or .prom)")
+    parser.add_argument("--trace", help="Append OpenTelemetry (OTLP/JSON) spans of the run to this JSON-lines file")
+    parser.add_argument("--relayout", action="store_true",
+                        help="Rewrite the existing data files with the current parquet layout (no fetching)")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="Store TypedDataSet as {id}/TypedDataSet/Perioden=.../ partitions and only fetch "
+                             "new or provisional periods; the partitions replace the flat {id}_TypedDataSet.parquet "
+                             f"and {CATALOG_FILE} lists them for cloud reads "
+                             "(with --relayout: split the existing files)")
+    parser.add_argument("--catalog", action="store_true",
+                        help=f"Add the tables in the data folder to {CATALOG_FILE} (no fetching), "
+                             "e.g. for the published site")
+    parser.add_argument("--base-url", default=CBS_ODATA_URL, help=f"OData API root (default: {CBS_ODATA_URL})")
     
     args = parser.parse_args()
+    dataset_ids = list(dict.fromkeys(args.tables + args.dataset))
     
     if args.list:
+        catalog = load_catalog()
         print("Available datasets:")
-        for dataset_id, info in DATASETS.items():
-            print(f"  {dataset_id}: {info['name']}")
+        for dataset_id in dict.fromkeys(list(DATASETS) + list(catalog)):
+            entry = catalog.get(dataset_id)
+            name = entry["name"] if entry else DATASETS[dataset_id]["name"]
+            if entry:
+                endpoints = ", ".join(f"{endpoint} ({info['rows']} rows)"
+                                      for endpoint, info in entry["endpoints"].items())
+            else:
+                endpoints = "not discovered yet"
+            print(f"  {dataset_id}: {name}")
+            print(f"    {endpoints}")
         return
     
+    if args.metrics:
+        enable_metrics()
+    if args.trace:
+        add_span_exporter(JsonLinesSpanExporter(args.trace))
+    
+    if args.catalog:
+        success = catalog_local_files(dataset_ids or list(DATASETS))
+        sys.exit(0 if success else 1)
+    
+    if args.relayout:
+        dataset_ids = dataset_ids or list(dict.fromkeys(list(DATASETS) + list(load_catalog())))
+        relayout = partition_dataset if args.partitioned else relayout_dataset
+        success = all([relayout(dataset_id) for dataset_id in dataset_ids])
+        sys.exit(0 if success else 1)
+    
     try:
-        if args.dataset:
-            success = fetch_dataset(args.dataset, args.refresh)
-        else:
-            success = fetch_all_datasets(args.refresh)
+        with span("data_fetcher", dataset=",".join(dataset_ids) or "all", refresh=args.refresh):
+            if len(dataset_ids) == 1:
+                success = fetch_dataset(dataset_ids[0], args.refresh, args.base_url, args.partitioned)
+            else:
+                success = fetch_all_datasets(args.refresh, args.base_url, args.partitioned, dataset_ids)
+        
+        if args.metrics:
+            write_metrics(args.metrics)
         
         if success:
             print("\n✓ All data fetching completed successfully!")
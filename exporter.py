@@ -14,9 +14,9 @@ def create_util_cell_content(util_file_path):
         util_content = f.read()
     
     # Replace marimo-specific parts to work in inline context
-    # Replace the try/except block for marimo import with just setting it to True
+    # Marimo is always available in the notebook context, skip the spec lookup
     util_content = util_content.replace(
-        'try:\n    import marimo as mo\n    _MARIMO_AVAILABLE = True\nexcept ImportError:\n    _MARIMO_AVAILABLE = False',
+        '_MARIMO_AVAILABLE = importlib.util.find_spec("marimo") is not None',
         '# Marimo is available in the notebook context\n_MARIMO_AVAILABLE = True'
     )
     
@@ -1,80 +1,406 @@
 #!/usr/bin/env python3
 """
 Simplified utility inliner for Marimo notebooks.
-Replaces 'from util import ...' cells with inlined util.py content.
+Replaces 'from util import ...' cells with the parts of util.py they actually use,
+and 'from nl.cbs import ...' cells with the parts of the nl.cbs modules they use.
 """
 
+import ast
 import re
 import subprocess
 import shutil
+import textwrap
 from pathlib import Path
 
+# Inlined util code past this many lines (about the whole util.py before the
+# loaders grew metrics, tracing and range reads) gets a warning: it is parsed and
+# run in the browser before the notebook's first cell output. Library code inlined
+# with it (see INLINED_LIBRARIES) replaces notebook cells and is not counted.
+INLINE_BUDGET_LINES = 700
 
-def create_inlined_util_cell():
-    """Read util.py, strip basic imports, and create indented cell content."""
-    with open('util.py', 'r') as f:
-        lines = f.readlines()
-    
-    # Skip only the imports that are already in the notebook
-    # Keep typing imports and other necessary imports for util.py
-    skip_patterns = [
-        'import requests',
-        'import json', 
-        'import pandas as pd'
-    ]
-    
-    # Also need to handle the marimo import differently since mo is passed as parameter
-    marimo_block_start = -1
-    marimo_block_end = -1
-    
-    util_lines = []
-    skip_marimo_block = False
-    
-    for i, line in enumerate(lines):
-        # Skip basic imports but keep typing and other necessary imports
-        if any(pattern in line.strip() for pattern in skip_patterns):
+# Library packages whose import cells are inlined together with util, by the
+# module notebooks import from and the files defining its public names. Their own
+# `from util import ...` lines are folded into the inlined util, so an exported
+# notebook needs neither util.py nor the package at runtime.
+INLINED_LIBRARIES = {
+    "nl.cbs": ["nl/cbs/descriptions.py", "nl/cbs/loaders.py"],
+}
+
+# No-op stand-ins for util's instrumentation, inlined instead of the real
+# definitions: nothing reads metrics or spans in an exported notebook, and
+# Pyodide runs one load at a time, so there is nothing to coalesce. A stub
+# may only read private (_-prefixed) names util.py defines above it: marimo
+# doesn't resolve a cell's private names used before their definition.
+INSTRUMENTATION_STUBS = {
+    "count": """
+def count(name, value=1, **labels):
+    pass
+""",
+    "timer": """
+def timer(name, **labels):
+    return span(name)
+""",
+    "timed": """
+def timed(name):
+    return lambda fn: fn
+""",
+    "span": """
+def span(name, **attributes):
+    return _NULL_SPAN
+""",
+    "current_span": """
+def current_span():
+    return _NULL_SPAN
+""",
+    "traced": """
+def traced(name):
+    return lambda fn: fn
+""",
+    "SingleFlight": """
+class SingleFlight:
+    \"\"\"No-op stand-in for util.SingleFlight in exported notebooks.\"\"\"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def do(self, key, fn, share=None, name=None):
+        return fn()
+
+    async def ado(self, key, fn, share=None, name=None):
+        return await fn()
+""",
+}
+
+
+def _defined_names(node):
+    """Return the names a top-level statement binds (functions, classes, imports, assignments)."""
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [node.name]
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return [alias.asname or alias.name.split('.')[0] for alias in node.names]
+    if isinstance(node, ast.Assign):
+        targets = node.targets
+    elif isinstance(node, (ast.AnnAssign, ast.AugAssign)):
+        targets = [node.target]
+    else:
+        return []
+
+    names = []
+    for target in targets:
+        for sub in ast.walk(target):
+            if isinstance(sub, ast.Name):
+                names.append(sub.id)
+    return names
+
+
+def _referenced_names(node):
+    """Return every name a statement reads, including inside nested function bodies."""
+    return {
+        sub.id for sub in ast.walk(node)
+        if isinstance(sub, ast.Name) and isinstance(sub.ctx, ast.Load)
+    }
+
+
+def _is_type_checking_block(node):
+    """Check whether a statement is an `if TYPE_CHECKING:` block (never needed at runtime)."""
+    return isinstance(node, ast.If) and isinstance(node.test, ast.Name) and node.test.id == 'TYPE_CHECKING'
+
+
+def _docstring_lines(node):
+    """
+    Return the line numbers (1-based) of the docstrings inside a statement.
+
+    Docstrings that share a line with other code, or are the only statement
+    of their body, are kept.
+    """
+    lines = set()
+    for sub in ast.walk(node):
+        if not isinstance(sub, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
             continue
-            
-        # Handle marimo import block specially
-        if 'try:' in line and i+1 < len(lines) and 'import marimo as mo' in lines[i+1]:
-            skip_marimo_block = True
-            util_lines.append('# marimo available as parameter\n')
-            util_lines.append('_MARIMO_AVAILABLE = True\n')
+        first = sub.body[0]
+        if (len(sub.body) > 1 and isinstance(first, ast.Expr)
+                and isinstance(first.value, ast.Constant) and isinstance(first.value.value, str)
+                and first.lineno > sub.lineno and sub.body[1].lineno > first.end_lineno):
+            lines.update(range(first.lineno, first.end_lineno + 1))
+    return lines
+
+
+def find_util_dependencies(tree, names, stubs=None, filename='util.py'):
+    """
+    Work out which top-level util.py symbols are needed to provide `names`.
+
+    Follows references transitively, so a function that calls another util
+    helper or reads a module-level constant pulls those in as well.
+
+    Args:
+        tree: Parsed util.py module (ast.Module), or a library module's
+        names: Names the notebook imports from util
+        stubs: Replacement sources by name (see INSTRUMENTATION_STUBS); their
+            references are followed instead of the real definition's
+        filename: Module file named in the error for undefined names
+
+    Returns:
+        Set of needed top-level names
+    """
+    symbols = {}
+    for node in tree.body:
+        if _is_type_checking_block(node):
             continue
-        elif skip_marimo_block and 'except ImportError:' in line:
+        for name in _defined_names(node):
+            symbols.setdefault(name, []).append(node)
+    for name, stub in (stubs or {}).items():
+        symbols[name] = ast.parse(stub).body
+
+    missing = [name for name in names if name not in symbols]
+    if missing:
+        raise ValueError(f"Names not defined in {filename}: {', '.join(missing)}")
+
+    needed = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name in needed or name not in symbols:
             continue
-        elif skip_marimo_block and '_MARIMO_AVAILABLE = False' in line:
-            skip_marimo_block = False
+        needed.add(name)
+        for node in symbols[name]:
+            pending.extend(_referenced_names(node) - needed)
+
+    return needed
+
+
+def _shaken_lines(source, needed, notebook_defs=(), stubs=None, skip_modules=()):
+    """
+    Return the statements of a module that define `needed` names, as source lines.
+
+    Statements keep their original order and the comments directly above
+    them. Imports are cut down to the used names that no other notebook cell
+    defines, and imports from `skip_modules` are dropped. Docstrings are
+    dropped and stubbed definitions replaced by their stub.
+
+    Args:
+        source: Module source
+        needed: Top-level names to keep (see find_util_dependencies)
+        notebook_defs: Names defined by the notebook's other cells
+        stubs: Replacement sources by name
+        skip_modules: Modules whose imports are provided elsewhere in the cell
+
+    Returns:
+        List of unindented lines
+    """
+    stubs = stubs or {}
+    lines = source.splitlines()
+    kept = []
+    previous_end = 0
+    for node in ast.parse(source).body:
+        # Each statement owns the comments and blank lines directly above it
+        segment = lines[previous_end:node.end_lineno]
+        previous_end = node.end_lineno
+
+        if _is_type_checking_block(node):
             continue
-        elif skip_marimo_block:
+
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            if isinstance(node, ast.ImportFrom) and node.module in skip_modules:
+                continue
+            # Keep only the imported names that are used and not defined elsewhere
+            aliases = [
+                alias for alias in node.names
+                if (alias.asname or alias.name.split('.')[0]) in needed
+                and (alias.asname or alias.name.split('.')[0]) not in notebook_defs
+            ]
+            if aliases:
+                node.names = aliases
+                kept.append(ast.unparse(node))
             continue
-            
-        util_lines.append(line)
-    
-    # Remove any remaining empty lines at the start
-    while util_lines and util_lines[0].strip() == '':
-        util_lines.pop(0)
-    
+
+        if not set(_defined_names(node)) & needed:
+            continue
+
+        stubbed = [name for name in _defined_names(node) if name in stubs]
+        if stubbed:
+            segment = stubs[stubbed[0]].strip('\n').splitlines()
+        else:
+            # Docstrings are only read in the editor, not in the exported notebook
+            docstrings = _docstring_lines(node)
+            segment = [line for number, line in enumerate(segment, start=node.end_lineno - len(segment) + 1)
+                       if number not in docstrings]
+
+        while segment and segment[0].strip() == '':
+            segment.pop(0)
+        if kept:
+            kept.append('')
+        kept.extend(segment)
+    return kept
+
+
+def inline_library(module, names, notebook_defs=()):
+    """
+    Tree-shake the files of an INLINED_LIBRARIES package down to `names`.
+
+    Args:
+        module: Package the notebook imports from (e.g. "nl.cbs")
+        names: Names the notebook imports from it
+        notebook_defs: Names defined by the notebook's other cells
+
+    Returns:
+        Tuple of (unindented lines, names the kept code imports from util)
+    """
+    library_lines = []
+    util_names = []
+    remaining = list(names)
+    for path in INLINED_LIBRARIES[module]:
+        with open(path, 'r') as f:
+            source = f.read()
+        tree = ast.parse(source)
+        defined = {name for node in tree.body for name in _defined_names(node)}
+        wanted = [name for name in remaining if name in defined]
+        if not wanted:
+            continue
+        remaining = [name for name in remaining if name not in wanted]
+
+        needed = find_util_dependencies(tree, wanted, filename=path)
+        for node in tree.body:
+            if isinstance(node, ast.ImportFrom) and node.module == 'util':
+                util_names.extend(alias.name for alias in node.names
+                                  if (alias.asname or alias.name) in needed and alias.name not in util_names)
+        if library_lines:
+            library_lines.append('')
+        library_lines.append(f'# Inlined from {path}')
+        library_lines.extend(_shaken_lines(source, needed, notebook_defs, skip_modules={'util'}))
+
+    if remaining:
+        raise ValueError(f"Names not defined in {module}: {', '.join(remaining)}")
+    return library_lines, util_names
+
+
+def create_inlined_util_cell(names, notebook_defs=(), stubs=INSTRUMENTATION_STUBS,
+                             budget_lines=INLINE_BUDGET_LINES, libraries=None):
+    """
+    Create a cell containing only the parts of util.py a notebook needs.
+
+    util.py is parsed with the ast module and tree-shaken: only the symbols in
+    `names` and their transitive dependencies are kept, in their original
+    order and with their preceding comments. Imports that another notebook
+    cell already defines are dropped so marimo does not see the name twice.
+    Docstrings are dropped, the instrumentation is inlined as no-op stubs,
+    and util code longer than `budget_lines` gets a warning.
+
+    Names imported from an INLINED_LIBRARIES package are tree-shaken the same
+    way and appended to the cell, and the util names that code uses are
+    inlined with the rest.
+
+    Args:
+        names: Names the notebook imports from util (e.g. ["translate", "get_local_data"])
+        notebook_defs: Names defined by the notebook's other cells
+        stubs: Replacement sources by name, or None to inline the real definitions
+        budget_lines: Util line count past which a warning is printed, or None
+        libraries: Names imported from library packages by package (e.g.
+            {"nl.cbs": ["load_85236NED"]}), or None
+
+    Returns:
+        str: The replacement cell source
+    """
+    library_lines = []
+    util_names = list(names)
+    for module, library_names in (libraries or {}).items():
+        lines, used = inline_library(module, library_names, notebook_defs)
+        library_lines.extend(lines)
+        util_names.extend(name for name in used if name not in util_names)
+
+    with open('util.py', 'r') as f:
+        source = f.read()
+
+    stubs = {name: stub for name, stub in (stubs or {}).items() if name not in names}
+    needed = find_util_dependencies(ast.parse(source), util_names, stubs)
+    util_lines = _shaken_lines(source, needed, notebook_defs, stubs)
+    if budget_lines is not None and len(util_lines) > budget_lines:
+        print(f"⚠ Inlined util code is {len(util_lines)} lines, over the budget of {budget_lines} "
+              f"(imports: {', '.join(util_names)})")
+    if library_lines:
+        util_lines.extend([''] + library_lines)
+
     # Indent all lines by 4 spaces
     indented_lines = []
     for line in util_lines:
         if line.strip() == '':
-            indented_lines.append('\n')  # Keep empty lines
+            indented_lines.append('')  # Keep empty lines
         else:
             indented_lines.append('    ' + line)  # Indent by 4 spaces
-    
-    # Create the replacement cell with local data functions only
-    cell_content = '@app.cell\ndef _(mo):\n    # Utility functions (inlined from util.py)\n'
-    cell_content += ''.join(indented_lines)
-    cell_content += '\n    return translate, get_local_data, get_data_file_path, list_available_data, check_data_availability, is_wasm, get_execution_environment, get_environment_info\n'
-    
+
+    returned = list(names) + [name for library_names in (libraries or {}).values() for name in library_names]
+    cell_content = '@app.cell\ndef _():\n    # Utility functions (inlined from util.py)\n'
+    cell_content += '\n'.join(indented_lines)
+    cell_content += f'\n    return {", ".join(returned)}\n'
     return cell_content
 
 
+def get_notebook_defs(content, exclude_util_cell=True):
+    """
+    Collect the names defined at the top level of a notebook's cells.
+
+    Args:
+        content: Notebook source
+        exclude_util_cell: Skip the cells that import from util or an INLINED_LIBRARIES package
+
+    Returns:
+        Set of defined names
+    """
+    inlined_modules = {'util', *INLINED_LIBRARIES}
+    defs = set()
+    for node in ast.parse(content).body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        if not any('app.cell' in ast.unparse(d) for d in node.decorator_list):
+            continue
+        if exclude_util_cell and any(
+            isinstance(stmt, ast.ImportFrom) and stmt.module in inlined_modules for stmt in node.body
+        ):
+            continue
+        for stmt in node.body:
+            defs.update(_defined_names(stmt))
+    return defs
+
+
+def remove_library_cells(content):
+    """
+    Remove the cells that only import from INLINED_LIBRARIES packages.
+
+    Args:
+        content: Notebook source
+
+    Returns:
+        Tuple of (notebook source without those cells, imported names by package)
+    """
+    lines = content.split('\n')
+    libraries = {}
+    removed = []
+    for node in ast.parse(content).body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) or not node.decorator_list:
+            continue
+        imports = [stmt for stmt in node.body if isinstance(stmt, ast.ImportFrom)]
+        if not imports or any(stmt.module not in INLINED_LIBRARIES for stmt in imports):
+            continue
+        if any(not isinstance(stmt, (ast.ImportFrom, ast.Return)) for stmt in node.body):
+            continue
+        for stmt in imports:
+            libraries.setdefault(stmt.module, []).extend(alias.name for alias in stmt.names)
+        # The cell runs from its decorator to its last line, plus the blank lines after it
+        start, end = node.decorator_list[0].lineno - 1, node.end_lineno
+        while end < len(lines) and lines[end].strip() == '':
+            end += 1
+        removed.append((start, end))
+
+    for start, end in reversed(removed):
+        del lines[start:end]
+    return '\n'.join(lines), libraries
+
+
 def process_notebook(notebook_path):
-    """Replace the util import cell with inlined util functions."""
+    """Replace the util import cell (and the nl.cbs import cell) with inlined functions."""
     with open(notebook_path, 'r') as f:
-        content = f.read()
+        original = f.read()
+    content, libraries = remove_library_cells(original)
     
     # Find the util import cell using string operations instead of regex
     lines = content.split('\n')
@@ -93,10 +419,17 @@ def process_notebook(notebook_path):
     
     if start_idx == -1 or end_idx == -1:
         print(f"Warning: Could not find util import cell in {notebook_path}")
-        return content
-    
+        return original
+    
+    # Work out which util names the cell imports
+    cell_source = textwrap.dedent('\n'.join(lines[start_idx + 2:end_idx]))
+    names = []
+    for node in ast.walk(ast.parse(cell_source)):
+        if isinstance(node, ast.ImportFrom) and node.module == 'util':
+            names.extend(alias.name for alias in node.names)
+
     # Replace the cell
-    replacement = create_inlined_util_cell()
+    replacement = create_inlined_util_cell(names, get_notebook_defs(content), libraries=libraries)
     new_lines = lines[:start_idx] + replacement.split('\n') + lines[end_idx+2:]
     
     return '\n'.join(new_lines)
@@ -167,7 +500,8 @@ def copy_data_folder(destination_dir):
         shutil.rmtree(dest_data)
     
     print(f"Copying data/ folder to {dest_data}")
-    shutil.copytree(source_data, dest_data)
+    # .partial holds the pages of interrupted fetches (see data_fetcher.py)
+    shutil.copytree(source_data, dest_data, ignore=shutil.ignore_patterns('.partial'))
     
     # Count files and calculate size
     data_files = list(dest_data.glob('*.parquet'))
@@ -0,0 +1,8 @@
+from nl.cbs.descriptions import DESCRIPTIONS
+from nl.cbs.loaders import (
+    annotate_data_set,
+    get_regions,
+    load_85236NED,
+    load_85237NED,
+    load_85405NED,
+)
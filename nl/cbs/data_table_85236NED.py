@@ -27,8 +27,22 @@ def _():
 
 @app.cell
 def _():
-    from util import translate, translations, get_local_data, is_wasm, get_execution_environment, get_environment_info
-    return translate, translations, get_local_data, is_wasm, get_execution_environment, get_environment_info
+    from util import get_local_data, is_wasm, get_execution_environment, get_environment_info, is_data_only
+    return get_local_data, is_wasm, get_execution_environment, get_environment_info, is_data_only
+
+
+@app.cell
+def _():
+    from nl.cbs import DESCRIPTIONS, load_85236NED
+    return DESCRIPTIONS, load_85236NED
+
+
+@app.cell
+def _(is_data_only):
+    # Data-only mode: skip display outputs and table widgets when this notebook
+    # is embedded just for its data (e.g. by nl-personal-vehicles)
+    data_only = is_data_only("data_table_85236NED")
+    return (data_only,)
 
 
 @app.cell
@@ -38,11 +52,11 @@ def _(mo):
 
 
 @app.cell
-def _(mo, is_wasm, get_environment_info):
-    # Environment Detection Demo
-    environment_info = get_environment_info()
+def _(mo, is_wasm, get_environment_info, data_only):
+    # Environment Detection Demo (not needed when embedded for data only)
+    environment_info = None if data_only else get_environment_info()
     
-    mo.md(f"""
+    None if data_only else mo.md(f"""
     **Environment Detection:**
     - Running in WASM: {is_wasm()}
     - Environment: {environment_info}
@@ -51,34 +65,9 @@ def _(mo, is_wasm, get_environment_info):
 
 
 @app.cell
-def _(mo):
-    description = """
-
-    ### Motor vehicles active by vehicle type, postal code, region
-
-    | | |
-    |-|-|
-    | name   |  "Motorvoertuigen actief; voertuigtype, postcode, regio, 1 januari, 2019-2023" | 
-    | unit   |  "number of vehicles" | 
-    | url    |  "http://opendata.cbs.nl/ODataApi/OData/85236NED" |
-
-    This table contains figures on active motor vehicles in the Netherlands as of January 1st, broken down by vehicle type, postal code, and region. The data includes:
-
-    - Vehicle types: passenger cars, commercial vehicles (delivery vans, trucks, tractors, special vehicles, buses), motorcycles, and moped-licensed vehicles (mopeds, motorized bicycles, mobility scooters)
-    - Regional breakdown: postal codes, municipalities, provinces, COROP areas, and national level
-    - Geographic attributes: municipality size class, urbanization level, and regional classifications
-
-    The vehicle population includes only vehicles that were insured and allowed to participate in road traffic during the previous year. Vehicles in business inventory are excluded from the count.
-
-    This dataset provides comprehensive coverage of the Dutch motor vehicle fleet composition across different vehicle categories and geographical levels, enabling detailed analysis of regional transportation patterns.
-
-    Data available from: 2019-2023
-
-    Status of the figures:
-    This dataset has been discontinued. The figures cover the period 2019-2023.
-
-    """
-    mo.md(description)
+def _(DESCRIPTIONS, data_only, mo):
+    description = DESCRIPTIONS["85236NED"]
+    None if data_only else mo.md(description)
     return
 
 
@@ -95,13 +84,13 @@ def _(mo):
 
 
 @app.cell
-def _(get_local_data):
+def _(data_only, get_local_data):
     def get_metadata():
         # Load metadata from local data folder
         metadata_df = get_local_data("85236NED")  # Base dataset metadata
         return metadata_df
 
-    metadata_df = get_metadata()
+    metadata_df = None if data_only else get_metadata()
     metadata_df
     return (get_metadata,)
 
@@ -113,17 +102,16 @@ def _(mo):
 
 
 @app.cell
-def _(get_local_data):
+def _(data_only, get_local_data):
     def get_regions():
         # Load regions data from local data folder
         regions_df = get_local_data("85236NED", "RegioS")
         return regions_df
 
-    regions_df = get_regions()
-    regions = regions_df[regions_df['CategoryGroupID'].isin(range(1,17))]['Title'].tolist()
+    regions_df = None if data_only else get_regions()
     regions_df
 
-    return (regions_df,)
+    return
 
 
 @app.cell
@@ -133,14 +121,14 @@ def _(mo):
 
 
 @app.cell
-def _(get_local_data):
+def _(data_only, get_local_data):
     def get_data_time_periods():
         # Load time periods data from local data folder
         return get_local_data("85236NED", "Perioden")
 
-    data_time_periods_df = get_data_time_periods()
+    data_time_periods_df = None if data_only else get_data_time_periods()
     data_time_periods_df
-    return (data_time_periods_df,)
+    return
 
 
 @app.cell
@@ -150,15 +138,15 @@ def _(mo):
 
 
 @app.cell
-def _(get_local_data):
+def _(data_only, get_local_data):
     def get_data_properties():
         # Load data properties from local data folder
         return get_local_data("85236NED", "DataProperties")
 
-    data_properties_df = get_data_properties()
+    data_properties_df = None if data_only else get_data_properties()
     data_properties_df
 
-    return (data_properties_df,)
+    return
 
 
 @app.cell
@@ -168,14 +156,14 @@ def _(mo):
 
 
 @app.cell
-def _(get_local_data):
+def _(data_only, get_local_data):
     def get_typed_data_set():
         # Load complete typed dataset from local data folder
         return get_local_data("85236NED", "TypedDataSet")
 
-    typed_data_set_df = get_typed_data_set()
+    typed_data_set_df = None if data_only else get_typed_data_set()
     typed_data_set_df
-    return (typed_data_set_df,)
+    return
 
 
 @app.cell
@@ -184,63 +172,17 @@ def _(mo):
         r"""
     ## Annotated Data Set
 
-    Creates annotated_data_set_df - a copy of typed_data_set_df with all label lookups resolved.
+    Creates annotated_data_set_df with nl.cbs.load_85236NED: the typed data set with all label lookups resolved.
     """
     )
     return
 
 
 @app.cell
-def _(
-    data_properties_df,
-    data_time_periods_df,
-    regions_df,
-    translate,
-    translations,
-    typed_data_set_df,
-):
-    def get_annotated_data_set():
-        # Create a copy of the typed data set
-        annotated_data_set_df = typed_data_set_df.copy()
-
-        # Map the region codes to their titles (only if RegioS column exists)
-        regions_dict = {
-            row['Key']: row['Title'] for _, row in regions_df.iterrows()
-        }
-        if "RegioS" in annotated_data_set_df.columns:
-            annotated_data_set_df.loc[:,"RegioS"] = annotated_data_set_df["RegioS"].map(regions_dict)
-
-        # Map the period codes to their titles and convert to integers (only if Perioden column exists)
-        periods_dict = {
-            row['Key']: row['Title'] for _, row in data_time_periods_df.iterrows()
-        }
-        if "Perioden" in annotated_data_set_df.columns:
-            annotated_data_set_df.loc[:,"Perioden"] = annotated_data_set_df["Perioden"].map(periods_dict)
-            annotated_data_set_df["Perioden"] = annotated_data_set_df["Perioden"].astype(int)
-
-        # Map data column names using DataProperties: Key -> "Title (Unit)" 
-        # Only rename columns that exist in both the dataframe and DataProperties
-        # Use Key as fallback to ensure uniqueness when multiple columns have same Title
-        properties_dict = {}
-        for _, row in data_properties_df.iterrows():
-            if row['Key'] in annotated_data_set_df.columns:
-                title = translate(row['Title'])
-                unit = translate(row['Unit'])
-                # If this title already exists, use the Key to make it unique
-                new_name = title
-                #new_name = f"{title} ({unit})"
-                #if new_name in properties_dict.values():
-                #    new_name = f"{title} - {row['Key']} ({unit})"
-                properties_dict[row['Key']] = new_name
-        annotated_data_set_df.rename(columns=properties_dict, inplace=True)
-
-        annotated_data_set_df.rename(columns=lambda x:translate(x), inplace=True)
-        annotated_data_set_df = annotated_data_set_df.replace(translations)
-
-        return annotated_data_set_df
-
-    annotated_data_set_df = get_annotated_data_set()
-    annotated_data_set_df
+def _(data_only, load_85236NED):
+    # Load the typed data set and resolve all label lookups (see nl/cbs/loaders.py)
+    annotated_data_set_df = load_85236NED()
+    None if data_only else annotated_data_set_df
     return
 
 
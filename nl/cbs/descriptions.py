@@ -0,0 +1,89 @@
+"""
+Descriptions of the CBS data tables used by the playbooks, as markdown.
+
+Shown by the nl/cbs/data_table_*.py notebooks and, for the tables it uses,
+by nl-personal-vehicles.py.
+"""
+
+DESCRIPTIONS = {
+    "85236NED": """
+### Motor vehicles active by vehicle type, postal code, region
+
+| | |
+|-|-|
+| name   |  "Motorvoertuigen actief; voertuigtype, postcode, regio, 1 januari, 2019-2023" | 
+| unit   |  "number of vehicles" | 
+| url    |  "http://opendata.cbs.nl/ODataApi/OData/85236NED" |
+
+This table contains figures on active motor vehicles in the Netherlands as of January 1st, broken down by vehicle type, postal code, and region. The data includes:
+
+- Vehicle types: passenger cars, commercial vehicles (delivery vans, trucks, tractors, special vehicles, buses), motorcycles, and moped-licensed vehicles (mopeds, motorized bicycles, mobility scooters)
+- Regional breakdown: postal codes, municipalities, provinces, COROP areas, and national level
+- Geographic attributes: municipality size class, urbanization level, and regional classifications
+
+The vehicle population includes only vehicles that were insured and allowed to participate in road traffic during the previous year. Vehicles in business inventory are excluded from the count.
+
+This dataset provides comprehensive coverage of the Dutch motor vehicle fleet composition across different vehicle categories and geographical levels, enabling detailed analysis of regional transportation patterns.
+
+Data available from: 2019-2023
+
+Status of the figures:
+This dataset has been discontinued. The figures cover the period 2019-2023.
+""",
+    "85237NED": """
+### Active passenger cars
+
+| | |
+|-|-|
+| name   |  "Active passenger cars; vehicle characteristics, regions, January 1" | 
+| unit   |  "number of vehicles" | 
+| url    |  "http://opendata.cbs.nl/ODataApi/OData/85237NED" |
+
+This table contains figures on active passenger cars in the Netherlands as of January 1st, broken down by various vehicle characteristics and regions. The data includes:
+
+- Vehicle characteristics: construction year, fuel type, curb weight class, and color
+- Ownership details: private owners by age group and business ownership
+- Regional breakdown by all Dutch provinces
+- Number of active vehicles that were eligible to participate in public road traffic
+
+The vehicle population is based on the Vehicle Registration Database (RDW) and includes Dutch-registered vehicles that were allowed to participate in public road traffic during the previous year. Uninsured vehicles and vehicles in business inventory are excluded from the count.
+
+Recent updates have improved the classification of hybrid electric vehicles, which may slightly adjust electric vehicle counts compared to previous versions.
+
+Data available from: 2019
+
+Status of the figures:
+The figures are updated annually and provide a comprehensive view of the Dutch passenger car fleet composition.
+
+When will new figures be available?
+Annually, typically updated in the second quarter of the year.
+""",
+    "85405NED": """
+### Number of vehicle kilometers
+
+| | |
+|-|-|
+| name   |  "Number of vehicle kilometers" | 
+| unit   |  "million vehicle-km" | 
+| url    |  "http://opendata.cbs.nl/ODataApi/OData/85405NED" |
+
+This table contains figures on traffic performance (vehicle kilometers) of Dutch passenger cars, divided by fuel type and age of the vehicle. The table also contains the total number of vehicle kilometers traveled by all passenger cars and an average per vehicle. 
+
+The table also contains the number of passenger cars in use, this is not a current figure but the number of vehicles that may have been on the road during the reporting year. This concerns active vehicles, vehicles that have failed (due to export or demolition, among other things) and vehicles that have been in the company stock. 
+
+The vehicle population for which kilometers are estimated is based on the statistics on the motor vehicle fleet. The population of the figures in this table is based on the new selection method for the motor vehicle fleet. The difference between the old and the new selection method is described in a method report, see paragraph 4. The series of kilometers estimated on the basis of the new population is available from reporting year 2018. The series based on the old vehicle population runs up to and including reporting year 2020. The method of estimating kilometres has not changed, only the population.
+
+The figures for the 2020 reporting year have been corrected for the 'smoothing effect' of the method by means of a correction factor. This smoothing effect flattens out the annual variation in the figures. This gives a distorted picture of periods in which mobility suddenly changes drastically, such as in 2020 as a result of the corona crisis. 
+
+Data available from: 2018
+
+Status of the figures:
+The figures in this table for 2018 to 2022 are final and those for 2023 have a provisional status.
+
+Changes as of 7 November 2024:
+Figures for 2023 have been added.
+
+When will new figures be available?
+Annually.
+""",
+}
@@ -0,0 +1,181 @@
+"""
+Plain Python loaders for the CBS data tables used by the playbooks.
+
+These are the loading and annotation steps of the nl/cbs/data_table_*.py
+notebooks without the marimo runtime, so batch jobs, benchmarks and the
+notebooks themselves can share one implementation:
+
+    from nl.cbs import load_85405NED
+    df = load_85405NED(years=[2023])
+"""
+
+from typing import Optional, List, Dict, Iterable, TYPE_CHECKING
+
+from util import get_local_data, current_span, traced, translate, translations, annotated_column_names
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@traced("annotate_data_set")
+def annotate_data_set(typed_data_set_df: "pd.DataFrame",
+                      dimensions: Dict[str, "pd.DataFrame"],
+                      data_time_periods_df: "pd.DataFrame",
+                      data_properties_df: Optional["pd.DataFrame"] = None) -> "pd.DataFrame":
+    """
+    Resolve all label lookups of a CBS TypedDataSet.
+
+    Dimension codes are replaced by their titles, period codes by their year
+    (as int), measure columns are renamed to their DataProperties titles and
+    everything is translated to English.
+
+    Args:
+        typed_data_set_df: The TypedDataSet endpoint
+        dimensions: Dimension column name -> dimension endpoint (Key/Title), e.g. {"RegioS": regions_df}
+        data_time_periods_df: The Perioden endpoint
+        data_properties_df: Optional DataProperties endpoint used to rename measure columns
+
+    Returns:
+        pandas.DataFrame: A copy of the data set with all labels resolved
+    """
+    current_span().set_attributes(rows=len(typed_data_set_df), dimensions=",".join(dimensions))
+
+    # Create a copy of the typed data set
+    annotated_data_set_df = typed_data_set_df.copy()
+
+    # Map the dimension codes to their titles (only for columns that exist)
+    for column, dimension_df in dimensions.items():
+        if column in annotated_data_set_df.columns:
+            titles = dict(zip(dimension_df['Key'], dimension_df['Title']))
+            annotated_data_set_df[column] = annotated_data_set_df[column].map(titles)
+
+    # Map the period codes to their titles and convert to integers
+    if "Perioden" in annotated_data_set_df.columns:
+        periods = dict(zip(data_time_periods_df['Key'], data_time_periods_df['Title']))
+        annotated_data_set_df["Perioden"] = annotated_data_set_df["Perioden"].map(periods).astype(int)
+
+    # Map data column names using DataProperties (Key -> translated Title) and translate them
+    annotated_data_set_df.rename(columns=annotated_column_names(list(annotated_data_set_df.columns),
+                                                                data_properties_df), inplace=True)
+    # Translate the text values. Categorical columns (see util.enforce_schema) are
+    # translated category by category, as replace() can't introduce new categories
+    for column in annotated_data_set_df.select_dtypes("category").columns:
+        annotated_data_set_df[column] = annotated_data_set_df[column].map(translate)
+    text_columns = annotated_data_set_df.select_dtypes(["object", "string"]).columns
+    if len(text_columns):
+        annotated_data_set_df[text_columns] = annotated_data_set_df[text_columns].replace(translations)
+
+    return annotated_data_set_df
+
+
+def get_regions(regions_df: "pd.DataFrame") -> List[str]:
+    """
+    Get the region titles used by the playbooks from the 85236NED RegioS endpoint.
+
+    Args:
+        regions_df: The 85236NED RegioS endpoint
+
+    Returns:
+        List of region titles (country, parts of the country, provinces, COROP areas, municipalities)
+    """
+    return regions_df[regions_df['CategoryGroupID'].isin(range(1, 17))]['Title'].tolist()
+
+
+def _select(typed_data_set_df: "pd.DataFrame",
+            dimension_columns: List[str],
+            years: Optional[Iterable[int]],
+            columns: Optional[Iterable[str]]) -> "pd.DataFrame":
+    """Keep only the requested years and measure columns before annotating."""
+    df = typed_data_set_df
+    if years is not None:
+        years = {int(year) for year in years}
+        df = df[df["Perioden"].str[:4].astype(int).isin(years)]
+    if columns is not None:
+        keep = ["ID"] + dimension_columns + ["Perioden"]
+        df = df[[c for c in df.columns if c in keep or c in set(columns)]]
+    return df
+
+
+@traced("load_85236NED")
+def load_85236NED(years: Optional[Iterable[int]] = None,
+                  columns: Optional[Iterable[str]] = None,
+                  annotate: bool = True) -> "pd.DataFrame":
+    """
+    Load 85236NED: motor vehicles by type and region.
+
+    Args:
+        years: Only keep these years (e.g. [2023]), or None for all
+        columns: Only keep these measure columns (CBS keys, e.g. ["Personenauto_2"]), or None for all
+        annotate: Resolve labels and translate to English
+
+    Returns:
+        pandas.DataFrame: The (annotated) data set
+    """
+    typed_data_set_df = _select(get_local_data("85236NED", "TypedDataSet"), ["RegioS"], years, columns)
+    if not annotate:
+        return typed_data_set_df
+
+    return annotate_data_set(
+        typed_data_set_df,
+        dimensions={"RegioS": get_local_data("85236NED", "RegioS")},
+        data_time_periods_df=get_local_data("85236NED", "Perioden"),
+        data_properties_df=get_local_data("85236NED", "DataProperties"),
+    )
+
+
+@traced("load_85237NED")
+def load_85237NED(years: Optional[Iterable[int]] = None,
+                  columns: Optional[Iterable[str]] = None,
+                  annotate: bool = True) -> "pd.DataFrame":
+    """
+    Load 85237NED: active passenger cars by vehicle characteristics.
+
+    Args:
+        years: Only keep these years (e.g. [2023]), or None for all
+        columns: Only keep these measure columns (CBS keys, e.g. ["Benzine_15"]), or None for all
+        annotate: Resolve labels and translate to English
+
+    Returns:
+        pandas.DataFrame: The (annotated) data set
+    """
+    typed_data_set_df = _select(get_local_data("85237NED", "TypedDataSet"), ["Bouwjaar"], years, columns)
+    if not annotate:
+        return typed_data_set_df
+
+    return annotate_data_set(
+        typed_data_set_df,
+        dimensions={"Bouwjaar": get_local_data("85237NED", "Bouwjaar")},
+        data_time_periods_df=get_local_data("85237NED", "Perioden"),
+        data_properties_df=get_local_data("85237NED", "DataProperties"),
+    )
+
+
+@traced("load_85405NED")
+def load_85405NED(years: Optional[Iterable[int]] = None,
+                  columns: Optional[Iterable[str]] = None,
+                  annotate: bool = True) -> "pd.DataFrame":
+    """
+    Load 85405NED: vehicle kilometers by fuel type and vehicle age.
+
+    Args:
+        years: Only keep these years (e.g. [2023]), or None for all
+        columns: Only keep these measure columns (CBS keys, e.g. ["GemiddeldJaarkilometrage_2"]), or None for all
+        annotate: Resolve labels and translate to English
+
+    Returns:
+        pandas.DataFrame: The (annotated) data set
+    """
+    dimension_columns = ["LeeftijdVoertuig", "BrandstofsoortVoertuig"]
+    typed_data_set_df = _select(get_local_data("85405NED", "TypedDataSet"), dimension_columns, years, columns)
+    if not annotate:
+        return typed_data_set_df
+
+    # 85405NED measure columns are named through the translations table, not DataProperties
+    return annotate_data_set(
+        typed_data_set_df,
+        dimensions={
+            "LeeftijdVoertuig": get_local_data("85405NED", "LeeftijdVoertuig"),
+            "BrandstofsoortVoertuig": get_local_data("85405NED", "BrandstofsoortVoertuig"),
+        },
+        data_time_periods_df=get_local_data("85405NED", "Perioden"),
+    )
@@ -56,17 +56,15 @@ def _(mo):
 
 
 @app.cell
-def _(data_table_85405NED_result, pd):
-
-
+def _(pd, util):
+    # 85405NED as a cube (fuel type x vehicle age x period): 2023 over all
+    # vehicle ages is a slice of the mileage array, not a scan of the table
+    mileage_by_fuel_type = util.Cube.from_dataset("85405NED").sel(
+        Perioden="2023", LeeftijdVoertuig="Total").series("GemiddeldJaarkilometrage_2")
 
     def get_traffic_performance(fuel_type):
         """Get traffic performance for a specific fuel type for a given year for all vehicle ages."""
-        data_85405NED = data_table_85405NED_result.defs["annotated_data_set_df"]
-        data_85405NED = data_85405NED[data_85405NED["Vehicle Age"] == "Total"]
-        data_85405NED = data_85405NED[data_85405NED["Fuel Type"] != "Total"]
-        data_85405NED = data_85405NED[data_85405NED["Period"] == 2023]
-        return data_85405NED[(data_85405NED["Fuel Type"] == fuel_type)]["Average Annual Mileage"].values[0]
+        return mileage_by_fuel_type[fuel_type]
 
     # Get average number of km driven per car of the fuel type
     average_petrol_km_per_year = get_traffic_performance("Petrol / Petrol Hybrids / Ethanol")
@@ -119,11 +117,11 @@ def _(mo):
 
 
 @app.cell
-def _(data_table_85236NED_result, pd):
+def _(annotated_85236NED_df, pd, regions, util):
 
     def get_cars_registered(region, year="2023"):
         """Get number of cars registered in a region for a given year."""
-        data_85236NED = data_table_85236NED_result.defs["annotated_data_set_df"]
+        data_85236NED = annotated_85236NED_df
         data_85236NED = data_85236NED[data_85236NED["Regions"] == region]
         data_85236NED = data_85236NED[data_85236NED["Period"] == 2023]
 
@@ -134,8 +132,9 @@ def _(data_table_85236NED_result, pd):
             return None
 
     registered_cars = {}
-    for region in data_table_85236NED_result.defs["regions"]:
-        registered_cars[region] = get_cars_registered(region)
+    with util.span("registered_cars", regions=len(regions)):
+        for region in regions:
+            registered_cars[region] = get_cars_registered(region)
 
     # Return registered_cars as a DataFrame
     pd.DataFrame(list(registered_cars.items()), columns=["Region", "Registered Cars"])
@@ -159,11 +158,11 @@ def _(mo):
 
 
 @app.cell
-def _(data_table_85237NED_result, pd):
+def _(annotated_85237NED_df, pd):
 
     def get_fuel_type_distribution(fuel_type_column, year="2023"):
         """Get number of cars registered in a region for a given year."""
-        data_85237NED = data_table_85237NED_result.defs["annotated_data_set_df"]
+        data_85237NED = annotated_85237NED_df
         data_85237NED = data_85237NED[data_85237NED["Construction Year"] == "Total all construction years"]
         data_85237NED = data_85237NED[data_85237NED["Period"] == 2023]
 
@@ -229,7 +228,6 @@ def _(mo):
 
 @app.cell
 def _(
-    data_table_85236NED_result,
     passenger_cars_distribution_cng,
     passenger_cars_distribution_diesel,
     passenger_cars_distribution_electricity,
@@ -237,7 +235,9 @@ def _(
     passenger_cars_distribution_other_unknown,
     passenger_cars_distribution_petrol,
     pd,
+    regions,
     registered_cars,
+    util,
 ):
 
     def get_number_fuel_types(region):
@@ -252,8 +252,9 @@ def _(
 
     def get_number_fuel_types_all_regions():
         number_fuel_types = {}
-        for region in data_table_85236NED_result.defs["regions"]:
-            number_fuel_types[region] = get_number_fuel_types(region)
+        with util.span("number_fuel_types", regions=len(regions)):
+            for region in regions:
+                number_fuel_types[region] = get_number_fuel_types(region)
         return number_fuel_types
 
 
@@ -285,9 +286,10 @@ def _(
     average_electric_km_per_year,
     average_lpg_km_per_year,
     average_petrol_km_per_year,
-    data_table_85236NED_result,
     number_fuel_types,
     pd,
+    regions,
+    util,
 ):
 
     def get_vehicle_operations(region):
@@ -302,8 +304,9 @@ def _(
 
     def get_vehicle_operations_all_regions():
         vehicle_operations = {}
-        for region in data_table_85236NED_result.defs["regions"]:
-            vehicle_operations[region] = get_vehicle_operations(region)
+        with util.span("vehicle_operations", regions=len(regions)):
+            for region in regions:
+                vehicle_operations[region] = get_vehicle_operations(region)
         return vehicle_operations
 
 
@@ -329,58 +332,55 @@ def _(mo):
 
 
 @app.cell
-def _(sys):
-    data_sources = [ 
-        "nl/cbs/data_table_85405NED.py",
-        "nl/cbs/data_table_85236NED.py",
-        "nl/cbs/data_table_85237NED.py"
-    ]
-
-
-    def import_file(filename):
-        import importlib.util
-        module_name = filename.split("/")[-1].replace(".py", "")
-        spec = importlib.util.spec_from_file_location(module_name, filename)
-        module = importlib.util.module_from_spec(spec)
-        module._IS_IMPORTED = True
-        sys.modules[module_name] = module
-        spec.loader.exec_module(module)
-        # Add to global namespace
-        globals()[module_name] = module
-        return module
-
-    import_file("util.py")
-
-    data_modules = []
-    for ds in data_sources:
-        data_modules.append(import_file(ds))
-
-    #import nl.cbs.data_table_85405NED
-    #mo.md("## 85405NED")
-
-    return (data_modules,)
-
-
-@app.cell
-async def _(data_modules, mo):
-    async def import_data_table(dm):
-        result = await dm.app.embed()
-        return result
-
-    async def load_data_modules():
+async def _(mo, sys, util):
+    import asyncio
+    import time
+    from nl.cbs import DESCRIPTIONS, get_regions, load_85236NED, load_85237NED
+
+    # The data tables used above, loaded with the nl.cbs loaders (the code the
+    # nl/cbs/data_table_*.py notebooks run). 85405NED is read as a cube in step 1.
+    data_tables = {
+        "85236NED": load_85236NED,
+        "85237NED": load_85237NED,
+    }
+
+    def load_data_table(load):
+        # Time each load so the slowest dataset is visible in the output
+        start = time.perf_counter()
+        result = load()
+        return result, time.perf_counter() - start
+
+    async def load_data_tables():
+        start = time.perf_counter()
+        if "pyodide" in sys.modules:
+            # Pyodide has no threads: load the tables one after the other
+            results = [load_data_table(load) for load in data_tables.values()]
+        else:
+            # The loaders spend most of their time in pyarrow and pandas, which
+            # release the GIL, so the tables load side by side in worker threads
+            results = await asyncio.gather(
+                *(asyncio.to_thread(load_data_table, load) for load in data_tables.values())
+            )
+        return dict(zip(data_tables, results)), time.perf_counter() - start
+
+    def describe_data_tables(results, total_seconds):
         md = ""
-        for dm in data_modules:
-            #print(dm.__dict__)
-            globals()[f"{dm.__name__}_result"] = await import_data_table(dm)
-            #data_table_85405NED_result = await import_data_table_85405NED()
-            # data_table_85405NED_result.output
-            md += f"---\n\n## {dm.__name__}"
-            md += globals()[f"{dm.__name__}_result"].defs["description"]
-        return md
+        timings = "| Data table | Load time (s) |\n|-|-|\n"
+        for dataset_id, (_, seconds) in results.items():
+            timings += f"| data_table_{dataset_id} | {seconds:.2f} |\n"
+        timings += f"| **Total** | **{total_seconds:.2f}** |\n\n"
+        for dataset_id in ["85405NED", *data_tables]:
+            md += f"---\n\n## data_table_{dataset_id}\n\n"
+            md += DESCRIPTIONS[dataset_id]
+        return timings + md
 
-    mo.md( await load_data_modules() )
+    data_table_results, data_tables_seconds = await load_data_tables()
+    annotated_85236NED_df = data_table_results["85236NED"][0]
+    annotated_85237NED_df = data_table_results["85237NED"][0]
+    regions = get_regions(util.get_local_data("85236NED", "RegioS"))
 
-    return
+    mo.md(describe_data_tables(data_table_results, data_tables_seconds))
+    return annotated_85236NED_df, annotated_85237NED_df, regions
 
 
 @app.cell
@@ -390,7 +390,7 @@ def _():
     import pandas as pd
     import pyarrow
     import util
-    return (pd,)
+    return pd, util
 
 
 if __name__ == "__main__":
@@ -0,0 +1,330 @@
+"""
+Scenario sweeps of the nl-personal-vehicles model.
+
+nl/personal-transport/nl-personal-vehicles.py computes one scenario: the
+cars registered per region (85236NED), times the national share of each
+fuel type (85237NED), times the average annual mileage per fuel type
+(85405NED), for 2023. This module evaluates the same model for every
+combination of a parameter grid and every municipality as one broadcasted
+NumPy computation (scenario x region x fuel type):
+
+    from nl.personal_vehicles import sweep
+    results = sweep({"bev_share": [0.05, 0.10, 0.20], "mileage_factor": [0.9, 1.0, 1.1]})
+
+The result is a tidy table with one row per scenario and region. Scenarios
+are evaluated in chunks of at most SWEEP_CHUNK_CELLS values, so memory stays
+bounded however large the grid: iter_sweep yields the table chunk by chunk
+and sweep_to_parquet writes it without holding it in memory.
+"""
+
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Iterator, TYPE_CHECKING
+
+from util import Cube, get_region_data, get_region_hierarchy, span, traced
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Fuel types of the model: output name -> (85237NED number of cars column, 85405NED fuel type)
+FUEL_TYPES = {
+    "petrol": ("Benzine_15", "Petrol / Petrol Hybrids / Ethanol"),
+    "diesel": ("Diesel_16", "Diesel / Diesel Hybrids"),
+    "lpg": ("LPG_17", "LPG / LPG Hybrids"),
+    "bev": ("Elektriciteit_18", "Battery Electric / Hydrogen"),
+    "natural_gas": ("CNG_19", "CNG / CNG Hybrids / LNG"),
+}
+
+# 85237NED column with the number of cars of all fuel types (the shares' denominator)
+TOTAL_CARS_COLUMN = "Totaal_14"
+
+# Output columns are named like the notebook's parameters; hydrogen isn't in
+# the data and is 0, as in the notebook
+OUTPUT_PREFIX = "stock_personal_vehicles_"
+ZERO_FUEL_TYPES = ["hydrogen"]
+
+# Sweep parameters and what they replace (see evaluate_chunk)
+SWEEP_PARAMETERS = {
+    "year": "Data year of the car counts, fuel shares and mileage (default: DEFAULT_YEAR)",
+    "bev_share": "Share of battery electric cars (0-1); the other fuel types keep their relative shares",
+    "mileage_factor": "Multiplies the annual mileage of every fuel type",
+    **{f"mileage_{fuel}": f"Annual km of a {fuel} car (default: the year's average)" for fuel in FUEL_TYPES},
+}
+
+DEFAULT_YEAR = 2023
+
+# Values per chunk of the scenario x region x fuel type array (32 MB of float64)
+SWEEP_CHUNK_CELLS = 4 * 1024 * 1024
+
+
+@traced("personal_vehicles.load_inputs")
+def load_inputs(years: Iterable[int] = (DEFAULT_YEAR,), level: str = "municipality") -> Dict[str, Any]:
+    """
+    Load the model inputs of some data years as arrays.
+
+    Args:
+        years: Data years (85236NED, 85237NED and 85405NED all cover 2019-2023)
+        level: Region level (see util.REGION_LEVELS), e.g. "province"
+
+    Returns:
+        Dict with "years", "regions" (keys), "titles", "cars" (years x regions,
+        NaN where a region didn't exist), "shares" and "mileage" (years x fuel
+        types, in FUEL_TYPES order)
+
+    Raises:
+        ValueError: If the data doesn't cover some of the years (see util.get_region_data)
+    """
+    import numpy as np
+
+    years = sorted({int(year) for year in years})
+    periods = [str(year) for year in years]
+    fuels = list(FUEL_TYPES.values())
+
+    # Registered cars per region and year
+    cars_df = get_region_data(level, years=years, columns=["Personenauto_2"])
+    hierarchy = get_region_hierarchy()
+    regions = hierarchy.regions(level)
+    region_codes = {key: i for i, key in enumerate(regions)}
+    cars = np.full((len(years), len(regions)), np.nan)
+    rows = cars_df["Perioden"].astype(str).str[:4].astype(int).map({year: i for i, year in enumerate(years)})
+    columns = cars_df["RegioS"].astype(str).map(region_codes)
+    cars[rows.to_numpy(), columns.to_numpy()] = cars_df["Personenauto_2"].to_numpy(dtype=float, na_value=np.nan)
+
+    # CBS reports 0 cars for the years before a municipality was formed or
+    # after it was dissolved; those region-years have no rows in the results,
+    # and regions without any of the years are left out
+    cars[cars == 0] = np.nan
+    present = ~np.isnan(cars).all(axis=0)
+    regions = [key for key, keep in zip(regions, present) if keep]
+    cars = cars[:, present]
+
+    # National share of each fuel type among all cars
+    fleet = Cube.from_dataset("85237NED", measures=[column for column, _ in fuels] + [TOTAL_CARS_COLUMN])
+    fleet = fleet.sel(Bouwjaar="Total all construction years", Perioden=periods)
+    shares = np.stack([fleet[column] / fleet[TOTAL_CARS_COLUMN] for column, _ in fuels], axis=1)
+
+    # Average annual mileage per fuel type
+    mileage = Cube.from_dataset("85405NED", measures=["GemiddeldJaarkilometrage_2"])
+    mileage = mileage.sel(LeeftijdVoertuig="Total", BrandstofsoortVoertuig=[fuel for _, fuel in fuels],
+                          Perioden=periods)
+    mileage = np.moveaxis(mileage["GemiddeldJaarkilometrage_2"],
+                          [mileage.dimensions.index("Perioden"), mileage.dimensions.index("BrandstofsoortVoertuig")],
+                          [0, 1])
+
+    return {
+        "years": years,
+        "regions": [key.strip() for key in regions],
+        "titles": [hierarchy.title(key) for key in regions],
+        "cars": cars,
+        "shares": shares,
+        "mileage": mileage,
+    }
+
+
+def _check_grid(grid: Dict[str, Iterable[Any]]) -> Dict[str, Any]:
+    """Validate a parameter grid and turn its values into arrays."""
+    import numpy as np
+
+    unknown = set(grid).difference(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameter(s): {', '.join(sorted(unknown))} "
+                         f"(parameters: {', '.join(SWEEP_PARAMETERS)})")
+    grid = {name: np.asarray(list(values) if not np.isscalar(values) else [values])
+            for name, values in grid.items()}
+    grid.setdefault("year", np.asarray([DEFAULT_YEAR]))
+    for name, values in grid.items():
+        if values.size == 0:
+            raise ValueError(f"Sweep parameter {name} has no values")
+    if "bev_share" in grid and ((grid["bev_share"] < 0) | (grid["bev_share"] > 1)).any():
+        raise ValueError("bev_share must be between 0 and 1")
+    grid["year"] = grid["year"].astype(int)
+    return grid
+
+
+def evaluate_chunk(inputs: Dict[str, Any], grid: Dict[str, Any], start: int, stop: int) -> Dict[str, Any]:
+    """
+    Evaluate the scenarios start..stop of a grid for all regions.
+
+    Scenarios are numbered like itertools.product over the grid's values,
+    so a chunk's parameter values are computed from the scenario numbers and
+    the grid is never expanded as a whole. For each scenario the fuel shares
+    and mileage of its year are adjusted:
+
+    - bev_share replaces the BEV share, the other shares are scaled so all
+      fuel types keep adding up to the same total
+    - mileage_{fuel} replaces a fuel type's mileage, then mileage_factor
+      scales all of them
+
+    Args:
+        inputs: Model inputs (see load_inputs), covering the grid's years
+        grid: Parameter name -> array of values (see _check_grid)
+        start: First scenario
+        stop: End of the scenarios (exclusive)
+
+    Returns:
+        Dict with "scenario" and the parameter values (per scenario), "cars"
+        (scenarios x regions) and "operations" (scenarios x regions x fuel types, km)
+    """
+    import numpy as np
+
+    shape = tuple(len(values) for values in grid.values())
+    scenarios = np.arange(start, stop)
+    positions = np.unravel_index(scenarios, shape)
+    values = {name: grid[name][position] for name, position in zip(grid, positions)}
+
+    missing = set(np.unique(values["year"]).tolist()).difference(inputs["years"])
+    if missing:
+        raise KeyError(f"The inputs don't cover the year(s) {', '.join(map(str, sorted(missing)))}")
+    years = np.searchsorted(inputs["years"], values["year"])
+
+    fuels = list(FUEL_TYPES)
+    shares = inputs["shares"][years]
+    mileage = inputs["mileage"][years]
+    if "bev_share" in values:
+        bev = fuels.index("bev")
+        scale = (1 - values["bev_share"]) / (1 - shares[:, bev])
+        shares = shares * scale[:, None]
+        shares[:, bev] = values["bev_share"]
+    for i, fuel in enumerate(fuels):
+        if f"mileage_{fuel}" in values:
+            mileage[:, i] = values[f"mileage_{fuel}"]
+    if "mileage_factor" in values:
+        mileage = mileage * values["mileage_factor"][:, None]
+
+    cars = inputs["cars"][years]
+    km_per_car = shares * mileage
+    return {
+        "scenario": scenarios,
+        **values,
+        "cars": cars,
+        "operations": cars[:, :, None] * km_per_car[:, None, :],
+    }
+
+
+def chunk_to_frame(inputs: Dict[str, Any], chunk: Dict[str, Any], parameters: List[str]) -> "pd.DataFrame":
+    """
+    Turn an evaluated chunk into tidy rows: one per scenario and region with data.
+
+    Args:
+        inputs: Model inputs (see load_inputs)
+        chunk: Evaluated scenarios (see evaluate_chunk)
+        parameters: Parameter columns to include
+
+    Returns:
+        pandas.DataFrame: scenario, the parameters, region, region_title, cars
+        and one stock_personal_vehicles_{fuel} column (km) per fuel type
+    """
+    import numpy as np
+    import pandas as pd
+
+    n_scenarios, n_regions = chunk["cars"].shape
+    cars = chunk["cars"].reshape(-1)
+    rows = ~np.isnan(cars)
+    region_codes = np.tile(np.arange(n_regions), n_scenarios)[rows]
+
+    data = {"scenario": np.repeat(chunk["scenario"], n_regions)[rows]}
+    for name in parameters:
+        data[name] = np.repeat(chunk[name], n_regions)[rows]
+    data["region"] = pd.Categorical.from_codes(region_codes, categories=inputs["regions"])
+    data["region_title"] = pd.Categorical.from_codes(region_codes, categories=inputs["titles"])
+    data["cars"] = cars[rows].astype("int64")
+    operations = chunk["operations"].reshape(-1, len(FUEL_TYPES))[rows]
+    for i, fuel in enumerate(FUEL_TYPES):
+        data[OUTPUT_PREFIX + fuel] = operations[:, i]
+    for fuel in ZERO_FUEL_TYPES:
+        data[OUTPUT_PREFIX + fuel] = np.zeros(len(region_codes))
+    return pd.DataFrame(data)
+
+
+def iter_sweep(grid: Dict[str, Iterable[Any]],
+               inputs: Optional[Dict[str, Any]] = None,
+               chunk_size: Optional[int] = None,
+               level: str = "municipality") -> Iterator["pd.DataFrame"]:
+    """
+    Evaluate every combination of a parameter grid, yielding the result table chunk by chunk.
+
+    Args:
+        grid: Parameter name -> values (see SWEEP_PARAMETERS), e.g.
+              {"year": [2022, 2023], "bev_share": np.linspace(0, 1, 101)}
+        inputs: Preloaded model inputs (see load_inputs), to sweep several grids on the same data
+        chunk_size: Scenarios per chunk (default: as many as fit SWEEP_CHUNK_CELLS)
+        level: Region level, when the inputs are loaded here
+
+    Yields:
+        pandas.DataFrame: The rows of a chunk of scenarios (see chunk_to_frame)
+    """
+    import math
+
+    grid = _check_grid(grid)
+    if inputs is None:
+        inputs = load_inputs(grid["year"].tolist(), level)
+    parameters = list(grid)
+    scenarios = math.prod(len(values) for values in grid.values())
+    if chunk_size is None:
+        chunk_size = max(1, SWEEP_CHUNK_CELLS // max(1, len(inputs["regions"]) * len(FUEL_TYPES)))
+
+    with span("personal_vehicles.sweep", scenarios=scenarios, regions=len(inputs["regions"]),
+              chunk_size=chunk_size) as s:
+        for start in range(0, scenarios, chunk_size):
+            chunk = evaluate_chunk(inputs, grid, start, min(start + chunk_size, scenarios))
+            yield chunk_to_frame(inputs, chunk, parameters)
+        s.set_attribute("chunks", math.ceil(scenarios / chunk_size))
+
+
+def sweep(grid: Dict[str, Iterable[Any]],
+          inputs: Optional[Dict[str, Any]] = None,
+          chunk_size: Optional[int] = None,
+          level: str = "municipality") -> "pd.DataFrame":
+    """
+    Evaluate every combination of a parameter grid for every region.
+
+    sweep({}) is the notebook's scenario: 2023 data, no changes.
+
+    Args:
+        grid: Parameter name -> values (see SWEEP_PARAMETERS)
+        inputs: Preloaded model inputs (see load_inputs)
+        chunk_size: Scenarios per chunk (default: as many as fit SWEEP_CHUNK_CELLS)
+        level: Region level, when the inputs are loaded here
+
+    Returns:
+        pandas.DataFrame: One row per scenario and region (see chunk_to_frame)
+    """
+    import pandas as pd
+
+    return pd.concat(list(iter_sweep(grid, inputs, chunk_size, level)), ignore_index=True)
+
+
+def sweep_to_parquet(grid: Dict[str, Iterable[Any]], path: str,
+                     inputs: Optional[Dict[str, Any]] = None,
+                     chunk_size: Optional[int] = None,
+                     level: str = "municipality") -> Path:
+    """
+    Evaluate a parameter grid and write the result table to parquet chunk by chunk.
+
+    Only one chunk is in memory at a time, so grids with more rows than fit
+    in memory can be swept (read back with filters, e.g. on region or scenario).
+
+    Args:
+        grid: Parameter name -> values (see SWEEP_PARAMETERS)
+        path: Parquet file to write
+        inputs: Preloaded model inputs (see load_inputs)
+        chunk_size: Scenarios per chunk (default: as many as fit SWEEP_CHUNK_CELLS)
+        level: Region level, when the inputs are loaded here
+
+    Returns:
+        Path: The written file
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = Path(path)
+    writer = None
+    try:
+        for df in iter_sweep(grid, inputs, chunk_size, level):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
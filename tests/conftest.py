@@ -0,0 +1,34 @@
+"""
+Shared fixtures: every test gets its own data folder (PLAYBOOK_DATA_DIR), so
+the fetchers and loaders never touch the committed data/ files.
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+import util
+
+REPO_DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """An empty data folder that the loaders and data_fetcher.py use."""
+    path = tmp_path / "data"
+    path.mkdir()
+    monkeypatch.setenv("PLAYBOOK_DATA_DIR", str(path))
+    util.clear_schemas()
+    yield path
+    util.clear_schemas()
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    """A copy of the committed 85405NED files (336 TypedDataSet rows over six periods) to serve."""
+    path = tmp_path / "source"
+    path.mkdir()
+    for file in REPO_DATA_DIR.glob("85405NED*.parquet"):
+        shutil.copyfile(file, path / file.name)
+    return path
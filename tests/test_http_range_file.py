@@ -0,0 +1,102 @@
+"""
+HTTP Range reads of remote files (HTTPRangeFile, read_remote_parquet) against the in-process static server.
+
+The server counts every request and byte it sends, so the tests check what
+was downloaded as well as what was read; with ranges=False it ignores Range
+headers like a host without Range support.
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from util import RANGE_COALESCE_BYTES, HTTPRangeFile, read_remote_parquet
+from benchmarks.static_server import StaticServer
+
+RANDOM_BYTES = 1024 * 1024
+PERIODS = [f"{year}JJ00" for year in range(2000, 2024)]
+ROWS_PER_PERIOD = 2000
+
+
+@pytest.fixture
+def site(tmp_path):
+    """A folder with 1 MB of random bytes and a parquet file with one row group per period."""
+    path = tmp_path / "site"
+    path.mkdir()
+    rng = np.random.default_rng(0)
+    (path / "random.bin").write_bytes(rng.bytes(RANDOM_BYTES))
+    df = pd.DataFrame({
+        "Perioden": np.repeat(PERIODS, ROWS_PER_PERIOD),
+        "a": rng.random(len(PERIODS) * ROWS_PER_PERIOD),
+        "b": rng.integers(0, 1000, len(PERIODS) * ROWS_PER_PERIOD),
+    })
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path / "data.parquet",
+                   row_group_size=ROWS_PER_PERIOD)
+    return path
+
+
+def test_reads_only_the_requested_ranges(site):
+    content = (site / "random.bin").read_bytes()
+    with StaticServer(site) as server:
+        source = HTTPRangeFile(f"{server.base_url}random.bin", footer_bytes=1024)
+        assert source.size == RANDOM_BYTES
+
+        source.seek(1000)
+        assert source.read(5000) == content[1000:6000]
+        # Within the footer fetched on opening
+        source.seek(-100, 2)
+        assert source.read() == content[-100:]
+
+        assert server.stats["requests"] == server.stats["range_requests"] == 2
+        assert server.stats["bytes"] == 1024 + 5000
+
+
+def test_prefetch_coalesces_close_ranges(site):
+    content = (site / "random.bin").read_bytes()
+    close = (1000 + RANGE_COALESCE_BYTES // 2, 2000 + RANGE_COALESCE_BYTES // 2)
+    far = (500_000, 501_000)
+    with StaticServer(site) as server:
+        source = HTTPRangeFile(f"{server.base_url}random.bin", footer_bytes=1024)
+        server.reset_stats()
+
+        source.prefetch([far, (0, 1000), close])
+        # (0, 1000) and `close` are merged into one request, `far` gets its own
+        assert server.stats["range_requests"] == 2
+        assert server.stats["bytes"] == close[1] + far[1] - far[0]
+
+        for start, end in [(0, 1000), close, far]:
+            assert source.read_range(start, end) == content[start:end]
+        assert server.stats["requests"] == 2
+
+
+def test_falls_back_to_the_whole_file_without_range_support(site):
+    content = (site / "random.bin").read_bytes()
+    with StaticServer(site, ranges=False) as server:
+        source = HTTPRangeFile(f"{server.base_url}random.bin", footer_bytes=1024)
+        assert source.size == RANDOM_BYTES
+
+        source.prefetch([(0, 1000), (500_000, 501_000)])
+        source.seek(700_000)
+        assert source.read(10) == content[700_000:700_010]
+        # The whole file came with the first answer and is read from memory
+        assert server.stats["requests"] == 1 and server.stats["range_requests"] == 0
+
+
+@pytest.mark.parametrize("ranges", [True, False], ids=["ranges", "no-ranges"])
+def test_read_remote_parquet_matches_local_read(site, ranges):
+    columns = ["Perioden", "a"]
+    filters = [("Perioden", "==", "2023JJ00")]
+    expected = pd.read_parquet(site / "data.parquet", columns=columns, filters=filters)
+    with StaticServer(site, ranges=ranges) as server:
+        df = read_remote_parquet(f"{server.base_url}data.parquet", columns=columns, filters=filters)
+        stats = dict(server.stats)
+
+    pd.testing.assert_frame_equal(df.reset_index(drop=True), expected.reset_index(drop=True))
+    size = (site / "data.parquet").stat().st_size
+    if ranges:
+        # The footer and one row group of two columns
+        assert stats["bytes"] < size / 4
+    else:
+        assert stats["requests"] == 1 and stats["bytes"] == size
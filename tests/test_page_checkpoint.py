@@ -0,0 +1,168 @@
+"""
+Resumable paginated downloads (PageCheckpoint) against the in-process OData emulator.
+
+The emulator serves copies of the 85405NED files; FlakyServer makes the
+TypedDataSet pages fail from a given row on, or misreports $count, so an
+interrupted or inconsistent fetch can be replayed deterministically.
+"""
+
+import functools
+import time
+
+import pandas as pd
+import pytest
+
+import util
+from util import PageCheckpoint, get_cbs_url_paginated
+from benchmarks.odata_server import ODataError, ODataServer
+
+DATASET_ID = "85405NED"
+ROWS = 336
+
+
+class FlakyServer(ODataServer):
+    """
+    OData emulator with deterministic failures.
+
+    Args:
+        fail_from: Answer TypedDataSet pages from this row on with 503 (None: never)
+        count_offset: Added to every $count, as if rows were added during the fetch
+    """
+
+    def __init__(self, *args, fail_from=None, count_offset=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail_from = fail_from
+        self.count_offset = count_offset
+
+    def respond(self, path, query):
+        if (self.fail_from is not None and path.endswith("/TypedDataSet")
+                and int(query.get("$skip", 0)) >= self.fail_from):
+            raise ODataError(503, "Service unavailable")
+        document = super().respond(path, query)
+        return document + self.count_offset if path.endswith("/$count") else document
+
+
+@pytest.fixture
+def server(source_dir):
+    with FlakyServer(source_dir) as server:
+        yield server
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    """data_fetcher with 100-row pages, no delay between pages and no retries."""
+    import data_fetcher
+
+    monkeypatch.setattr(data_fetcher, "PAGE_SIZE", 100)
+    monkeypatch.setattr(data_fetcher, "get_cbs_url_paginated",
+                        functools.partial(util.get_cbs_url_paginated, page_delay=0, retries=0))
+    return data_fetcher
+
+
+def typed_data_set_url(server):
+    return f"{server.base_url}/{DATASET_ID}/TypedDataSet"
+
+
+def test_checkpoint_round_trip(tmp_path):
+    checkpoint = PageCheckpoint(tmp_path / "checkpoint", "http://example/TypedDataSet", 2)
+    checkpoint.save(pd.DataFrame({"ID": [0, 1]}), 2)
+    checkpoint.save(pd.DataFrame({"ID": [2]}), 1, last=True)
+
+    resumed = PageCheckpoint(tmp_path / "checkpoint", "http://example/TypedDataSet", 2)
+    pages = resumed.load()
+    assert [page.column("ID").to_pylist() for page in pages] == [[0, 1], [2]]
+    assert resumed.rows == 3 and resumed.complete
+
+
+@pytest.mark.parametrize("url, page_size, age", [
+    ("http://example/other", 2, 0),  # another query
+    ("http://example/TypedDataSet", 5, 0),  # another page size
+    ("http://example/TypedDataSet", 2, util.CHECKPOINT_MAX_AGE_HOURS * 3600 + 1),  # too old
+])
+def test_checkpoint_of_another_fetch_is_discarded(tmp_path, monkeypatch, url, page_size, age):
+    checkpoint = PageCheckpoint(tmp_path / "checkpoint", "http://example/TypedDataSet", 2)
+    checkpoint.save(pd.DataFrame({"ID": [0, 1]}), 2)
+
+    monkeypatch.setattr(time, "time", lambda now=time.time(): now + age)
+    assert PageCheckpoint(tmp_path / "checkpoint", url, page_size).load() == []
+    assert not (tmp_path / "checkpoint").exists()
+
+
+def test_paginated_fetch_resumes_after_failure(server, source_dir, tmp_path):
+    url = typed_data_set_url(server)
+    fetch = functools.partial(get_cbs_url_paginated, url, page_size=100, page_delay=0, retries=0,
+                              checkpoint_dir=tmp_path / "checkpoint")
+
+    server.fail_from = 200
+    assert len(fetch()) == 200
+    checkpoint = PageCheckpoint(tmp_path / "checkpoint", url, 100)
+    assert len(checkpoint.load()) == 2 and not checkpoint.complete
+
+    server.fail_from = None
+    server.stats["rows"] = 0
+    df = fetch()
+    # Only the pages after the checkpoint were fetched again
+    assert server.stats["rows"] == ROWS - 200
+    expected = pd.read_parquet(source_dir / f"{DATASET_ID}_TypedDataSet.parquet")
+    assert sorted(df["ID"]) == sorted(expected["ID"])
+    assert checkpoint.load() and checkpoint.complete
+
+
+def test_paginated_fetch_retries_injected_failures(source_dir):
+    with ODataServer(source_dir, throttle_rate=0.15, error_rate=0.15, truncate_rate=0.05,
+                     retry_after=0, seed=1) as server:
+        df = get_cbs_url_paginated(typed_data_set_url(server), page_size=50, page_delay=0, retries=5)
+        failures = server.stats["throttled"] + server.stats["errors"] + server.stats["truncated"]
+    assert failures > 0
+    assert len(df) == ROWS and df["ID"].is_unique
+
+
+def test_fetch_publishes_only_complete_data(server, data_dir, fetcher):
+    typed_path = data_dir / f"{DATASET_ID}_TypedDataSet.parquet"
+    checkpoint_dir = fetcher.get_checkpoint_dir(DATASET_ID, "TypedDataSet")
+
+    server.fail_from = 200
+    assert not fetcher.fetch_dataset(DATASET_ID, base_url=server.base_url)
+    assert not typed_path.exists()
+    assert (checkpoint_dir / "state.json").exists()
+
+    server.fail_from = None
+    assert fetcher.fetch_dataset(DATASET_ID, base_url=server.base_url)
+    assert len(pd.read_parquet(typed_path)) == ROWS
+    assert not checkpoint_dir.exists()
+
+
+def test_fetch_discards_checkpoint_on_count_mismatch(server, data_dir, fetcher):
+    typed_path = data_dir / f"{DATASET_ID}_TypedDataSet.parquet"
+    checkpoint_dir = fetcher.get_checkpoint_dir(DATASET_ID, "TypedDataSet")
+
+    # Every page arrives, but $count says there is one row more
+    server.count_offset = 1
+    assert not fetcher.fetch_dataset(DATASET_ID, base_url=server.base_url)
+    assert not typed_path.exists()
+    assert not checkpoint_dir.exists()
+
+    server.count_offset = 0
+    assert fetcher.fetch_dataset(DATASET_ID, base_url=server.base_url)
+    assert len(pd.read_parquet(typed_path)) == ROWS
+
+
+def test_partitioned_fetch_resumes_after_failure(server, data_dir, fetcher, monkeypatch):
+    # 56 rows per period: three pages each
+    monkeypatch.setattr(fetcher, "PAGE_SIZE", 20)
+
+    server.fail_from = 40
+    assert not fetcher.fetch_dataset(DATASET_ID, base_url=server.base_url, partitioned=True)
+    assert util.list_partitions(util.get_partition_dir(DATASET_ID)) == []
+
+    server.fail_from = None
+    server.stats["rows"] = 0
+    assert fetcher.fetch_dataset(DATASET_ID, base_url=server.base_url, partitioned=True)
+    partitions = util.list_partitions(util.get_partition_dir(DATASET_ID))
+    assert len(partitions) == 6
+    # The rest of every period, and the Perioden endpoint (6 rows) to find the periods
+    assert server.stats["rows"] == ROWS - 6 * 40 + 6
+    # The partitions are the only copy, listed in the catalog for the cloud readers
+    assert not (data_dir / f"{DATASET_ID}_TypedDataSet.parquet").exists()
+    catalog = fetcher.load_catalog()
+    assert len(catalog[DATASET_ID]["endpoints"]["TypedDataSet"]["partitions"]) == 6
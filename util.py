@@ -1,15 +1,30 @@
-import pandas as pd
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-import requests
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
+import importlib.util
+import contextvars
+import functools
+import io
+import threading
 import time
 import sys
+import os
 
-try:
+# Heavy dependencies (pandas, requests, marimo) are imported lazily inside the
+# functions that need them, so importing util stays cheap for notebooks that
+# never fetch over HTTP. Run benchmarks/import_time.py to check for regressions.
+if TYPE_CHECKING:
+    import pandas as pd
+
+_MARIMO_AVAILABLE = importlib.util.find_spec("marimo") is not None
+_ORJSON_AVAILABLE = importlib.util.find_spec("orjson") is not None
+
+
+def _marimo():
+    """Return the marimo module, importing it on first use (None if unavailable)."""
+    if not _MARIMO_AVAILABLE:
+        return None
     import marimo as mo
-    _MARIMO_AVAILABLE = True
-except ImportError:
-    _MARIMO_AVAILABLE = False
+    return mo
 
 
 # Cloud / WASM detection
@@ -17,6 +32,502 @@ def is_wasm() -> bool:
     return False #return "pyodide" in sys.modules
 
 
+# Data-only mode: notebooks embedded just for their data skip display outputs
+_DATA_ONLY = False
+
+
+def set_data_only(enabled: bool = True) -> None:
+    """
+    Turn data-only mode on or off for every notebook in this process.
+    
+    Args:
+        enabled: Whether notebooks should skip building display outputs
+    """
+    global _DATA_ONLY
+    _DATA_ONLY = enabled
+
+
+def is_data_only(module_name: str = "") -> bool:
+    """
+    Check whether a notebook should skip building display outputs.
+    
+    Data-only mode is on when set_data_only(True) has been called, when the
+    PLAYBOOK_DATA_ONLY environment variable is set, or when the notebook was
+    loaded as `module_name` with `_IS_IMPORTED` set (for a notebook that
+    imports a data-table notebook to embed it just for its data).
+    
+    Args:
+        module_name: Module name the notebook is imported under (e.g. "data_table_85236NED")
+    
+    Returns:
+        bool: True if only the data definitions are needed
+    """
+    if _DATA_ONLY or os.environ.get("PLAYBOOK_DATA_ONLY", "") not in ("", "0"):
+        return True
+    module = sys.modules.get(module_name) if module_name else None
+    return bool(getattr(module, "_IS_IMPORTED", False))
+
+
+# Instrumentation: counters and timers for the data loading and fetching hot
+# paths. Disabled by default (every call is a single flag check then), enable
+# with enable_metrics() or the PLAYBOOK_METRICS environment variable.
+_METRICS_ENABLED = os.environ.get("PLAYBOOK_METRICS", "") not in ("", "0")
+_metrics_lock = threading.Lock()
+_counters: Dict[tuple, float] = {}
+_timers: Dict[tuple, Dict[str, float]] = {}
+
+
+def enable_metrics(enabled: bool = True) -> None:
+    """
+    Turn metrics collection on or off for this process.
+    
+    Args:
+        enabled: Whether counters and timers should record
+    """
+    global _METRICS_ENABLED
+    _METRICS_ENABLED = enabled
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    """
+    Add to a counter (e.g. count("http.requests"), count("bytes.read", 1024, source="local")).
+    
+    Args:
+        name: Counter name
+        value: Amount to add
+        **labels: Label values distinguishing series of the same counter
+    """
+    if not _METRICS_ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _metrics_lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+class _Timer:
+    """Context manager adding its elapsed wall time to a timer series."""
+
+    __slots__ = ("key", "start")
+
+    def __init__(self, name, labels):
+        self.key = (name, tuple(sorted(labels.items())))
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        with _metrics_lock:
+            series = _timers.setdefault(self.key, {"count": 0, "total": 0.0, "max": 0.0})
+            series["count"] += 1
+            series["total"] += elapsed
+            series["max"] = max(series["max"], elapsed)
+        return False
+
+
+class _NullTimer:
+    """Shared no-op stand-in for _Timer while metrics are disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str, **labels):
+    """
+    Time a block of code: `with timer("local_data.read", dataset_id="85236NED"): ...`
+    
+    Args:
+        name: Timer name
+        **labels: Label values distinguishing series of the same timer
+    
+    Returns:
+        A context manager recording the elapsed wall time
+    """
+    if not _METRICS_ENABLED:
+        return _NULL_TIMER
+    return _Timer(name, labels)
+
+
+def timed(name: str):
+    """
+    Decorator timing every call of a function under `name`.
+    
+    Args:
+        name: Timer name
+    
+    Returns:
+        The decorator
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _METRICS_ENABLED:
+                return fn(*args, **kwargs)
+            with _Timer(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _series_name(key: tuple) -> str:
+    """Render a (name, labels) key as name{label="value",...}."""
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def get_metrics() -> Dict[str, Any]:
+    """
+    Get a snapshot of all counters and timers.
+    
+    Returns:
+        Dict with "enabled", "counters" (series -> value) and
+        "timers" (series -> count/total_s/mean_s/max_s)
+    """
+    with _metrics_lock:
+        counters = {_series_name(key): value for key, value in sorted(_counters.items())}
+        timers = {
+            _series_name(key): {
+                "count": series["count"],
+                "total_s": round(series["total"], 6),
+                "mean_s": round(series["total"] / series["count"], 6),
+                "max_s": round(series["max"], 6),
+            }
+            for key, series in sorted(_timers.items())
+        }
+    return {"enabled": _METRICS_ENABLED, "counters": counters, "timers": timers}
+
+
+def reset_metrics() -> None:
+    """Clear all counters and timers."""
+    with _metrics_lock:
+        _counters.clear()
+        _timers.clear()
+
+
+def metrics_to_json(path: Optional[str] = None) -> str:
+    """
+    Dump the metrics snapshot as JSON.
+    
+    Args:
+        path: Optional file to write the JSON to
+    
+    Returns:
+        str: The JSON document
+    """
+    import json
+
+    document = json.dumps(get_metrics(), indent=2)
+    if path:
+        Path(path).write_text(document)
+    return document
+
+
+def metrics_to_prometheus(prefix: str = "playbook") -> str:
+    """
+    Dump the metrics in the Prometheus text exposition format.
+    
+    Counters become `{prefix}_{name}_total`, timers become a
+    `{prefix}_{name}_seconds` summary (_count/_sum) plus a separate
+    `{prefix}_{name}_seconds_max` gauge.
+    
+    Args:
+        prefix: Metric name prefix
+    
+    Returns:
+        str: The exposition text
+    """
+    def metric_name(name):
+        return f"{prefix}_{name}".replace(".", "_").replace("-", "_")
+
+    def label_text(labels):
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{k}="{str(v).strip()}"' for k, v in labels) + "}"
+
+    with _metrics_lock:
+        counters = sorted(_counters.items())
+        timers = sorted((key, dict(series)) for key, series in _timers.items())
+
+    lines = []
+    previous = None
+    for (name, labels), value in counters:
+        metric = metric_name(name) + "_total"
+        if name != previous:
+            lines.append(f"# TYPE {metric} counter")
+            previous = name
+        lines.append(f"{metric}{label_text(labels)} {value:.15g}")
+
+    # A metric family's samples must be contiguous, so the _max gauges of a
+    # timer follow all of its summary samples as a family of their own
+    for name in dict.fromkeys(name for (name, _), _ in timers):
+        metric = metric_name(name) + "_seconds"
+        family = [(labels, series) for (timer_name, labels), series in timers if timer_name == name]
+        lines.append(f"# TYPE {metric} summary")
+        for labels, series in family:
+            lines.append(f"{metric}_count{label_text(labels)} {series['count']}")
+            lines.append(f"{metric}_sum{label_text(labels)} {series['total']:.6f}")
+        lines.append(f"# TYPE {metric}_max gauge")
+        for labels, series in family:
+            lines.append(f"{metric}_max{label_text(labels)} {series['max']:.6f}")
+
+    return "\n".join(lines) + "\n"
+
+
+# Tracing: nested spans around the fetch, load and compute stages, following
+# the OpenTelemetry data model. Spans are only created while an exporter is
+# registered (add_span_exporter() or the PLAYBOOK_TRACE_FILE environment
+# variable); otherwise span() returns a shared no-op span.
+_current_span = contextvars.ContextVar("playbook_current_span", default=None)
+_span_exporters: List[Any] = []
+_TRACE_FILE = os.environ.get("PLAYBOOK_TRACE_FILE", "")
+
+
+class Span:
+    """A timed operation with attributes, nested under the span that was current when it started."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes)
+        self.status = "OK"
+        self.error = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute (e.g. span.set_attribute("rows", len(df)))."""
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes) -> None:
+        """Set several attributes at once."""
+        self.attributes.update(attributes)
+
+    @property
+    def duration_s(self) -> float:
+        """Duration in seconds (up to now while the span is open)."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Encode the span as an OTLP/JSON span."""
+        def value(v):
+            if isinstance(v, bool):
+                return {"boolValue": v}
+            if isinstance(v, int):
+                return {"intValue": str(v)}
+            if isinstance(v, float):
+                return {"doubleValue": v}
+            return {"stringValue": str(v)}
+
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [{"key": k, "value": value(v)} for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.status == "ERROR" else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NullSpan:
+    """Shared no-op stand-in for Span while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _SpanContext:
+    """Context manager that makes a span current and exports it when it ends."""
+
+    __slots__ = ("span", "token")
+
+    def __init__(self, name, attributes):
+        self.span = Span(name, _current_span.get(), attributes)
+
+    def __enter__(self):
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end_ns = time.time_ns()
+        if exc is not None:
+            self.span.status = "ERROR"
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self.token)
+        for exporter in list(_span_exporters):
+            try:
+                exporter.export(self.span)
+            except Exception as e:
+                print(f"Span exporter {type(exporter).__name__} failed: {e}")
+        return False
+
+
+class SpanCollector:
+    """In-process span exporter keeping finished spans in memory (e.g. for notebooks and benchmarks)."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        Flatten the collected spans for analysis (e.g. pd.DataFrame(collector.to_records())).
+        
+        Returns:
+            List of dicts with name, ids, start, duration_s, status and attributes
+        """
+        with self._lock:
+            spans = list(self.spans)
+        return [
+            {
+                "name": s.name,
+                "trace_id": s.trace_id,
+                "span_id": s.span_id,
+                "parent_id": s.parent_id,
+                "start_ns": s.start_ns,
+                "duration_s": s.duration_s,
+                "status": s.status,
+                **s.attributes,
+            }
+            for s in spans
+        ]
+
+
+class JsonLinesSpanExporter:
+    """
+    Span exporter appending one OTLP/JSON document per span to a file.
+    
+    Every line is a complete {"resourceSpans": [...]} document, the format
+    read by the OpenTelemetry Collector's otlpjsonfile receiver.
+    """
+
+    def __init__(self, path: str, service_name: str = "data-playbook"):
+        self.path = Path(path)
+        self.resource = {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]}
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        import json
+
+        line = json.dumps({"resourceSpans": [{
+            "resource": self.resource,
+            "scopeSpans": [{"scope": {"name": "util"}, "spans": [span.to_otlp()]}],
+        }]})
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+def add_span_exporter(exporter: Any) -> Any:
+    """
+    Register a span exporter (any object with an export(span) method) and enable tracing.
+    
+    Args:
+        exporter: E.g. SpanCollector() or JsonLinesSpanExporter("trace.jsonl")
+    
+    Returns:
+        The exporter
+    """
+    if exporter not in _span_exporters:
+        _span_exporters.append(exporter)
+    return exporter
+
+
+def remove_span_exporter(exporter: Any) -> None:
+    """Unregister a span exporter; tracing turns off with the last one."""
+    if exporter in _span_exporters:
+        _span_exporters.remove(exporter)
+
+
+def current_span():
+    """
+    Get the innermost open span, to add attributes from inside traced code.
+    
+    Returns:
+        The current Span, or a no-op span outside any span
+    """
+    return _current_span.get() or _NULL_SPAN
+
+
+def traced(name: str):
+    """
+    Decorator wrapping every call of a function in a span named `name`.
+    
+    Args:
+        name: Span name
+    
+    Returns:
+        The decorator
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _span_exporters and not _TRACE_FILE:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def span(name: str, **attributes):
+    """
+    Trace a block of code: `with span("get_local_data", dataset_id="85236NED") as s: ...`
+    
+    Args:
+        name: Span name
+        **attributes: Initial attributes (e.g. dataset_id, endpoint)
+    
+    Returns:
+        A context manager yielding the Span (or a no-op span while tracing is disabled)
+    """
+    if not _span_exporters:
+        if not _TRACE_FILE:
+            return _NULL_SPAN
+        add_span_exporter(JsonLinesSpanExporter(_TRACE_FILE))
+    return _SpanContext(name, attributes)
+
+
 # From Dutch to English translations for vehicle data
 translations = {
     # Common terms
@@ -213,88 +724,1276 @@ def translate(src):
     return translations.get(src, src)
 
 
+# ---------------------------------------------------------------------------
+# Schema registry
+#
+# The CBS JSON only has numbers and strings, so measures arrive as float64 or
+# int64 and dimension keys as Python strings. Each dataset's DataProperties
+# endpoint declares the real type of every column; the registry turns it into
+# compact pandas dtypes, enforced when data_fetcher writes a TypedDataSet and
+# checked again when it is loaded (cast on load only with compact=True).
+# ---------------------------------------------------------------------------
 
+# DataProperties Datatype -> schema kind (unknown datatypes are treated as float)
+_CBS_DATATYPES = {
+    "Long": "integer",
+    "Integer": "integer",
+    "Short": "integer",
+    "Float": "float",
+    "Double": "float",
+    "String": "category",
+}
 
-def get_execution_environment() -> Dict[str, Any]:
+# DataProperties Types that are columns of the TypedDataSet holding dimension keys
+_DIMENSION_TYPES = ("Dimension", "TimeDimension", "GeoDimension", "GeoDetail")
+
+# Largest integer a float32 holds exactly
+_FLOAT32_EXACT = 2 ** 24
+
+_schemas: Dict[str, Optional[Dict[str, Dict[str, Any]]]] = {}
+
+
+def build_schema(data_properties_df: "pd.DataFrame") -> Dict[str, Dict[str, Any]]:
     """
-    Get detailed information about the current execution environment.
+    Build the TypedDataSet schema of a dataset from its DataProperties endpoint.
+    
+    Args:
+        data_properties_df: The DataProperties endpoint
     
     Returns:
-        Dict with environment details including:
-        - is_cloud: Whether running in cloud/WASM
-        - is_local: Whether running locally
-        - marimo_available: Whether marimo is available
-        - notebook_dir: The notebook directory/URL
-        - notebook_location: The notebook location (if available)
+        Dict of column -> {"kind": "integer" | "float" | "category", "decimals": int},
+        including the ID column
     """
-    env_info = {
-        'marimo_available': _MARIMO_AVAILABLE,
-        'is_cloud': False,
-        'is_local': True,
-        'notebook_dir': None,
-        'notebook_location': None
-    }
-    
-    if _MARIMO_AVAILABLE:
-        try:
-            # Get notebook directory
-            notebook_dir = mo.notebook_dir()
-            env_info['notebook_dir'] = str(notebook_dir)
-            
-            # Try to get notebook location if available
-            try:
-                notebook_location = mo.notebook_location()
-                env_info['notebook_location'] = str(notebook_location)
-            except:
-                env_info['notebook_location'] = env_info['notebook_dir']
-            
-            # Detect cloud vs local based on URL
-            is_cloud = str(notebook_dir).startswith(('http://', 'https://'))
-            env_info['is_cloud'] = is_cloud
-            env_info['is_local'] = not is_cloud
-            
-        except Exception as e:
-            env_info['error'] = str(e)
-    
-    return env_info
+    import pandas as pd
 
+    schema = {"ID": {"kind": "integer", "decimals": 0}}
+    for row in data_properties_df.to_dict("records"):
+        key = (row.get("Key") or "").strip()
+        if not key:
+            continue
+        if row.get("Type") in _DIMENSION_TYPES:
+            schema[key] = {"kind": "category", "decimals": 0}
+        elif row.get("Type") == "Topic":
+            decimals = row.get("Decimals")
+            decimals = 0 if pd.isna(decimals) else int(decimals)
+            kind = _CBS_DATATYPES.get(row.get("Datatype"), "float")
+            if kind == "integer" and decimals > 0:
+                kind = "float"
+            schema[key] = {"kind": kind, "decimals": decimals}
+    return schema
 
-def get_environment_info() -> str:
+
+def get_schema(dataset_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
     """
-    Get a human-readable summary of the current execution environment.
+    Get the TypedDataSet schema of a dataset, built from its DataProperties once per process.
+    
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
     
     Returns:
-        str: Formatted environment information
+        The schema (see build_schema), or None if the dataset has no DataProperties
     """
-    env = get_execution_environment()
-    
-    if not env['marimo_available']:
-        return "Environment: Not running in Marimo"
-    
-    if env['is_cloud']:
-        return f"Environment: Marimo Cloud/WASM (URL: {env['notebook_dir']})"
-    else:
-        return f"Environment: Marimo Local (Path: {env['notebook_dir']})"
+    if dataset_id not in _schemas:
+        import pandas as pd
 
+        try:
+            if is_wasm():
+                data_properties_df = get_cloud_data(dataset_id, "DataProperties")
+            else:
+                data_properties_df = pd.read_parquet(get_data_file_path(dataset_id, "DataProperties"))
+            _schemas[dataset_id] = build_schema(data_properties_df)
+        except Exception:
+            _schemas[dataset_id] = None
+    return _schemas[dataset_id]
 
-def get_data_file_path(dataset_id: str, endpoint: str = "") -> Path:
+
+def clear_schemas() -> None:
+    """Forget the cached schemas, e.g. after fetching new DataProperties."""
+    _schemas.clear()
+
+
+def _compact_dtype(values: "pd.Series", column: Dict[str, Any]) -> Any:
+    """Pick the smallest dtype that holds a column's values without loss."""
+    import numpy as np
+    import pandas as pd
+
+    kind = column["kind"]
+    if kind == "category":
+        return "category"
+
+    numbers = pd.to_numeric(values, errors="coerce")
+    if (numbers.isna() & values.notna()).any():
+        raise ValueError("non-numeric values")
+    present = numbers.dropna().to_numpy(dtype="float64")
+    largest = float(np.abs(present).max()) if len(present) else 0.0
+
+    if kind == "integer":
+        if (present != np.round(present)).any():
+            raise ValueError("non-integer values")
+        wide = largest > np.iinfo(np.int32).max
+        if len(present) < len(values):
+            return "Int64" if wide else "Int32"
+        return "int64" if wide else "int32"
+
+    # A float32 keeps every value exact at the declared number of decimals
+    # as long as value * 10**decimals stays within its 24-bit mantissa
+    if largest * 10 ** column["decimals"] < _FLOAT32_EXACT:
+        return "float32"
+    return "float64"
+
+
+def _same_kind(dtype: Any, kind: str) -> bool:
+    """Check that a dtype matches a schema kind."""
+    import pandas as pd
+
+    if kind == "category":
+        return isinstance(dtype, pd.CategoricalDtype)
+    if kind == "integer":
+        return pd.api.types.is_integer_dtype(dtype)
+    return pd.api.types.is_float_dtype(dtype)
+
+
+def validate_schema(df: "pd.DataFrame", schema: Dict[str, Dict[str, Any]]) -> List[str]:
     """
-    Get the file path for a local data file using Marimo's notebook directory.
+    Compare a data frame against a schema.
     
-    This function uses mo.notebook_dir() to get the correct path that works
-    both locally and on Marimo Community Cloud.
+    Columns of the schema that are absent are not reported, so column
+    selections validate; use the returned list to check for drift.
     
     Args:
-        dataset_id: Dataset ID (e.g., "85236NED")
-        endpoint: Optional endpoint name (e.g., "TypedDataSet", "Bouwjaar")
+        df: A TypedDataSet (or a column selection of one)
+        schema: Schema from build_schema()
     
     Returns:
-        Path: Path to the data file
+        List of problems, empty if the data frame matches
     """
-    # Use marimo notebook directory if available, otherwise fall back to current directory
-    if _MARIMO_AVAILABLE:
+    problems = []
+    for name in df.columns:
+        column = schema.get(name)
+        if column is None:
+            problems.append(f"{name}: not in DataProperties")
+        elif not _same_kind(df[name].dtype, column["kind"]):
+            problems.append(f"{name}: {df[name].dtype} is not {column['kind']}")
+    return problems
+
+
+def enforce_schema(df: "pd.DataFrame", schema: Dict[str, Dict[str, Any]],
+                   strict: bool = False) -> "pd.DataFrame":
+    """
+    Cast a TypedDataSet to the compact dtypes of its schema.
+    
+    Integers become int32 (nullable Int32 with missing values, 64 bits when
+    needed), floats float32 when that is lossless at the declared number of
+    decimals, and dimension keys and strings become categories. Columns that
+    already have a compact dtype are left alone, so this is cheap on files
+    written by data_fetcher.
+    
+    Args:
+        df: A TypedDataSet (or a column selection of one)
+        schema: Schema from build_schema()
+        strict: Raise on schema drift instead of reporting it and keeping the column as is
+    
+    Returns:
+        pandas.DataFrame: The data frame with compact dtypes
+    
+    Raises:
+        ValueError: If strict and columns are missing from the schema or can't be cast
+    """
+    problems = []
+    dtypes = {}
+    for name in df.columns:
+        column = schema.get(name)
+        if column is None:
+            problems.append(f"{name}: not in DataProperties")
+            continue
+        dtype = df[name].dtype
+        if _same_kind(dtype, column["kind"]) and (column["kind"] == "category"
+                                                  or getattr(dtype, "itemsize", 8) <= 4):
+            continue
+        try:
+            compact = _compact_dtype(df[name], column)
+        except ValueError as e:
+            problems.append(f"{name}: {e} ({column['kind']} column)")
+            continue
+        if compact != dtype:
+            dtypes[name] = compact
+
+    _report_drift(problems, strict)
+    return df.astype(dtypes) if dtypes else df
+
+
+def check_schema(df: "pd.DataFrame", schema: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    Report the schema drift of a TypedDataSet without casting it.
+    
+    Drift is what enforce_schema couldn't cast: columns that aren't in the
+    DataProperties and measures that aren't numeric. Dtypes that are only
+    wider than the compact ones (files written before data_fetcher cast
+    them) are not drift, unlike for validate_schema.
+    
+    Args:
+        df: A TypedDataSet (or a column selection of one)
+        schema: Schema from build_schema()
+    
+    Returns:
+        List of problems, empty if there is no drift
+    """
+    import pandas as pd
+
+    problems = []
+    for name in df.columns:
+        column = schema.get(name)
+        if column is None:
+            problems.append(f"{name}: not in DataProperties")
+        elif column["kind"] != "category" and not pd.api.types.is_numeric_dtype(df[name].dtype):
+            problems.append(f"{name}: {df[name].dtype} is not {column['kind']}")
+    _report_drift(problems)
+    return problems
+
+
+def _report_drift(problems: List[str], strict: bool = False) -> None:
+    """Count and print schema drift, or raise on it if strict."""
+    if problems:
+        count("schema.drift", len(problems))
+        if strict:
+            raise ValueError("Schema drift: " + "; ".join(problems))
+        print(f"⚠ Schema drift: {'; '.join(problems)}")
+
+
+# Dimensional cubes: a TypedDataSet is the cross product of its dimensions,
+# so every measure fits a dense array with one axis per dimension. Slicing
+# the array by key positions replaces the boolean masks over the long table.
+class Cube:
+    """
+    A CBS TypedDataSet as dense arrays: one numpy array per measure, one axis per dimension.
+    
+    The value of a measure for a combination of dimension keys is stored at
+    the positions of those keys along the axes, so selecting one key of a
+    dimension (e.g. the period 2023, or the "Total" vehicle age) is a numpy
+    index that returns a view, instead of a boolean mask over every row.
+    Combinations without a row in the TypedDataSet are NaN.
+    
+        cube = Cube.from_dataset("85405NED")
+        mileage = cube.sel(Perioden="2023", LeeftijdVoertuig="Total")
+        mileage.series("GemiddeldJaarkilometrage_2")  # average mileage by fuel type
+    
+    Labels can be given as dimension keys ("2023JJ00"), titles ("2023") or
+    translated titles ("Total"); a title shared by several keys refers to
+    the first of them.
+    
+    Args:
+        dimensions: Dimension column names, in axis order
+        keys: Dimension name -> keys along its axis
+        measures: Measure column name -> numpy array with one axis per dimension
+        titles: Dimension name -> {key: title} from the dimension endpoints
+    """
+
+    def __init__(self, dimensions: List[str], keys: Dict[str, List[str]], measures: Dict[str, Any],
+                 titles: Optional[Dict[str, Dict[str, str]]] = None, _positions: Optional[Dict[str, Dict]] = None):
+        self.dimensions = list(dimensions)
+        self.keys = {dimension: keys[dimension] for dimension in self.dimensions}
+        self.measures = dict(measures)
+        self.titles = {dimension: (titles or {}).get(dimension, {}) for dimension in self.dimensions}
+        # Label -> position lookups, shared with the cubes sliced from this one
+        self._positions = {dimension: (_positions or {}).get(dimension) or self._label_positions(dimension)
+                           for dimension in self.dimensions}
+
+    @classmethod
+    def from_frame(cls, df: "pd.DataFrame", dimensions: Optional[List[str]] = None,
+                   measures: Optional[List[str]] = None,
+                   titles: Optional[Dict[str, Dict[str, str]]] = None) -> "Cube":
+        """
+        Build a cube from a TypedDataSet DataFrame.
+        
+        Args:
+            df: The TypedDataSet (dimension key columns and measure columns)
+            dimensions: Dimension columns (default: the non-numeric columns except ID)
+            measures: Measure columns (default: the numeric columns except ID)
+            titles: Dimension name -> {key: title}; keys are ordered like the titles,
+                    keys missing from the titles follow in sorted order
+        
+        Returns:
+            Cube: The cube
+        
+        Raises:
+            ValueError: If several rows have the same dimension keys
+        """
+        import numpy as np
+        import pandas as pd
+
+        if dimensions is None:
+            dimensions = [c for c in df.columns if c != "ID" and not pd.api.types.is_numeric_dtype(df[c])]
+        if measures is None:
+            measures = [c for c in df.columns
+                        if c != "ID" and c not in dimensions and pd.api.types.is_numeric_dtype(df[c])]
+
+        keys = {}
+        codes = []
+        for dimension in dimensions:
+            values = df[dimension].astype(str)
+            present = set(values.unique())
+            order = [key for key in (titles or {}).get(dimension, {}) if key in present]
+            order += sorted(present.difference(order))
+            keys[dimension] = order
+            codes.append(pd.Categorical(values, categories=order).codes)
+
+        shape = tuple(len(keys[dimension]) for dimension in dimensions)
+        cells = np.ravel_multi_index(codes, shape) if dimensions else np.zeros(len(df), dtype=np.intp)
+        if len(np.unique(cells)) != len(cells):
+            raise ValueError(f"Several rows per combination of {', '.join(dimensions)}: not a cube")
+
+        arrays = {}
+        for measure in measures:
+            array = np.full(int(np.prod(shape)), np.nan)
+            array[cells] = df[measure].to_numpy(dtype=float, na_value=np.nan)
+            arrays[measure] = array.reshape(shape)
+        return cls(dimensions, keys, arrays, titles)
+
+    @classmethod
+    def from_dataset(cls, dataset_id: str, measures: Optional[List[str]] = None) -> "Cube":
+        """
+        Load a dataset's TypedDataSet (see get_local_data) as a cube.
+        
+        The dimensions are the TypedDataSet columns with a dimension endpoint
+        (e.g. 85405NED_BrandstofsoortVoertuig), which provides the key order
+        and the titles. Text measures such as region codes are left out.
+        
+        Args:
+            dataset_id: Dataset ID (e.g., "85405NED")
+            measures: Measure columns to keep (default: all)
+        
+        Returns:
+            Cube: The cube
+        """
+        import pandas as pd
+
+        with span("Cube.from_dataset", dataset_id=dataset_id) as s:
+            df = get_local_data(dataset_id, "TypedDataSet")
+            titles = {}
+            for column in df.columns:
+                if column == "ID" or pd.api.types.is_numeric_dtype(df[column]):
+                    continue
+                try:
+                    dimension_df = get_local_data(dataset_id, column)
+                except Exception:
+                    # A text measure (e.g. a region code), not a dimension
+                    continue
+                titles[column] = dict(zip(dimension_df["Key"].astype(str), dimension_df["Title"]))
+            cube = cls.from_frame(df, list(titles), measures, titles)
+            s.set_attributes(dimensions=",".join(cube.dimensions), shape=str(cube.shape))
+            return cube
+
+    @property
+    def shape(self) -> tuple:
+        """Number of keys per dimension."""
+        return tuple(len(self.keys[dimension]) for dimension in self.dimensions)
+
+    def _label_positions(self, dimension: str) -> Dict[Any, int]:
+        positions = {}
+        titles = self.titles.get(dimension, {})
+        for position, key in enumerate(self.keys[dimension]):
+            title = titles.get(key)
+            for label in (key, key.strip(), title, translate(title) if title else None):
+                if label is not None:
+                    positions.setdefault(label, position)
+        return positions
+
+    def index(self, dimension: str, label: Any) -> int:
+        """
+        Position of a key, title or translated title along a dimension.
+        
+        Raises:
+            KeyError: If the dimension has no such label
+        """
+        try:
+            return self._positions[dimension][str(label)]
+        except KeyError:
+            raise KeyError(f"{dimension} has no key or title {label!r}") from None
+
+    def sel(self, **labels) -> "Cube":
+        """
+        Select along dimensions, e.g. cube.sel(Perioden="2023", LeeftijdVoertuig="Total").
+        
+        A single label removes the dimension and the arrays of the result are
+        views of this cube's arrays. A list of labels keeps the dimension with
+        those keys, in that order (a copy).
+        
+        Args:
+            **labels: Dimension name -> label or list of labels
+        
+        Returns:
+            Cube: The selection, with the remaining dimensions
+        """
+        import numpy as np
+
+        unknown = set(labels).difference(self.dimensions)
+        if unknown:
+            raise KeyError(f"Not a dimension: {', '.join(sorted(unknown))} (dimensions: {', '.join(self.dimensions)})")
+
+        index = []
+        remaining = []
+        takes = []
+        keys = {}
+        for dimension in self.dimensions:
+            label = labels.get(dimension)
+            if label is None:
+                index.append(slice(None))
+                remaining.append(dimension)
+                keys[dimension] = self.keys[dimension]
+            elif isinstance(label, (list, tuple, set)):
+                positions = [self.index(dimension, item) for item in label]
+                index.append(slice(None))
+                takes.append((len(remaining), positions))
+                remaining.append(dimension)
+                keys[dimension] = [self.keys[dimension][position] for position in positions]
+            else:
+                index.append(self.index(dimension, label))
+
+        measures = {}
+        for measure, array in self.measures.items():
+            array = array[tuple(index)]
+            for axis, positions in takes:
+                array = np.take(array, positions, axis=axis)
+            measures[measure] = array
+        shared = {dimension: self._positions[dimension] for dimension in remaining
+                  if keys[dimension] is self.keys[dimension]}
+        return Cube(remaining, keys, measures, self.titles, _positions=shared)
+
+    def sum(self, *dimensions: str) -> "Cube":
+        """
+        Roll up by summing over dimensions (all NaN stays NaN).
+        
+        Only additive measures (counts, totals) can be summed; CBS tables
+        usually have a "Total" key to select instead (see sel).
+        
+        Args:
+            *dimensions: Dimensions to sum over (default: all)
+        
+        Returns:
+            Cube: The rollup, with the remaining dimensions
+        """
+        import numpy as np
+
+        dimensions = dimensions or tuple(self.dimensions)
+        axes = tuple(self.dimensions.index(dimension) for dimension in dimensions)
+        measures = {}
+        for measure, array in self.measures.items():
+            total = np.nansum(array, axis=axes)
+            measures[measure] = np.where(np.isnan(array).all(axis=axes), np.nan, total)
+        remaining = [dimension for dimension in self.dimensions if dimension not in dimensions]
+        return Cube(remaining, self.keys, measures, self.titles,
+                    _positions={dimension: self._positions[dimension] for dimension in remaining})
+
+    def __getitem__(self, measure: str) -> Any:
+        """The array of a measure."""
+        return self.measures[measure]
+
+    def series(self, measure: str, translated: bool = True) -> "pd.Series":
+        """
+        A measure of a one-dimensional cube as a Series indexed by the titles of the dimension.
+        
+        Args:
+            measure: Measure column name
+            translated: Translate the titles to English
+        
+        Returns:
+            pandas.Series: The values by key title
+        """
+        import pandas as pd
+
+        if len(self.dimensions) != 1:
+            raise ValueError(f"series() needs one dimension, the cube has {len(self.dimensions)}: "
+                             f"{', '.join(self.dimensions)}")
+        dimension = self.dimensions[0]
+        titles = self.titles.get(dimension, {})
+        labels = [titles.get(key, key) for key in self.keys[dimension]]
+        if translated:
+            labels = [translate(label) for label in labels]
+        return pd.Series(self.measures[measure], index=pd.Index(labels, name=dimension), name=measure)
+
+    def to_frame(self, dropna: bool = True) -> "pd.DataFrame":
+        """
+        The cube as a long table like the TypedDataSet (dimension key columns, measure columns).
+        
+        Args:
+            dropna: Drop the combinations without any value
+        
+        Returns:
+            pandas.DataFrame: One row per combination of keys
+        """
+        import numpy as np
+        import pandas as pd
+
+        grid = np.indices(self.shape).reshape(len(self.dimensions), -1) if self.dimensions else []
+        data = {dimension: np.asarray(self.keys[dimension], dtype=object)[positions]
+                for dimension, positions in zip(self.dimensions, grid)}
+        data.update({measure: np.asarray(array).reshape(-1) for measure, array in self.measures.items()})
+        df = pd.DataFrame(data)
+        if dropna and self.measures:
+            df = df.dropna(subset=list(self.measures), how="all").reset_index(drop=True)
+        return df
+
+    def __repr__(self) -> str:
+        axes = ", ".join(f"{dimension}={size}" for dimension, size in zip(self.dimensions, self.shape))
+        return f"Cube({axes}; {len(self.measures)} measures)"
+
+
+# Region hierarchy: the RegioS dimension of 85236NED mixes the country, its
+# parts, provinces, COROP areas, municipalities and postal code areas. Every
+# region's ancestors are looked up once, from the region codes in the
+# TypedDataSet, so "the municipalities of Utrecht" is a dict lookup instead of
+# a filter over the whole table. data_fetcher materializes the hierarchy
+# ({id}_RegioSHierarchy) and the rows of every level, with their ancestors,
+# sorted by ancestor ({id}_TypedDataSet_{level}, see get_region_data).
+
+# Levels from the country down, with the key prefix of their regions
+REGION_LEVELS = {
+    "country": "NL",
+    "part": "LD",
+    "province": "PV",
+    "corop": "CR",
+    "municipality": "GM",
+    "postcode": "PC",
+}
+
+# TypedDataSet columns with the code of a region's ancestor, and the digits of its key (PV20, GM0358)
+_REGION_CODE_COLUMNS = {
+    "part": ("LandsdeelCode_19", 2),
+    "province": ("ProvincieCode_20", 2),
+    "corop": ("CoropgebiedCode_21", 2),
+    "municipality": ("Gemeentecode_22", 4),
+}
+
+# Endpoint name of the materialized hierarchy ({id}_RegioSHierarchy.parquet)
+REGION_HIERARCHY_ENDPOINT = "RegioSHierarchy"
+
+# Levels that are ancestors of other levels (hierarchy and rollup columns)
+_ANCESTOR_LEVELS = ["country", "part", "province", "corop", "municipality"]
+
+_region_hierarchies: Dict[str, "RegionHierarchy"] = {}
+
+
+def build_region_hierarchy(regions_df: "pd.DataFrame", typed_data_set_df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Build the region hierarchy of a dataset with a RegioS dimension.
+    
+    The ancestors of a region come from its codes in the TypedDataSet
+    (LandsdeelCode_19, ProvincieCode_20, ...): per level the code the region
+    has in most periods, which outvotes blank and misaligned codes of single
+    periods, and the latest on a tie. Only codes of levels above the region's
+    own level are used; missing ancestors are taken from the nearest known one
+    (a municipality without a part of the country gets its province's).
+    
+    Args:
+        regions_df: The RegioS endpoint (Key/Title)
+        typed_data_set_df: The TypedDataSet (RegioS, Perioden and the code columns)
+    
+    Returns:
+        pandas.DataFrame: One row per region with Key, Title, Level and one
+        column per ancestor level holding the key of the region's ancestor
+        (its own key at its own level, None below it)
+    """
+    import pandas as pd
+
+    keys = regions_df["Key"].astype(str)
+    by_code = dict(zip(keys.str.strip(), keys))
+    prefixes = {prefix: level for level, prefix in REGION_LEVELS.items()}
+    hierarchy_df = pd.DataFrame({
+        "Key": keys.to_numpy(),
+        "Title": regions_df["Title"].astype(str).to_numpy(),
+        "Level": keys.str.strip().str[:2].map(prefixes).to_numpy(),
+    })
+    depth = hierarchy_df["Level"].map({level: i for i, level in enumerate(REGION_LEVELS)})
+
+    # The code of an ancestor is the region's most frequent one (the latest on a tie)
+    regions = typed_data_set_df["RegioS"].astype(str).to_numpy()
+    periods = pd.Categorical(typed_data_set_df["Perioden"].astype(str)).codes  # sorted period keys -> ordered ints
+    codes = {}
+    for level, (column, _) in _REGION_CODE_COLUMNS.items():
+        if column not in typed_data_set_df.columns:
+            continue
+        votes = pd.DataFrame({
+            "region": regions,
+            "code": pd.to_numeric(typed_data_set_df[column].astype(str).str.strip(), errors="coerce").to_numpy(),
+            "period": periods,
+        }).dropna(subset=["code"])
+        votes = votes.groupby(["region", "code"]).agg(n=("period", "size"), latest=("period", "max"))
+        codes[level] = votes.sort_values(["n", "latest"]).reset_index().groupby("region")["code"].last()
+
+    countries = hierarchy_df.loc[hierarchy_df["Level"] == "country", "Key"]
+    hierarchy_df["country"] = countries.iloc[0] if len(countries) == 1 else None
+    for i, level in enumerate(_ANCESTOR_LEVELS[1:], start=1):
+        if level in codes:
+            digits = _REGION_CODE_COLUMNS[level][1]
+            prefix = REGION_LEVELS[level]
+            ancestors = codes[level].map(lambda code: by_code.get(f"{prefix}{int(code):0{digits}d}"))
+            hierarchy_df[level] = hierarchy_df["Key"].map(ancestors).where(depth > i)
+        else:
+            hierarchy_df[level] = None
+        own = hierarchy_df["Level"] == level
+        hierarchy_df.loc[own, level] = hierarchy_df.loc[own, "Key"]
+
+    # Fill missing ancestors from the nearest known one, finest first
+    hierarchy_df = hierarchy_df.astype({level: object for level in _ANCESTOR_LEVELS})
+    hierarchy_df[_ANCESTOR_LEVELS] = hierarchy_df[_ANCESTOR_LEVELS].where(hierarchy_df[_ANCESTOR_LEVELS].notna(), None)
+    rows = hierarchy_df.set_index("Key")
+    for i in range(len(_ANCESTOR_LEVELS) - 1, 0, -1):
+        level = _ANCESTOR_LEVELS[i]
+        for up in _ANCESTOR_LEVELS[1:i]:
+            missing = hierarchy_df[up].isna() & hierarchy_df[level].notna()
+            hierarchy_df.loc[missing, up] = hierarchy_df.loc[missing, level].map(rows[up])
+            rows = hierarchy_df.set_index("Key")
+
+    order = hierarchy_df.assign(depth=depth).sort_values(["depth", *_ANCESTOR_LEVELS[1:], "Key"],
+                                                         kind="stable", na_position="first")
+    return order.drop(columns="depth").reset_index(drop=True)
+
+
+class RegionHierarchy:
+    """
+    Index of a region hierarchy (see build_region_hierarchy).
+    
+    Regions can be given as keys ("PV26", padded or not), titles ("Utrecht (PV)")
+    or translated titles.
+    
+        regions = get_region_hierarchy()
+        regions.regions("municipality", within="Utrecht (PV)")  # keys of Utrecht's municipalities
+        regions.parents("GM0344")  # {"country": "NL01  ", "part": "LD03  ", "province": "PV26  ", ...}
+    
+    Args:
+        hierarchy_df: The hierarchy table
+    """
+
+    def __init__(self, hierarchy_df: "pd.DataFrame"):
+        import pandas as pd
+
+        self.hierarchy_df = hierarchy_df
+        columns = ["Key", "Title", "Level", *_ANCESTOR_LEVELS]
+        # Missing ancestors are None (NaN when read back from parquet)
+        values = hierarchy_df[columns].astype(object)
+        values = values.where(values.notna(), None)
+        self._rows = {row[0]: dict(zip(columns, row)) for row in values.itertuples(index=False)}
+        self._keys = {}
+        for key, row in self._rows.items():
+            for label in (key, key.strip(), row["Title"], translate(row["Title"])):
+                self._keys.setdefault(label, key)
+        # (level, ancestor key) -> keys of the level's regions below (or equal to) the ancestor
+        self._members = {}
+        for key, row in self._rows.items():
+            self._members.setdefault((row["Level"], None), []).append(key)
+            # A region is its own ancestor at its own level, so it is "within" itself
+            for up in _ANCESTOR_LEVELS:
+                if row[up] is not None:
+                    self._members.setdefault((row["Level"], row[up]), []).append(key)
+
+    @classmethod
+    def from_dataset(cls, dataset_id: str = "85236NED") -> "RegionHierarchy":
+        """
+        Load the hierarchy of a dataset, or build it when it wasn't materialized.
+        
+        Args:
+            dataset_id: Dataset ID (e.g., "85236NED")
+        
+        Returns:
+            RegionHierarchy: The index
+        """
+        with span("RegionHierarchy.from_dataset", dataset_id=dataset_id) as s:
+            try:
+                hierarchy_df = get_local_data(dataset_id, REGION_HIERARCHY_ENDPOINT)
+                s.set_attribute("materialized", True)
+            except FileNotFoundError:
+                code_columns = [column for column, _ in _REGION_CODE_COLUMNS.values()]
+                typed_data_set_df = get_local_data(dataset_id, "TypedDataSet",
+                                                   columns=["RegioS", "Perioden", *code_columns])
+                hierarchy_df = build_region_hierarchy(get_local_data(dataset_id, "RegioS"), typed_data_set_df)
+                s.set_attribute("materialized", False)
+            s.set_attribute("regions", len(hierarchy_df))
+            return cls(hierarchy_df)
+
+    def key(self, region: str) -> str:
+        """
+        The key of a region as it appears in the data.
+        
+        Raises:
+            KeyError: If no region has this key or title
+        """
+        try:
+            return self._keys[region]
+        except KeyError:
+            raise KeyError(f"Unknown region: {region!r}") from None
+
+    def level(self, region: str) -> str:
+        """The level of a region (e.g. "province")."""
+        return self._rows[self.key(region)]["Level"]
+
+    def title(self, region: str) -> str:
+        """The title of a region."""
+        return self._rows[self.key(region)]["Title"]
+
+    def parents(self, region: str) -> Dict[str, str]:
+        """The keys of a region's ancestors by level, from the country down."""
+        key = self.key(region)
+        row = self._rows[key]
+        return {level: row[level] for level in _ANCESTOR_LEVELS if row[level] is not None and row[level] != key}
+
+    def regions(self, level: str, within: Optional[str] = None) -> List[str]:
+        """
+        The keys of the regions of a level, optionally below another region.
+        
+        Args:
+            level: One of REGION_LEVELS (e.g. "municipality")
+            within: Only regions below this region (e.g. "PV26" or "Utrecht (PV)");
+                    a region of `level` itself gives just that region
+        
+        Returns:
+            List of region keys, ordered by ancestor and key
+        """
+        if level not in REGION_LEVELS:
+            raise ValueError(f"Unknown region level {level!r}, expected one of {', '.join(REGION_LEVELS)}")
+        return list(self._members.get((level, self.key(within) if within is not None else None), []))
+
+    def titles(self, level: str, within: Optional[str] = None) -> List[str]:
+        """The titles of the regions of a level (see regions)."""
+        return [self._rows[key]["Title"] for key in self.regions(level, within)]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __repr__(self) -> str:
+        counts = ", ".join(f"{level}={len(self._members.get((level, None), []))}" for level in REGION_LEVELS)
+        return f"RegionHierarchy({counts})"
+
+
+def get_region_hierarchy(dataset_id: str = "85236NED") -> RegionHierarchy:
+    """
+    Get the region hierarchy index of a dataset, loaded once per process.
+    
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
+    
+    Returns:
+        RegionHierarchy: The index
+    """
+    if dataset_id not in _region_hierarchies:
+        _region_hierarchies[dataset_id] = RegionHierarchy.from_dataset(dataset_id)
+    return _region_hierarchies[dataset_id]
+
+
+def region_rollup_endpoint(level: str) -> str:
+    """Endpoint name of the rows of one region level (e.g. "TypedDataSet_municipality")."""
+    return f"TypedDataSet_{level}"
+
+
+def get_region_data(level: str, within: Optional[str] = None,
+                    years: Optional[List[int]] = None,
+                    columns: Optional[List[str]] = None,
+                    dataset_id: str = "85236NED") -> "pd.DataFrame":
+    """
+    Load the TypedDataSet rows of one region level, e.g. the municipalities of a province.
+    
+    Reads the level's rollup file ({id}_TypedDataSet_{level}), which is sorted
+    by ancestor, so the row groups of other provinces/COROP areas are skipped.
+    Without rollup files the rows are read from the TypedDataSet by key.
+    
+        get_region_data("municipality", within="Utrecht (PV)", years=range(2019, 2024))
+        get_region_data("province", years=[2023])  # province totals
+    
+    Args:
+        level: One of REGION_LEVELS (e.g. "municipality")
+        within: Only regions below this region (key or title)
+        years: Only these years (e.g. [2023]), or None for all
+        columns: Only these measure columns (CBS keys, e.g. ["Personenauto_2"]), or None for all
+        dataset_id: Dataset ID (e.g., "85236NED")
+    
+    Returns:
+        pandas.DataFrame: The rows with the TypedDataSet columns and one
+        column per ancestor level
+    
+    Raises:
+        ValueError: If the dataset has no data for some of the years
+    """
+    hierarchy = get_region_hierarchy(dataset_id)
+    filters = []
+    if within is not None:
+        within_key = hierarchy.key(within)
+        filters.append((hierarchy.level(within_key), "==", within_key))
+    if years is not None:
+        years = {int(year) for year in years}
+        periods = get_local_data(dataset_id, "Perioden", columns=["Key"])["Key"].astype(str)
+        missing = years - {int(period[:4]) for period in periods}
+        if missing:
+            raise ValueError(f"No {dataset_id} data for {', '.join(map(str, sorted(missing)))} "
+                             f"(it covers {periods.min()[:4]}-{periods.max()[:4]})")
+        filters.append(("Perioden", "in", [period for period in periods if int(period[:4]) in years]))
+    if columns is not None:
+        columns = ["ID", "RegioS", "Perioden", *_ANCESTOR_LEVELS, *columns]
+
+    with span("get_region_data", dataset_id=dataset_id, level=level, within=within or "") as s:
+        try:
+            df = get_local_data(dataset_id, region_rollup_endpoint(level), columns=columns, filters=filters or None)
+            s.set_attribute("rollup", True)
+        except FileNotFoundError:
+            # No rollup files (fetched before they were materialized): look the keys up
+            keys = hierarchy.regions(level, within)
+            # No region has an empty key, so without keys this reads an empty frame
+            key_filters = [("RegioS", "in", keys) if keys else ("RegioS", "==", "")]
+            key_filters += [f for f in filters if f[0] == "Perioden"]
+            typed_columns = [c for c in columns if c not in _ANCESTOR_LEVELS] if columns is not None else None
+            df = get_local_data(dataset_id, "TypedDataSet", columns=typed_columns, filters=key_filters)
+            ancestors = hierarchy.hierarchy_df.set_index("Key")[_ANCESTOR_LEVELS]
+            for up in _ANCESTOR_LEVELS:
+                df[up] = df["RegioS"].astype(str).map(ancestors[up])
+            s.set_attribute("rollup", False)
+        s.set_attribute("rows", len(df))
+        return df
+
+
+# SQL: every file in the data folder as a DuckDB view, queried in place
+# (multithreaded, reading only the columns and row groups a query needs).
+# The connection and views are created on first use and re-registered when
+# files are added, removed or rewritten.
+_sql_connection = None
+_sql_signature = None
+_sql_views: List[str] = []
+_sql_lock = threading.Lock()
+
+
+def annotated_column_names(columns: List[str],
+                           data_properties_df: Optional["pd.DataFrame"] = None) -> Dict[str, str]:
+    """
+    Get the English column names of an annotated TypedDataSet.
+    
+    Measure keys are renamed to their translated DataProperties title ("_" is
+    appended until a title is unique), then every name is translated.
+    
+    Args:
+        columns: TypedDataSet column names
+        data_properties_df: Optional DataProperties endpoint
+    
+    Returns:
+        Dict mapping each column to its annotated name
+    """
+    titles = {}
+    if data_properties_df is not None:
+        for key, title in zip(data_properties_df['Key'], data_properties_df['Title']):
+            if key in columns:
+                new_name = translate(title)
+                while new_name in titles.values():
+                    new_name = new_name + "_"
+                titles[key] = new_name
+    return {column: translate(titles.get(column, column)) for column in columns}
+
+
+def _sql_identifier(name: str) -> str:
+    """Quote a DuckDB identifier (view names like 85236NED_TypedDataSet start with a digit)."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_literal(value: Any) -> str:
+    """Quote a DuckDB string literal."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _sql_sources(data_dir: Path) -> Dict[str, Path]:
+    """View name -> parquet file, or partition root of a period-partitioned endpoint."""
+    sources = {path.stem: path for path in sorted(data_dir.glob("*.parquet"))}
+    # Partitions win over a flat file of the same endpoint, like in get_local_data_file
+    for partition_dir in sorted(data_dir.glob("*/*")):
+        if partition_dir.is_dir() and list_partitions(partition_dir):
+            sources[f"{partition_dir.parent.name}_{partition_dir.name}"] = partition_dir
+    return sources
+
+
+def _sql_annotated_view(dataset_id: str, sources: Dict[str, Path]) -> str:
+    """
+    SELECT statement of the {dataset_id}_Annotated view.
+    
+    Like nl.cbs.annotate_data_set: dimension keys are joined to their
+    translated titles, periods to their year and columns get their annotated
+    names (see annotated_column_names). Text measures keep their values.
+    """
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    typed_source = sources[f"{dataset_id}_TypedDataSet"]
+    schema_file = list_partitions(typed_source)[0] if typed_source.is_dir() else typed_source
+    columns = pq.read_schema(schema_file).names
+    data_properties_df = None
+    if f"{dataset_id}_DataProperties" in sources:
+        data_properties_df = pd.read_parquet(sources[f"{dataset_id}_DataProperties"], columns=["Key", "Title"])
+    names = annotated_column_names(columns, data_properties_df)
+
+    select = []
+    joins = []
+    for i, column in enumerate(columns):
+        name = _sql_identifier(names[column])
+        dimension = f"{dataset_id}_{column}"
+        if column == "ID" or dimension not in sources:
+            select.append(f"t.{_sql_identifier(column)} AS {name}")
+            continue
+        joins.append(f"LEFT JOIN {_sql_identifier(dimension)} d{i} ON t.{_sql_identifier(column)} = d{i}.\"Key\"")
+        if column == "Perioden":
+            select.append(f"TRY_CAST(d{i}.\"Title\" AS INTEGER) AS {name}")
+        else:
+            joins.append(f"LEFT JOIN translations tr{i} ON d{i}.\"Title\" = tr{i}.dutch")
+            select.append(f"COALESCE(tr{i}.english, d{i}.\"Title\") AS {name}")
+    return (f"SELECT {', '.join(select)} FROM {_sql_identifier(f'{dataset_id}_TypedDataSet')} t "
+            + " ".join(joins))
+
+
+def _sql_register_views(connection: Any, data_dir: Path) -> None:
+    """(Re)create the views when the files in the data folder changed."""
+    global _sql_signature, _sql_views
+
+    sources = _sql_sources(data_dir)
+    signature = tuple((name, str(path), path.stat().st_mtime_ns) for name, path in sources.items())
+    if signature == _sql_signature:
+        return
+
+    with span("sql.register_views", data_dir=str(data_dir)) as s:
+        for view in _sql_views:
+            connection.execute(f"DROP VIEW IF EXISTS {_sql_identifier(view)}")
+        views = []
+        for name, path in sources.items():
+            if path.is_dir():
+                source = _sql_literal(path / "Perioden=*" / "part-*.parquet") + ", union_by_name = true"
+            else:
+                source = _sql_literal(path)
+            connection.execute(f"CREATE VIEW {_sql_identifier(name)} AS SELECT * FROM read_parquet({source})")
+            views.append(name)
+        for name in sources:
+            if name.endswith("_TypedDataSet"):
+                dataset_id = name[:-len("_TypedDataSet")]
+                view = f"{dataset_id}_Annotated"
+                try:
+                    connection.execute(f"CREATE VIEW {_sql_identifier(view)} AS "
+                                       + _sql_annotated_view(dataset_id, sources))
+                    views.append(view)
+                except Exception as e:
+                    print(f"⚠ No {view} view: {e}")
+        s.set_attribute("views", len(views))
+    _sql_views = views
+    _sql_signature = signature
+
+
+def get_sql_connection() -> Any:
+    """
+    Get the DuckDB connection with a view for every file in the data folder.
+    
+    Views are named after the files: 85236NED_TypedDataSet, 85236NED_RegioS,
+    85236NED (metadata), ... A period-partitioned endpoint is one view over
+    all its partitions. {id}_Annotated views resolve the labels of each
+    TypedDataSet (see nl.cbs.annotate_data_set), and the translations table
+    maps Dutch terms to English.
+    
+    Returns:
+        duckdb.DuckDBPyConnection: The (shared) connection; use .cursor() per thread
+    
+    Raises:
+        ImportError: If DuckDB isn't installed
+    """
+    global _sql_connection
+
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("util.sql needs DuckDB: pip install duckdb") from None
+
+    with _sql_lock:
+        if _sql_connection is None:
+            import pyarrow as pa
+
+            _sql_connection = duckdb.connect()
+            translations_table = pa.table({"dutch": list(translations), "english": list(translations.values())})
+            _sql_connection.execute("CREATE TABLE translations AS SELECT * FROM translations_table")
+        # The folder get_data_file_path() resolves files in
+        _sql_register_views(_sql_connection, get_data_file_path("").parent)
+        return _sql_connection
+
+
+def list_sql_views() -> List[str]:
+    """
+    List the views util.sql can query.
+    
+    Returns:
+        Sorted view names
+    """
+    get_sql_connection()
+    return sorted(_sql_views)
+
+
+def sql(query: str, params: Optional[List[Any]] = None, arrow: bool = False) -> Any:
+    """
+    Run a SQL query over the data folder with DuckDB.
+    
+    Every parquet file is a view named after it (see get_sql_connection).
+    DuckDB reads the parquet files directly, in parallel, and only the
+    columns and row groups the query needs, so joins and aggregations across
+    tables don't load them into pandas first. View names start with a digit
+    and have to be quoted:
+    
+        sql('''
+            SELECT "Fuel Type", "Average Annual Mileage"
+            FROM "85405NED_Annotated"
+            WHERE "Period" = 2023 AND "Vehicle Age" = 'Total'
+        ''')
+    
+    Args:
+        query: SQL query (DuckDB dialect)
+        params: Values for the ? placeholders of the query
+        arrow: Return a pyarrow Table instead of a DataFrame
+    
+    Returns:
+        pandas.DataFrame or pyarrow.Table: The result
+    
+    Raises:
+        ImportError: If DuckDB isn't installed
+    """
+    connection = get_sql_connection()
+    with timer("sql"), span("sql", query=query) as s:
+        # A cursor per call: DuckDB connections can't be shared between threads
+        cursor = connection.cursor()
         try:
-            base_dir = mo.notebook_dir()
+            result = cursor.execute(query, params or [])
+            if arrow:
+                to_arrow = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+                table = to_arrow()
+            else:
+                table = result.df()
+        finally:
+            cursor.close()
+        s.set_attribute("rows", len(table))
+    count("rows.decoded", len(table), source="sql")
+    return table
+
+
+def get_execution_environment() -> Dict[str, Any]:
+    """
+    Get detailed information about the current execution environment.
+    
+    Returns:
+        Dict with environment details including:
+        - is_cloud: Whether running in cloud/WASM
+        - is_local: Whether running locally
+        - marimo_available: Whether marimo is available
+        - notebook_dir: The notebook directory/URL
+        - notebook_location: The notebook location (if available)
+    """
+    env_info = {
+        'marimo_available': _MARIMO_AVAILABLE,
+        'is_cloud': False,
+        'is_local': True,
+        'notebook_dir': None,
+        'notebook_location': None
+    }
+    
+    if _MARIMO_AVAILABLE:
+        try:
+            mo = _marimo()
+            # Get notebook directory
+            notebook_dir = mo.notebook_dir()
+            env_info['notebook_dir'] = str(notebook_dir)
+            
+            # Try to get notebook location if available
+            try:
+                notebook_location = mo.notebook_location()
+                env_info['notebook_location'] = str(notebook_location)
+            except:
+                env_info['notebook_location'] = env_info['notebook_dir']
+            
+            # Detect cloud vs local based on URL
+            is_cloud = str(notebook_dir).startswith(('http://', 'https://'))
+            env_info['is_cloud'] = is_cloud
+            env_info['is_local'] = not is_cloud
+            
+        except Exception as e:
+            env_info['error'] = str(e)
+    
+    return env_info
+
+
+def get_environment_info() -> str:
+    """
+    Get a human-readable summary of the current execution environment.
+    
+    Returns:
+        str: Formatted environment information
+    """
+    env = get_execution_environment()
+    
+    if not env['marimo_available']:
+        return "Environment: Not running in Marimo"
+    
+    if env['is_cloud']:
+        return f"Environment: Marimo Cloud/WASM (URL: {env['notebook_dir']})"
+    else:
+        return f"Environment: Marimo Local (Path: {env['notebook_dir']})"
+
+
+# Request coalescing: concurrent loads of the same file (e.g. nl.cbs loaders
+# running in threads that read the same endpoint) share one
+# download and decode. Only calls that overlap are coalesced, nothing is cached
+# after a load finishes.
+class SingleFlight:
+    """
+    Runs concurrent calls for the same key once and hands every caller the result.
+    
+    do() coalesces blocking calls across threads, ado() coalesces coroutines
+    within an event loop. The first caller for a key runs the function, later
+    callers wait for its result (or exception) while it is in flight. stats
+    counts, per key, the calls, the executions and the deduplicated calls.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, Any] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _join(self, key: Any, name: str, create_future) -> tuple:
+        """Return (future, is_leader) for a key, registering a new future if none is in flight."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = create_future()
+            stats = self.stats.setdefault(name, {"calls": 0, "executions": 0, "deduplicated": 0})
+            stats["calls"] += 1
+            stats["executions" if leader else "deduplicated"] += 1
+        if not leader:
+            count("singleflight.deduplicated", key=name)
+        return future, leader
+
+    def _leave(self, key: Any) -> None:
+        with self._lock:
+            del self._calls[key]
+
+    def do(self, key: Any, fn, share=None, name: Optional[str] = None) -> Any:
+        """
+        Call fn(), or wait for the call in flight for the same key.
+        
+        Args:
+            key: Identifies the call (e.g. "local:85236NED_TypedDataSet", hashable)
+            fn: Function without arguments
+            share: Applied to the result before it is handed to a waiting
+                   caller (e.g. a copy, so callers can't modify each other's data)
+            name: Key the statistics are kept under (default: key)
+        
+        Returns:
+            The result of fn()
+        """
+        import concurrent.futures
+
+        future, leader = self._join(key, name or key, concurrent.futures.Future)
+        if not leader:
+            result = future.result()
+            return share(result) if share else result
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._leave(key)
+
+    async def ado(self, key: Any, fn, share=None, name: Optional[str] = None) -> Any:
+        """
+        Await fn(), or the call in flight for the same key in this event loop.
+        
+        Args:
+            key: Identifies the call (hashable)
+            fn: Coroutine function without arguments
+            share: Applied to the result before it is handed to a waiting caller
+            name: Key the statistics are kept under (default: key)
+        
+        Returns:
+            The result of fn()
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        future, leader = self._join(loop_key, name or key, loop.create_future)
+        if not leader:
+            result = await asyncio.shield(future)
+            return share(result) if share else result
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved, there may be no waiters
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._leave(loop_key)
+
+
+_single_flight = SingleFlight()
+
+
+def _data_key(source: str, dataset_id: str, endpoint: str,
+              columns: Optional[List[str]], filters: Optional[List[Any]]) -> str:
+    """Single-flight key of a data file load, e.g. "local:85236NED_TypedDataSet"."""
+    key = f"{source}:{dataset_id}_{endpoint}" if endpoint else f"{source}:{dataset_id}"
+    if columns:
+        key += f" columns={list(columns)}"
+    if filters:
+        key += f" filters={filters}"
+    return key
+
+
+def _share_frame(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Copy of a coalesced DataFrame for a waiting caller."""
+    return df.copy()
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Get the request coalescing statistics of the data loaders.
+    
+    Returns:
+        Dict mapping each load key (e.g. "local:85236NED_TypedDataSet") to
+        its number of calls, executions and deduplicated calls
+    """
+    with _single_flight._lock:
+        return {key: dict(stats) for key, stats in _single_flight.stats.items()}
+
+
+def reset_single_flight_stats() -> None:
+    """Reset the request coalescing statistics."""
+    with _single_flight._lock:
+        _single_flight.stats.clear()
+
+
+def get_data_file_path(dataset_id: str, endpoint: str = "") -> Path:
+    """
+    Get the file path for a local data file using Marimo's notebook directory.
+    
+    This function uses mo.notebook_dir() to get the correct path that works
+    both locally and on Marimo Community Cloud.
+    
+    The PLAYBOOK_DATA_DIR environment variable points the loaders at another
+    data folder, e.g. the scaled copies made by benchmarks/synthetic_data.py.
+    
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
+        endpoint: Optional endpoint name (e.g., "TypedDataSet", "Bouwjaar")
+    
+    Returns:
+        Path: Path to the data file
+    """
+    # Use marimo notebook directory if available, otherwise fall back to current directory
+    if _MARIMO_AVAILABLE:
+        try:
+            base_dir = _marimo().notebook_dir()
             # Debug info for cloud detection
             if str(base_dir).startswith(('http://', 'https://')):
                 # Running in cloud/WASM environment
@@ -310,10 +2009,13 @@ def get_data_file_path(dataset_id: str, endpoint: str = "") -> Path:
     else:
         filename = f"{dataset_id}.parquet"
     
-    return Path("data") / filename
+    return Path(os.environ.get("PLAYBOOK_DATA_DIR") or "data") / filename
 
 
-def get_local_data(dataset_id: str, endpoint: str = "") -> pd.DataFrame:
+def get_local_data(dataset_id: str, endpoint: str = "",
+                   columns: Optional[List[str]] = None,
+                   filters: Optional[List[Any]] = None,
+                   compact: bool = False) -> "pd.DataFrame":
     """
     Load data from local data folder or GitHub Pages (when running in cloud).
     
@@ -325,6 +2027,17 @@ def get_local_data(dataset_id: str, endpoint: str = "") -> pd.DataFrame:
         dataset_id: Dataset ID (e.g., "85236NED")
         endpoint: Optional endpoint name (e.g., "TypedDataSet", "Bouwjaar")
                  If empty, loads the base dataset metadata
+        columns: Only read these columns
+        filters: Only read matching rows, in pyarrow's filter format
+                 (e.g. [("Perioden", "==", "2023JJ00")]). Row groups whose
+                 statistics rule out a match are skipped without decoding.
+        compact: Cast a TypedDataSet to the compact dtypes of its schema (see enforce_schema)
+    
+    A TypedDataSet is checked against the schema built from the dataset's
+    DataProperties and schema drift is reported (see check_schema); the
+    columns keep the dtypes they are stored with unless compact is set.
+    Concurrent calls for the same data share one load (see SingleFlight);
+    every caller gets its own DataFrame.
     
     Returns:
         pandas.DataFrame: The loaded data
@@ -333,24 +2046,110 @@ def get_local_data(dataset_id: str, endpoint: str = "") -> pd.DataFrame:
         FileNotFoundError: If the data file doesn't exist
         Exception: If there's an error loading the data
     """
-    # Check if we're running in WASM/cloud environment
-    if is_wasm():
-        return get_cloud_data(dataset_id, endpoint)
-    else:
-        return get_local_data_file(dataset_id, endpoint)
+    def load():
+        # Check if we're running in WASM/cloud environment
+        with timer("get_local_data", dataset_id=dataset_id, endpoint=endpoint), \
+                span("get_local_data", dataset_id=dataset_id, endpoint=endpoint) as s:
+            if is_wasm():
+                df = get_cloud_data(dataset_id, endpoint, columns=columns, filters=filters)
+            else:
+                df = get_local_data_file(dataset_id, endpoint, columns=columns, filters=filters)
+            if endpoint == "TypedDataSet":
+                schema = get_schema(dataset_id)
+                if schema is not None and compact:
+                    df = enforce_schema(df, schema)
+                elif schema is not None:
+                    check_schema(df, schema)
+            s.set_attribute("rows", len(df))
+            return df
+
+    key = _data_key("local", dataset_id, endpoint, columns, filters) + (" compact" if compact else "")
+    return _single_flight.do(key, load, share=_share_frame)
 
 
-def get_local_data_file(dataset_id: str, endpoint: str = "") -> pd.DataFrame:
+def get_partition_dir(dataset_id: str, endpoint: str = "TypedDataSet") -> Path:
+    """
+    Get the directory of a period-partitioned endpoint.
+    
+    Partitioned endpoints are stored as data/{id}/{endpoint}/Perioden={key}/part-*.parquet,
+    one directory per period, each file holding the full schema (including Perioden).
+    
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
+        endpoint: Endpoint name (e.g., "TypedDataSet")
+    
+    Returns:
+        Path: Path to the partition root directory
+    """
+    return get_data_file_path(dataset_id).parent / dataset_id / endpoint
+
+
+_PARTITION_OPERATORS = {
+    "==": lambda key, value: key == value,
+    "=": lambda key, value: key == value,
+    "!=": lambda key, value: key != value,
+    "<": lambda key, value: key < value,
+    "<=": lambda key, value: key <= value,
+    ">": lambda key, value: key > value,
+    ">=": lambda key, value: key >= value,
+    "in": lambda key, values: key in values,
+    "not in": lambda key, values: key not in values,
+}
+
+
+def list_partitions(partition_dir: Path, filters: Optional[List[Any]] = None) -> List[Path]:
+    """
+    List the partition files of an endpoint, skipping periods the filters rule out.
+    
+    Only conjunctive filters on Perioden (a flat list of tuples) prune partitions;
+    all filters are still applied to the rows that are read.
+    
+    Args:
+        partition_dir: Partition root from get_partition_dir()
+        filters: Row filters in pyarrow's filter format
+    
+    Returns:
+        List of parquet files, in period order
+    """
+    files = []
+    for period_dir in sorted(partition_dir.glob("Perioden=*")):
+        if _period_may_match(period_dir.name.split("=", 1)[1], filters):
+            files.extend(sorted(period_dir.glob("part-*.parquet")))
+    return files
+
+
+def _period_may_match(key: str, filters: Optional[List[Any]]) -> bool:
+    """Check whether the Perioden conditions of conjunctive filters allow the partition of period `key`."""
+    if not filters or not all(isinstance(f, tuple) for f in filters):
+        return True
+    return all(_PARTITION_OPERATORS[op](key, value) for column, op, value in filters
+               if column == "Perioden" and op in _PARTITION_OPERATORS)
+
+
+def get_local_data_file(dataset_id: str, endpoint: str = "",
+                        columns: Optional[List[str]] = None,
+                        filters: Optional[List[Any]] = None) -> "pd.DataFrame":
     """
     Load data from local data folder (local execution only).
     
+    A period-partitioned endpoint (see get_partition_dir) takes precedence over
+    the flat {id}_{endpoint}.parquet file and is read as one data set.
+    
     Args:
         dataset_id: Dataset ID (e.g., "85236NED")
         endpoint: Optional endpoint name (e.g., "TypedDataSet", "Bouwjaar")
+        columns: Only read these columns
+        filters: Only read matching rows (pyarrow filter format)
     
     Returns:
         pandas.DataFrame: The loaded data
     """
+    import pandas as pd
+
+    partition_dir = get_partition_dir(dataset_id, endpoint) if endpoint else None
+    if partition_dir is not None and partition_dir.is_dir():
+        return get_partitioned_data(partition_dir, columns=columns, filters=filters)
+
     data_file = get_data_file_path(dataset_id, endpoint)
     
     if not data_file.exists():
@@ -359,43 +2158,459 @@ def get_local_data_file(dataset_id: str, endpoint: str = "") -> pd.DataFrame:
             f"Please run 'uv run data_fetcher.py' to fetch the data first."
         )
     
-    try:
-        df = pd.read_parquet(data_file)
-        print(f"Loaded from local data: {data_file.name} ({len(df)} records)")
-        return df
-    except Exception as e:
-        raise Exception(f"Error loading data from {data_file}: {e}")
+    try:
+        with timer("parquet.read", source="local"), span("parquet.read", source="local", path=str(data_file)) as s:
+            df = pd.read_parquet(data_file, columns=columns, filters=filters)
+            s.set_attributes(rows=len(df), bytes=data_file.stat().st_size)
+        count("bytes.read", data_file.stat().st_size if _METRICS_ENABLED else 0, source="local")
+        count("rows.decoded", len(df), source="local")
+        print(f"Loaded from local data: {data_file.name} ({len(df)} records)")
+        return df
+    except Exception as e:
+        raise Exception(f"Error loading data from {data_file}: {e}")
+
+
+def get_partitioned_data(partition_dir: Path,
+                         columns: Optional[List[str]] = None,
+                         filters: Optional[List[Any]] = None) -> "pd.DataFrame":
+    """
+    Load a period-partitioned endpoint, reading only the partitions the filters allow.
+    
+    Args:
+        partition_dir: Partition root from get_partition_dir()
+        columns: Only read these columns
+        filters: Only read matching rows (pyarrow filter format)
+    
+    Returns:
+        pandas.DataFrame: The rows of all selected partitions
+    """
+    import pandas as pd
+
+    all_files = list_partitions(partition_dir)
+    if not all_files:
+        raise FileNotFoundError(
+            f"No partitions found in: {partition_dir}\n"
+            f"Please run 'uv run data_fetcher.py --partitioned' to fetch the data first."
+        )
+    files = list_partitions(partition_dir, filters)
+
+    try:
+        with timer("parquet.read", source="partitions"), \
+                span("parquet.read", source="partitions", path=str(partition_dir)) as s:
+            if files:
+                df = pd.concat([pd.read_parquet(f, columns=columns, filters=filters) for f in files],
+                               ignore_index=True)
+            else:
+                # Nothing matches: return the (empty) schema of any partition
+                df = pd.read_parquet(all_files[0], columns=columns).iloc[0:0]
+            size = sum(f.stat().st_size for f in files)
+            s.set_attributes(rows=len(df), bytes=size, partitions=len(files), partitions_total=len(all_files))
+        count("bytes.read", size, source="local")
+        count("rows.decoded", len(df), source="local")
+        print(f"Loaded from local data: {partition_dir} ({len(files)}/{len(all_files)} partitions, {len(df)} records)")
+        return df
+    except Exception as e:
+        raise Exception(f"Error loading data from {partition_dir}: {e}")
+
+
+# Remote parquet files are read with HTTP Range requests: the footer first,
+# then only the column chunks of the requested columns and row groups.
+# Chunks less than RANGE_COALESCE_BYTES apart are fetched in one request,
+# trading a few unneeded bytes for a round trip.
+RANGE_COALESCE_BYTES = 16 * 1024
+FOOTER_PREFETCH_BYTES = 64 * 1024
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """
+    Read-only, seekable file over HTTP that fetches the byte ranges that are read.
+    
+    Works with pyarrow.parquet (ParquetFile, read_table) in CPython and, through
+    the patched requests module, in Pyodide. Fetched ranges are kept, so the
+    footer is read once. A server that ignores Range headers answers with the
+    whole file, which is then kept and read from memory.
+    
+    Args:
+        url: URL of the file
+        timeout: Request timeout in seconds
+        retries: Number of retries per request for server errors and dropped connections
+        footer_bytes: Bytes fetched from the end of the file when it is opened,
+                      None to fetch the whole file in one request
+    """
+
+    def __init__(self, url: str, timeout: float = 60, retries: int = 2,
+                 footer_bytes: Optional[int] = FOOTER_PREFETCH_BYTES):
+        super().__init__()
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.position = 0
+        self.requests = 0
+        self.bytes_fetched = 0
+        self._segments: List[tuple] = []
+        self._lock = threading.Lock()
+
+        # The footer, and the file size from Content-Range
+        response = self._get(f"bytes=-{footer_bytes}" if footer_bytes else None)
+        if response.status_code == 206:
+            self.size = int(response.headers["Content-Range"].rsplit("/", 1)[1])
+            self._segments.append((self.size - len(response.content), response.content))
+        else:
+            self.size = len(response.content)
+            self._segments.append((0, response.content))
+
+    def _get(self, byte_range: Optional[str]) -> Any:
+        import requests
+
+        headers = {"Accept-Encoding": "identity"}
+        if byte_range:
+            headers["Range"] = byte_range
+        for attempt in range(self.retries + 1):
+            try:
+                with timer("http.get"), span("http.get", url=self.url, range=byte_range, attempt=attempt) as s:
+                    response = requests.get(self.url, timeout=self.timeout, headers=headers)
+                    s.set_attributes(status_code=response.status_code, bytes=len(response.content))
+                with self._lock:
+                    self.requests += 1
+                count("http.requests", source="cloud")
+                if response.status_code == 404:
+                    raise FileNotFoundError(f"Data file not found: {self.url}")
+                if response.status_code < 500 or attempt == self.retries:
+                    response.raise_for_status()
+                    with self._lock:
+                        self.bytes_fetched += len(response.content)
+                    count("bytes.read", len(response.content), source="cloud")
+                    return response
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError):
+                if attempt == self.retries:
+                    raise
+            count("http.retries")
+            time.sleep(2 ** attempt)
+
+    def _fetch(self, start: int, end: int) -> tuple:
+        """Fetch bytes start..end (exclusive) as a (start, bytes) segment."""
+        response = self._get(f"bytes={start}-{end - 1}")
+        content = response.content
+        if response.status_code != 206:
+            start = 0
+        elif len(content) != end - start:
+            raise IOError(f"Short read from {self.url}: {len(content)} of {end - start} bytes")
+        self._segments.append((start, content))
+        return start, content
+
+    def read_range(self, start: int, end: int) -> bytes:
+        """Read bytes start..end (exclusive), fetching the parts that weren't fetched yet."""
+        end = min(end, self.size)
+        parts = []
+        position = start
+        while position < end:
+            segment = next(((segment_start, content) for segment_start, content in self._segments
+                            if segment_start <= position < segment_start + len(content)), None)
+            if segment is None:
+                next_start = min((segment_start for segment_start, _ in self._segments
+                                  if segment_start > position), default=self.size)
+                segment = self._fetch(position, min(end, next_start))
+            segment_start, content = segment
+            part = content[position - segment_start:end - segment_start]
+            parts.append(part)
+            position += len(part)
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    def prefetch(self, ranges: List[tuple]) -> None:
+        """
+        Fetch byte ranges ahead of reading them, merging ranges less than RANGE_COALESCE_BYTES apart.
+        
+        The merged ranges are fetched concurrently (ASYNC_CONCURRENCY requests
+        at a time), except under Pyodide, which has no threads.
+        
+        Args:
+            ranges: (start, end) byte ranges, end exclusive
+        """
+        merged: List[List[int]] = []
+        for start, end in sorted(ranges):
+            if merged and start - merged[-1][1] <= RANGE_COALESCE_BYTES:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        # is_wasm() is pinned to False (data loads locally from cbs.zip), so check for Pyodide itself
+        if len(merged) < 2 or "pyodide" in sys.modules or sys.platform == "emscripten":
+            for start, end in merged:
+                self.read_range(start, end)
+            return
+
+        import concurrent.futures
+
+        with concurrent.futures.ThreadPoolExecutor(min(len(merged), ASYNC_CONCURRENCY)) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, self.read_range, start, end)
+                       for start, end in merged]
+            for future in futures:
+                future.result()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        else:
+            self.position = self.size + offset
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        end = self.size if size is None or size < 0 else self.position + size
+        data = self.read_range(self.position, end)
+        self.position += len(data)
+        return data
+
+    def readinto(self, buffer: Any) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+_ROW_GROUP_OPERATORS = {
+    "==": lambda low, high, value: low <= value <= high,
+    "=": lambda low, high, value: low <= value <= high,
+    "!=": lambda low, high, value: not (low == high == value),
+    "<": lambda low, high, value: low < value,
+    "<=": lambda low, high, value: low <= value,
+    ">": lambda low, high, value: high > value,
+    ">=": lambda low, high, value: high >= value,
+    "in": lambda low, high, values: any(low <= value <= high for value in values),
+    "not in": lambda low, high, values: not (low == high and low in values),
+}
+
+
+def _flatten_filters(filters: List[Any]) -> List[tuple]:
+    """All (column, op, value) conditions of a filter, conjunctive or disjunctive."""
+    if filters and isinstance(filters[0], tuple):
+        return list(filters)
+    return [condition for conjunction in filters for condition in conjunction]
+
+
+def _row_group_may_match(metadata: Any, row_group: int, filters: Optional[List[Any]]) -> bool:
+    """
+    Check a row group's min/max statistics against conjunctive filters.
+    
+    Disjunctive filters (lists of lists) and columns without statistics
+    never rule a row group out.
+    """
+    if not filters or not all(isinstance(f, tuple) for f in filters):
+        return True
+    group = metadata.row_group(row_group)
+    columns = {group.column(i).path_in_schema: group.column(i) for i in range(group.num_columns)}
+    for column, op, value in filters:
+        statistics = columns[column].statistics if column in columns else None
+        if op not in _ROW_GROUP_OPERATORS or statistics is None or not statistics.has_min_max:
+            continue
+        try:
+            if not _ROW_GROUP_OPERATORS[op](statistics.min, statistics.max, value):
+                return False
+        except TypeError:
+            # Statistics and value of different types
+            continue
+    return True
+
+
+def _column_chunk_ranges(metadata: Any, row_groups: List[int],
+                         columns: Optional[List[str]]) -> List[tuple]:
+    """Byte ranges (start, end) of the column chunks of some row groups and columns."""
+    ranges = []
+    for row_group in row_groups:
+        group = metadata.row_group(row_group)
+        for i in range(group.num_columns):
+            chunk = group.column(i)
+            if columns is not None and chunk.path_in_schema not in columns:
+                continue
+            start = chunk.data_page_offset
+            if chunk.has_dictionary_page and chunk.dictionary_page_offset:
+                start = min(start, chunk.dictionary_page_offset)
+            ranges.append((start, start + chunk.total_compressed_size))
+    return ranges
+
+
+def read_remote_parquet(url: str, columns: Optional[List[str]] = None,
+                        filters: Optional[List[Any]] = None) -> "pd.DataFrame":
+    """
+    Read a remote parquet file with HTTP Range requests.
+    
+    Only the footer and the column chunks of the requested columns are
+    downloaded, and row groups whose statistics rule out the filters are
+    skipped, so the file has to be published as plain .parquet (compressed
+    internally, not gzipped as a whole).
+    
+    The savings depend on the file's layout: a file written as a single row
+    group (as the committed data files are, until they are rewritten with
+    `data_fetcher.py --relayout`) is fetched whole for any filter, and only
+    column selection saves bytes.
+    
+    Args:
+        url: URL of the parquet file
+        columns: Only read these columns
+        filters: Only read matching rows (pyarrow filter format)
+    
+    Returns:
+        pandas.DataFrame: The data
+    """
+    import pyarrow.parquet as pq
+
+    with span("parquet.read_remote", url=url) as s:
+        # Without a selection every byte is needed: one request instead of footer + data
+        source = HTTPRangeFile(url, footer_bytes=FOOTER_PREFETCH_BYTES if columns or filters else None)
+        parquet_file = pq.ParquetFile(source)
+        row_groups = [i for i in range(parquet_file.num_row_groups)
+                      if _row_group_may_match(parquet_file.metadata, i, filters)]
+        read_columns = columns
+        if columns is not None and filters:
+            filter_columns = [column for column, _, _ in _flatten_filters(filters)]
+            read_columns = list(dict.fromkeys(list(columns) + filter_columns))
+        source.prefetch(_column_chunk_ranges(parquet_file.metadata, row_groups, read_columns))
+        table = parquet_file.read_row_groups(row_groups, columns=read_columns, use_pandas_metadata=True)
+        if filters:
+            table = table.filter(pq.filters_to_expression(filters))
+        if read_columns is not columns:
+            table = table.select(columns)
+        s.set_attributes(rows=table.num_rows, row_groups=len(row_groups), requests=source.requests,
+                         bytes=source.bytes_fetched, size=source.size)
+    return table.to_pandas()
+
+
+# Catalogs of published data folders by URL, fetched once per process: every
+# cloud load looks up whether its endpoint is published as period partitions
+_cloud_catalogs: Dict[str, Dict[str, Any]] = {}
+
+
+def get_cloud_catalog(base_url: str) -> Dict[str, Any]:
+    """
+    Get the catalog.json of a published data folder, fetched once per process.
+    
+    Args:
+        base_url: Base URL of the data folder
+    
+    Returns:
+        The catalog, empty if there is none (see load_catalog)
+    """
+    if base_url not in _cloud_catalogs:
+        _cloud_catalogs[base_url] = load_catalog(base_url)
+    return _cloud_catalogs[base_url]
+
+
+def get_cloud_partitions(catalog: Dict[str, Any], dataset_id: str, endpoint: str) -> Optional[List[str]]:
+    """
+    Get the published partition files of a period-partitioned endpoint.
+    
+    GitHub Pages can't list a folder, so data_fetcher.py lists the partition
+    files of an endpoint stored as partitions in the catalog.
+    
+    Args:
+        catalog: Catalog of the data folder (see get_cloud_catalog)
+        dataset_id: Dataset ID (e.g., "85236NED")
+        endpoint: Endpoint name (e.g., "TypedDataSet")
+    
+    Returns:
+        Paths relative to the data folder (e.g. "85236NED/TypedDataSet/Perioden=2023JJ00/part-1a2b.parquet"),
+        or None if the endpoint is published as one {id}_{endpoint}.parquet file
+    """
+    return catalog.get(dataset_id, {}).get("endpoints", {}).get(endpoint, {}).get("partitions")
+
+
+def _partition_period(path: str) -> str:
+    """Period key of a partition file path (.../Perioden={key}/part-*.parquet)."""
+    return path.rsplit("/", 2)[-2].split("=", 1)[1]
+
+
+def read_remote_partitions(base_url: str, paths: List[str],
+                           columns: Optional[List[str]] = None,
+                           filters: Optional[List[Any]] = None) -> "pd.DataFrame":
+    """
+    Read published period partitions as one data set, skipping the periods the filters rule out.
+    
+    Args:
+        base_url: Base URL of the data folder
+        paths: All partition files of the endpoint (see get_cloud_partitions)
+        columns: Only read these columns
+        filters: Only read matching rows (pyarrow filter format)
+    
+    Returns:
+        pandas.DataFrame: The rows of all selected partitions
+    """
+    import pandas as pd
+
+    selected = [path for path in paths if _period_may_match(_partition_period(path), filters)]
+    # Nothing matches: the first partition still gives the (empty) schema
+    frames = [read_remote_parquet(f"{base_url}{path}", columns=columns, filters=filters)
+              for path in selected or paths[:1]]
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
 
 
 def get_cloud_data(dataset_id: str, endpoint: str = "", 
-                   base_url: str = "https://mark-climateview.github.io/data-playbook-marimo-poc1/data/") -> pd.DataFrame:
+                   base_url: str = "https://mark-climateview.github.io/data-playbook-marimo-poc1/data/",
+                   columns: Optional[List[str]] = None,
+                   filters: Optional[List[Any]] = None) -> "pd.DataFrame":
     """
     Load data from GitHub Pages (cloud execution only).
     
+    The file is read with HTTP Range requests (see read_remote_parquet), so
+    selecting columns or filtering on the sort keys (e.g. Perioden) only
+    downloads the column chunks and row groups that are needed. An endpoint
+    the catalog lists as period partitions is read from the partitions of the
+    periods the filters allow (see read_remote_partitions).
+    
     Args:
         dataset_id: Dataset ID (e.g., "85236NED")
         endpoint: Optional endpoint name (e.g., "TypedDataSet", "Bouwjaar")
         base_url: Base URL for the GitHub Pages data hosting
+        columns: Only read these columns
+        filters: Only read matching rows (pyarrow filter format)
+    
+    Concurrent calls for the same file share one download (see SingleFlight).
     
     Returns:
         pandas.DataFrame: The loaded data
+    
+    Raises:
+        FileNotFoundError: If the server has no such file (HTTP 404)
+        Exception: If there's an error loading the data
     """
     # Construct filename
     if endpoint:
-        filename = f"{dataset_id}_{endpoint}.parquet.gz"
+        filename = f"{dataset_id}_{endpoint}.parquet"
     else:
-        filename = f"{dataset_id}.parquet.gz"
+        filename = f"{dataset_id}.parquet"
     
     # Construct full URL
     data_url = f"{base_url}{filename}"
     
-    try:
-        print(f"Loading from GitHub Pages: {data_url}")
-        df = pd.read_parquet(data_url)
-        print(f"Loaded from cloud data: {filename} ({len(df)} records)")
-        return df
-    except Exception as e:
-        raise Exception(f"Error loading data from {data_url}: {e}")
+    def load():
+        try:
+            partitions = get_cloud_partitions(get_cloud_catalog(base_url), dataset_id, endpoint) if endpoint else None
+            source_url = data_url if partitions is None else f"{base_url}{dataset_id}/{endpoint}/"
+            print(f"Loading from GitHub Pages: {source_url}")
+            with timer("parquet.read", source="cloud"), span("parquet.read", source="cloud", url=source_url) as s:
+                if partitions is None:
+                    df = read_remote_parquet(data_url, columns=columns, filters=filters)
+                else:
+                    df = read_remote_partitions(base_url, partitions, columns=columns, filters=filters)
+                s.set_attribute("rows", len(df))
+            count("rows.decoded", len(df), source="cloud")
+            print(f"Loaded from cloud data: {filename} ({len(df)} records)")
+            return df
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error loading data from {data_url}: {e}")
+
+    key = _data_key("cloud", dataset_id, endpoint, columns, filters)
+    return _single_flight.do((base_url, key), load, share=_share_frame, name=key)
 
 
 def list_available_data() -> List[Dict[str, Any]]:
@@ -421,13 +2636,13 @@ def list_local_data() -> List[Dict[str, Any]]:
     # Use marimo notebook directory if available
     if _MARIMO_AVAILABLE:
         try:
-            base_dir = mo.notebook_dir()
+            base_dir = _marimo().notebook_dir()
         except:
             base_dir = Path.cwd()
     else:
         base_dir = Path.cwd()
     
-    data_dir = base_dir / "data"
+    data_dir = base_dir / (os.environ.get("PLAYBOOK_DATA_DIR") or "data")
     
     if not data_dir.exists():
         return []
@@ -445,12 +2660,40 @@ def list_local_data() -> List[Dict[str, Any]]:
     return sorted(files, key=lambda x: x["filename"])
 
 
+def load_catalog(base_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load the catalog of fetched CBS tables (catalog.json, written by data_fetcher.py).
+    
+    The catalog maps each table id to its name and endpoints, e.g.
+    {"85236NED": {"name": ..., "endpoints": {"RegioS": {"rows": 4678, "size": "small"}, ...}}}.
+    
+    Args:
+        base_url: Data folder URL to load the catalog from, or None for the local data folder
+    
+    Returns:
+        The catalog, empty if there is none
+    """
+    import json
+
+    try:
+        if base_url is None:
+            path = get_data_file_path("catalog").with_suffix(".json")
+            return json.loads(path.read_text()) if path.exists() else {}
+        import requests
+        response = requests.get(f"{base_url}catalog.json", timeout=10)
+        return response.json() if response.status_code == 200 else {}
+    except Exception:
+        # Unreadable file or network error
+        return {}
+
+
 def list_cloud_data(base_url: str = "https://mark-climateview.github.io/data-playbook-marimo-poc1/data/") -> List[Dict[str, Any]]:
     """
     List available data files from GitHub Pages (cloud execution only).
     
-    Note: This function attempts to check common dataset files since we can't
-    easily list directory contents from GitHub Pages.
+    GitHub Pages can't list directory contents, so the tables, endpoints and
+    period partitions come from the published catalog.json and every file is
+    checked with a HEAD request.
     
     Args:
         base_url: Base URL for the GitHub Pages data hosting
@@ -458,24 +2701,17 @@ def list_cloud_data(base_url: str = "https://mark-climateview.github.io/data-pla
     Returns:
         List of available data files with environment info
     """
-    # Common datasets to check
-    common_datasets = [
-        "85236NED",
-        "85237NED", 
-        "85405NED"
-    ]
-    
-    # Common endpoints to check
-    common_endpoints = ["", "DataProperties", "Perioden", "TypedDataSet", "Bouwjaar"]
+    import requests
+
+    catalog = load_catalog(base_url)
     
     files = []
-    for dataset in common_datasets:
-        for endpoint in common_endpoints:
-            if endpoint:
-                filename = f"{dataset}_{endpoint}.parquet"
-            else:
-                filename = f"{dataset}.parquet"
-            
+    for dataset, entry in catalog.items():
+        filenames = [f"{dataset}.parquet"]
+        for endpoint in entry.get("endpoints", {}):
+            partitions = get_cloud_partitions(catalog, dataset, endpoint)
+            filenames += [f"{dataset}_{endpoint}.parquet"] if partitions is None else partitions
+        for filename in filenames:
             data_url = f"{base_url}{filename}"
             
             # Try to check if file exists (quick HEAD request)
@@ -497,92 +2733,757 @@ def list_cloud_data(base_url: str = "https://mark-climateview.github.io/data-pla
     return sorted(files, key=lambda x: x["filename"])
 
 
-def get_cbs_url(url: str, force_refresh: bool = False) -> pd.DataFrame:
+def _decode_json(content: bytes) -> Any:
+    """Decode a JSON body, with orjson when it is installed (3-4x faster than the json module)."""
+    if _ORJSON_AVAILABLE:
+        import orjson
+        return orjson.loads(content)
+    import json
+    return json.loads(content)
+
+
+def _rows_to_page(rows: List[Dict[str, Any]]) -> Any:
+    """
+    Convert the rows of an OData response to a column-oriented page right away.
+    
+    A pyarrow Table keeps one array per column instead of a dict per row, so
+    a paginated fetch holds a fraction of the memory until the final DataFrame
+    is built. Without pyarrow, or for rows it can't type, this falls back to
+    a pandas DataFrame.
+    """
+    try:
+        import pyarrow as pa
+        return pa.Table.from_pylist(rows)
+    except Exception:
+        import pandas as pd
+        return pd.DataFrame(rows)
+
+
+def _pages_to_frame(pages: List[Any]) -> "pd.DataFrame":
+    """Concatenate the pages of _rows_to_page into one DataFrame."""
+    import pandas as pd
+
+    if not pages:
+        return pd.DataFrame()
+    if all(not isinstance(page, pd.DataFrame) for page in pages):
+        import pyarrow as pa
+        try:
+            table = pa.concat_tables(pages, promote_options="permissive")
+        except (TypeError, pa.ArrowInvalid):
+            table = None
+        if table is not None:
+            return table.to_pandas()
+    frames = [page if isinstance(page, pd.DataFrame) else page.to_pandas() for page in pages]
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def _fetch_json(url: str, retries: int = 3, backoff: float = 1.0, timeout: float = 60) -> Any:
+    """
+    GET a CBS OData URL and decode its JSON body, retrying transient failures.
+    
+    Throttled (429) and server error (5xx) responses are retried after the
+    Retry-After header, or an exponential backoff when it is missing. Dropped
+    connections and truncated bodies are retried with the same backoff.
+    
+    Args:
+        url: CBS OData API URL
+        retries: Number of retries after the first attempt
+        backoff: Initial backoff in seconds, doubled after every attempt
+        timeout: Request timeout in seconds
+    
+    Returns:
+        The decoded JSON document
+    
+    Raises:
+        requests.HTTPError: If the server keeps failing or returns another error status
+        requests.RequestException, ValueError: If the body stays unreadable after all retries
+    """
+    import requests
+
+    for attempt in range(retries + 1):
+        delay = backoff * 2 ** attempt
+        try:
+            with timer("http.get"), span("http.get", url=url, attempt=attempt) as s:
+                response = requests.get(url, timeout=timeout)
+                s.set_attributes(status_code=response.status_code, bytes=len(response.content))
+            count("http.requests", source="odata")
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == retries:
+                    response.raise_for_status()
+                retry_after = response.headers.get("Retry-After", "")
+                try:
+                    delay = float(retry_after)
+                except ValueError:
+                    pass
+                print(f"  HTTP {response.status_code}, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+            else:
+                response.raise_for_status()
+                count("bytes.read", len(response.content), source="odata")
+                with timer("json.decode"):
+                    return _decode_json(response.content)
+        except (requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError, ValueError) as e:
+            if attempt == retries:
+                raise
+            print(f"  {type(e).__name__}, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+        count("http.retries")
+        time.sleep(delay)
+
+
+def get_cbs_url(url: str, force_refresh: bool = False, retries: int = 3) -> "pd.DataFrame":
     """
     Fetch data from CBS API URL and return as DataFrame.
     
     Args:
         url: CBS OData API URL
         force_refresh: Whether to ignore cache (not used in this simple implementation)
+        retries: Number of retries for throttled, failed or truncated responses
     
     Returns:
         pandas.DataFrame: The fetched data
     """
+    import pandas as pd
+
     try:
         print(f"Fetching: {url}")
-        response = requests.get(url, timeout=60)
-        response.raise_for_status()
-        
-        data = response.json()
-        if 'value' in data:
-            return pd.DataFrame(data['value'])
-        else:
-            return pd.DataFrame(data)
+        with timer("get_cbs_url"), span("get_cbs_url", url=url) as s:
+            data = _fetch_json(url, retries=retries)
+            df = _pages_to_frame([_rows_to_page(data['value'])]) if 'value' in data else pd.DataFrame(data)
+            s.set_attribute("rows", len(df))
+        count("rows.decoded", len(df), source="odata")
+        return df
             
     except Exception as e:
         print(f"Error fetching {url}: {e}")
         return pd.DataFrame()
 
 
-def get_cbs_url_paginated(url: str, force_refresh: bool = False, max_pages: int = 100, page_size: int = 5000) -> pd.DataFrame:
+def _count_url(url: str) -> str:
+    """The $count URL of an OData endpoint URL, keeping its query options."""
+    path, _, query = url.partition("?")
+    return f"{path.rstrip('/')}/$count" + (f"?{query}" if query else "")
+
+
+def get_cbs_count(url: str, retries: int = 3) -> int:
+    """
+    Get the number of rows of a CBS OData endpoint without fetching them ($count).
+    
+    Args:
+        url: CBS OData API endpoint URL, optionally with a $filter
+        retries: Number of retries for throttled, failed or truncated responses
+    
+    Returns:
+        int: The number of (matching) rows
+    
+    Raises:
+        requests.HTTPError: If the endpoint doesn't exist
+    """
+    return int(_fetch_json(_count_url(url), retries=retries))
+
+
+def odata_query_url(url: str, select: Optional[List[str]] = None, filter: Optional[str] = None) -> str:
+    """
+    Add $select and $filter query options to an OData URL.
+    
+    Args:
+        url: CBS OData API URL
+        select: Only return these columns (e.g. ["ID", "RegioS", "Perioden", "Personenauto_2"])
+        filter: Only return matching rows (e.g. "startswith(RegioS,'GM')")
+    
+    Returns:
+        str: The URL with the query options
+    """
+    options = []
+    if select:
+        options.append(f"$select={','.join(select)}")
+    if filter:
+        options.append(f"$filter={filter}")
+    if not options:
+        return url
+    separator = '&' if '?' in url else '?'
+    return f"{url}{separator}{'&'.join(options)}"
+
+
+# Checkpoints of paginated fetches older than this are discarded instead of resumed
+CHECKPOINT_MAX_AGE_HOURS = 24
+
+
+class PageCheckpoint:
+    """
+    Completed pages of a paginated fetch, persisted so an interrupted fetch resumes where it stopped.
+    
+    Every page is written to its own parquet fragment as soon as it arrives and
+    state.json records the fetched pages, so a failed fetch only has to redo
+    the page it failed on. A checkpoint belongs to one URL and page size and is
+    discarded when either differs or it is older than CHECKPOINT_MAX_AGE_HOURS.
+    The caller removes it with clear() once the data is published.
+    """
+
+    def __init__(self, directory: Path, url: str, page_size: int):
+        self.directory = Path(directory)
+        self.url = url
+        self.page_size = page_size
+        self.state = {"url": url, "page_size": page_size, "started": time.time(), "pages": [], "complete": False}
+
+    @property
+    def rows(self) -> int:
+        """Number of rows in the saved pages."""
+        return sum(page["rows"] for page in self.state["pages"])
+
+    @property
+    def complete(self) -> bool:
+        """Whether the last page has been saved."""
+        return self.state["complete"]
+
+    def load(self) -> List[Any]:
+        """
+        Load the saved pages of an earlier attempt.
+        
+        Returns:
+            List of pyarrow Tables, empty if there is no usable checkpoint
+        """
+        import json
+
+        state_file = self.directory / "state.json"
+        if not state_file.exists():
+            return []
+        try:
+            state = json.loads(state_file.read_text())
+            usable = (state["url"] == self.url and state["page_size"] == self.page_size
+                      and time.time() - state["started"] < CHECKPOINT_MAX_AGE_HOURS * 3600)
+            if not usable:
+                self.clear()
+                return []
+            import pyarrow.parquet as pq
+            pages = [pq.read_table(self.directory / page["file"]) for page in state["pages"]]
+        except Exception as e:
+            print(f"Discarding unreadable checkpoint {self.directory}: {e}")
+            self.clear()
+            return []
+        self.state = state
+        return pages
+
+    def save(self, page: Any, rows: int, last: bool = False) -> None:
+        """
+        Save a fetched page (a pyarrow Table or pandas DataFrame).
+        
+        Args:
+            page: The page, as returned by _rows_to_page
+            rows: Number of rows in the page
+            last: Whether this is the last page of the fetch
+        """
+        import json
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        table = page if isinstance(page, pa.Table) else pa.Table.from_pandas(page, preserve_index=False)
+        filename = f"page-{len(self.state['pages']):05d}.parquet"
+        pq.write_table(table, self.directory / f"{filename}.tmp")
+        (self.directory / f"{filename}.tmp").replace(self.directory / filename)
+
+        self.state["pages"].append({"file": filename, "rows": rows})
+        self.state["complete"] = last
+        self._write_state(json.dumps(self.state))
+
+    def finish(self) -> None:
+        """Mark the fetch complete (the last page was full or no further rows exist)."""
+        import json
+
+        if self.state["pages"] and not self.state["complete"]:
+            self.state["complete"] = True
+            self._write_state(json.dumps(self.state))
+
+    def clear(self) -> None:
+        """Remove the checkpoint."""
+        import shutil
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.state = {"url": self.url, "page_size": self.page_size, "started": time.time(),
+                      "pages": [], "complete": False}
+
+    def _write_state(self, text: str) -> None:
+        state_file = self.directory / "state.json"
+        (self.directory / "state.json.tmp").write_text(text)
+        (self.directory / "state.json.tmp").replace(state_file)
+
+
+@timed("get_cbs_url_paginated")
+def get_cbs_url_paginated(url: str, force_refresh: bool = False, max_pages: int = 100, page_size: int = 5000,
+                          page_delay: float = 0.5, retries: int = 3,
+                          select: Optional[List[str]] = None, filter: Optional[str] = None,
+                          checkpoint_dir: Optional[Path] = None) -> "pd.DataFrame":
     """
     Fetch paginated data from CBS API URL and return as DataFrame.
     
+    On errors the pages fetched so far are returned, so compare the row count
+    with get_cbs_count() before trusting the result. With a checkpoint_dir,
+    fetched pages are also saved there (see PageCheckpoint) and a later call
+    with the same arguments continues after the last saved page.
+    
     Args:
         url: CBS OData API URL
         force_refresh: Whether to ignore cache (not used in this simple implementation)
         max_pages: Maximum number of pages to fetch
         page_size: Number of records per page (max 10000, recommended 5000)
+        page_delay: Seconds to wait between pages, to stay below the CBS rate limits
+        retries: Number of retries per page for throttled, failed or truncated responses
+        select: Only fetch these columns (OData $select), evaluated by the server
+        filter: Only fetch matching rows (OData $filter), evaluated by the server
+        checkpoint_dir: Directory to save the fetched pages in, to resume an interrupted fetch
     
     Returns:
         pandas.DataFrame: The combined paginated data
     """
-    all_data = []
-    page_count = 0
-    skip = 0
-    
-    try:
-        while page_count < max_pages:
-            # Add OData pagination parameters
-            separator = '&' if '?' in url else '?'
-            current_url = f"{url}{separator}$skip={skip}&$top={page_size}"
-            
-            print(f"Fetching page {page_count + 1}: {current_url}")
-            response = requests.get(current_url, timeout=60)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if 'value' in data and data['value']:
-                page_data = data['value']
-                all_data.extend(page_data)
-                page_count += 1
-                skip += len(page_data)
+    import pandas as pd
+
+    url = odata_query_url(url, select, filter)
+    checkpoint = PageCheckpoint(checkpoint_dir, url, page_size) if checkpoint_dir is not None else None
+    pages = checkpoint.load() if checkpoint is not None else []
+    total_rows = sum(page.num_rows for page in pages)
+    page_count = len(pages)
+    skip = total_rows
+    if pages:
+        print(f"Resuming from checkpoint: {page_count} pages, {total_rows} records")
+        count("checkpoint.resumed_pages", page_count)
+    
+    with span("get_cbs_url_paginated", url=url, page_size=page_size, resumed_pages=page_count) as s:
+        try:
+            while page_count < max_pages and not (checkpoint is not None and checkpoint.complete):
+                # Add OData pagination parameters
+                separator = '&' if '?' in url else '?'
+                current_url = f"{url}{separator}$skip={skip}&$top={page_size}"
                 
-                # If we got fewer records than requested, we've reached the end
-                if len(page_data) < page_size:
-                    break
+                print(f"Fetching page {page_count + 1}: {current_url}")
+                with timer("get_cbs_url_paginated.page"), span("get_cbs_url.page", url=current_url, page=page_count + 1):
+                    data = _fetch_json(current_url, retries=retries)
                 
-                # Small delay between requests
-                time.sleep(0.5)
+                if 'value' in data and data['value']:
+                    page_data = data['value']
+                    with timer("get_cbs_url_paginated.decode"):
+                        pages.append(_rows_to_page(page_data))
+                    total_rows += len(page_data)
+                    page_count += 1
+                    skip += len(page_data)
+                    
+                    # If we got fewer records than requested, we've reached the end
+                    last = len(page_data) < page_size
+                    if checkpoint is not None:
+                        checkpoint.save(pages[-1], len(page_data), last=last)
+                    if last:
+                        break
+                    
+                    # Small delay between requests
+                    time.sleep(page_delay)
+                else:
+                    if checkpoint is not None:
+                        checkpoint.finish()
+                    break
+            
+            s.set_attributes(rows=total_rows, pages=page_count)
+            if pages:
+                print(f"Fetched {total_rows} total records across {page_count} pages")
+                count("rows.decoded", total_rows, source="odata")
+                return _pages_to_frame(pages)
             else:
-                break
-        
-        if all_data:
-            print(f"Fetched {len(all_data)} total records across {page_count} pages")
-            return pd.DataFrame(all_data)
-        else:
-            print("No data found")
+                print("No data found")
+                return pd.DataFrame()
+                
+        except Exception as e:
+            print(f"Error fetching paginated data from {url}: {e}")
+            s.set_attributes(rows=total_rows, pages=page_count, error=f"{type(e).__name__}: {e}")
+            if pages:
+                print(f"Returning partial data: {total_rows} records")
+                return _pages_to_frame(pages)
             return pd.DataFrame()
-            
+
+
+# ---------------------------------------------------------------------------
+# Async fetching
+#
+# aget_cbs_url, aget_cbs_url_paginated and aget_cloud_data mirror their
+# blocking counterparts on top of one async transport: pyfetch under Pyodide,
+# httpx when it is installed, and requests in worker threads otherwise. A
+# semaphore per event loop bounds the number of requests in flight.
+# ---------------------------------------------------------------------------
+
+# Maximum number of concurrent requests per event loop (see set_async_concurrency)
+ASYNC_CONCURRENCY = 8
+
+_async_semaphores: Dict[Any, Any] = {}
+_async_transport = None
+
+
+class HTTPStatusError(Exception):
+    """An HTTP error status returned to the async fetch functions."""
+
+    def __init__(self, status_code: int, url: str):
+        super().__init__(f"HTTP {status_code} for url: {url}")
+        self.status_code = status_code
+        self.url = url
+
+
+class AsyncResponse:
+    """Status, headers and body of a response from an async transport."""
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+
+class PyfetchTransport:
+    """Async transport on Pyodide's pyfetch (the browser's fetch API)."""
+
+    name = "pyfetch"
+    transient_errors = (OSError,)
+
+    async def get(self, url: str, timeout: float) -> AsyncResponse:
+        import asyncio
+        from pyodide.http import pyfetch
+
+        response = await asyncio.wait_for(pyfetch(url), timeout)
+        content = await response.bytes()
+        return AsyncResponse(response.status, dict(response.headers), content)
+
+
+class HttpxTransport:
+    """Async transport on httpx, with one connection pool per event loop."""
+
+    name = "httpx"
+
+    def __init__(self):
+        import httpx
+        self.transient_errors = (httpx.TransportError,)
+        self._clients = {}
+
+    async def get(self, url: str, timeout: float) -> AsyncResponse:
+        import asyncio
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            # Drop the pools of finished loops
+            self._clients = {l: c for l, c in self._clients.items() if not l.is_closed()}
+            client = self._clients[loop] = httpx.AsyncClient()
+        response = await client.get(url, timeout=timeout)
+        return AsyncResponse(response.status_code, dict(response.headers), response.content)
+
+
+class ThreadTransport:
+    """
+    Async transport running blocking requests calls in worker threads.
+    
+    Used under CPython when httpx isn't installed; the semaphore still bounds
+    the concurrency, but every request in flight takes a thread.
+    """
+
+    name = "requests"
+
+    def __init__(self):
+        import requests
+        self.transient_errors = (requests.ConnectionError, requests.Timeout,
+                                 requests.exceptions.ChunkedEncodingError)
+
+    async def get(self, url: str, timeout: float) -> AsyncResponse:
+        import asyncio
+        import requests
+
+        response = await asyncio.to_thread(requests.get, url, timeout=timeout)
+        return AsyncResponse(response.status_code, dict(response.headers), response.content)
+
+
+def get_async_transport():
+    """
+    Get the async transport of this runtime (created on first use).
+    
+    Returns:
+        PyfetchTransport under Pyodide, HttpxTransport when httpx is installed,
+        ThreadTransport otherwise
+    """
+    global _async_transport
+    if _async_transport is None:
+        if "pyodide" in sys.modules or sys.platform == "emscripten":
+            _async_transport = PyfetchTransport()
+        elif importlib.util.find_spec("httpx") is not None:
+            _async_transport = HttpxTransport()
+        else:
+            _async_transport = ThreadTransport()
+    return _async_transport
+
+
+def set_async_transport(transport: Any) -> None:
+    """Use another async transport (any object with name, transient_errors and an async get(url, timeout))."""
+    global _async_transport
+    _async_transport = transport
+
+
+def set_async_concurrency(limit: int) -> None:
+    """Set the maximum number of concurrent requests of the async fetch functions."""
+    global ASYNC_CONCURRENCY
+    ASYNC_CONCURRENCY = limit
+    _async_semaphores.clear()
+
+
+def _async_semaphore():
+    """The request semaphore of the running event loop."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    semaphore = _async_semaphores.get(loop)
+    if semaphore is None:
+        for other in [l for l in _async_semaphores if l.is_closed()]:
+            del _async_semaphores[other]
+        semaphore = _async_semaphores[loop] = asyncio.Semaphore(ASYNC_CONCURRENCY)
+    return semaphore
+
+
+async def _aget(url: str, retries: int = 3, backoff: float = 1.0, timeout: float = 60) -> AsyncResponse:
+    """
+    GET a URL through the async transport, retrying transient failures like _fetch_json.
+    
+    Args:
+        url: URL to fetch
+        retries: Number of retries after the first attempt
+        backoff: Initial backoff in seconds, doubled after every attempt
+        timeout: Request timeout in seconds
+    
+    Returns:
+        AsyncResponse: The successful response
+    
+    Raises:
+        HTTPStatusError: If the server keeps failing or returns another error status
+    """
+    import asyncio
+
+    transport = get_async_transport()
+    for attempt in range(retries + 1):
+        delay = backoff * 2 ** attempt
+        try:
+            async with _async_semaphore():
+                with timer("http.get"), span("http.get", url=url, attempt=attempt, transport=transport.name) as s:
+                    response = await transport.get(url, timeout)
+                    s.set_attributes(status_code=response.status_code, bytes=len(response.content))
+            count("http.requests", source="odata")
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == retries:
+                    raise HTTPStatusError(response.status_code, url)
+                try:
+                    delay = float(response.headers.get("Retry-After", response.headers.get("retry-after", "")))
+                except ValueError:
+                    pass
+                print(f"  HTTP {response.status_code}, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+            elif response.status_code >= 400:
+                raise HTTPStatusError(response.status_code, url)
+            else:
+                count("bytes.read", len(response.content), source="odata")
+                return response
+        except (asyncio.TimeoutError,) + tuple(transport.transient_errors) as e:
+            if attempt == retries:
+                raise
+            print(f"  {type(e).__name__}, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+        count("http.retries")
+        await asyncio.sleep(delay)
+
+
+async def _afetch_json(url: str, retries: int = 3, backoff: float = 1.0, timeout: float = 60) -> Any:
+    """Async _fetch_json: GET a CBS OData URL and decode its JSON body, retrying truncated bodies too."""
+    for attempt in range(retries + 1):
+        response = await _aget(url, retries=retries, backoff=backoff, timeout=timeout)
+        try:
+            with timer("json.decode"):
+                return _decode_json(response.content)
+        except ValueError as e:
+            if attempt == retries:
+                raise
+            print(f"  {type(e).__name__}, retrying ({attempt + 1}/{retries})")
+            count("http.retries")
+
+
+async def aget_cbs_url(url: str, retries: int = 3) -> "pd.DataFrame":
+    """
+    Fetch data from CBS API URL and return as DataFrame (async get_cbs_url).
+    
+    Args:
+        url: CBS OData API URL
+        retries: Number of retries for throttled, failed or truncated responses
+    
+    Returns:
+        pandas.DataFrame: The fetched data, empty on errors
+    """
+    import pandas as pd
+
+    try:
+        print(f"Fetching: {url}")
+        with timer("get_cbs_url"), span("get_cbs_url", url=url) as s:
+            data = await _afetch_json(url, retries=retries)
+            df = _pages_to_frame([_rows_to_page(data['value'])]) if 'value' in data else pd.DataFrame(data)
+            s.set_attribute("rows", len(df))
+        count("rows.decoded", len(df), source="odata")
+        return df
+
     except Exception as e:
-        print(f"Error fetching paginated data from {url}: {e}")
-        if all_data:
-            print(f"Returning partial data: {len(all_data)} records")
-            return pd.DataFrame(all_data)
+        print(f"Error fetching {url}: {e}")
         return pd.DataFrame()
 
 
+async def aget_cbs_url_paginated(url: str, max_pages: int = 100, page_size: int = 5000, retries: int = 3,
+                                 select: Optional[List[str]] = None,
+                                 filter: Optional[str] = None) -> "pd.DataFrame":
+    """
+    Fetch paginated data from CBS API URL and return as DataFrame (async get_cbs_url_paginated).
+    
+    The number of rows is asked first ($count), so all pages can be requested
+    at once; the async concurrency limit keeps the load on the server bounded.
+    Without a $count, pages are fetched one after the other.
+    
+    Args:
+        url: CBS OData API URL
+        max_pages: Maximum number of pages to fetch
+        page_size: Number of records per page (max 10000, recommended 5000)
+        retries: Number of retries per page for throttled, failed or truncated responses
+        select: Only fetch these columns (OData $select), evaluated by the server
+        filter: Only fetch matching rows (OData $filter), evaluated by the server
+    
+    Returns:
+        pandas.DataFrame: The combined paginated data; the pages before the
+        first failed one if a page can't be fetched
+    """
+    import asyncio
+
+    url = odata_query_url(url, select, filter)
+    separator = '&' if '?' in url else '?'
+
+    async def fetch_page(page):
+        page_url = f"{url}{separator}$skip={page * page_size}&$top={page_size}"
+        print(f"Fetching page {page + 1}: {page_url}")
+        with timer("get_cbs_url_paginated.page"), span("get_cbs_url.page", url=page_url, page=page + 1):
+            data = await _afetch_json(page_url, retries=retries)
+        rows = data.get('value') or []
+        with timer("get_cbs_url_paginated.decode"):
+            return (_rows_to_page(rows) if rows else None), len(rows)
+
+    with timer("get_cbs_url_paginated"), span("get_cbs_url_paginated", url=url, page_size=page_size) as s:
+        pages = []
+        total_rows = 0
+        error = None
+        try:
+            total = int(await _afetch_json(_count_url(url), retries=retries))
+        except Exception:
+            total = None
+
+        if total is not None:
+            num_pages = min(max_pages, -(-total // page_size))
+            results = await asyncio.gather(*[fetch_page(page) for page in range(num_pages)],
+                                           return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    error = result
+                    break
+                page, rows = result
+                if page is not None:
+                    pages.append(page)
+                    total_rows += rows
+        else:
+            try:
+                for page_number in range(max_pages):
+                    page, rows = await fetch_page(page_number)
+                    if page is not None:
+                        pages.append(page)
+                        total_rows += rows
+                    if rows < page_size:
+                        break
+            except Exception as e:
+                error = e
+
+        s.set_attributes(rows=total_rows, pages=len(pages), concurrent=total is not None)
+        if error is not None:
+            print(f"Error fetching paginated data from {url}: {error}")
+            s.set_attribute("error", f"{type(error).__name__}: {error}")
+            if pages:
+                print(f"Returning partial data: {total_rows} records")
+        elif pages:
+            print(f"Fetched {total_rows} total records across {len(pages)} pages")
+        else:
+            print("No data found")
+        count("rows.decoded", total_rows, source="odata")
+        return _pages_to_frame(pages)
+
+
+async def _aget_cloud_catalog(base_url: str) -> Dict[str, Any]:
+    """get_cloud_catalog through the async transport (empty if there is no catalog)."""
+    if base_url not in _cloud_catalogs:
+        try:
+            _cloud_catalogs[base_url] = _decode_json((await _aget(f"{base_url}catalog.json")).content)
+        except Exception:
+            _cloud_catalogs[base_url] = {}
+    return _cloud_catalogs[base_url]
+
+
+async def aget_cloud_data(dataset_id: str, endpoint: str = "",
+                          base_url: str = "https://mark-climateview.github.io/data-playbook-marimo-poc1/data/",
+                          columns: Optional[List[str]] = None,
+                          filters: Optional[List[Any]] = None) -> "pd.DataFrame":
+    """
+    Load data from GitHub Pages (async get_cloud_data).
+    
+    Several files can be loaded at once, e.g.
+    await asyncio.gather(aget_cloud_data("85236NED", "TypedDataSet"), aget_cloud_data("85236NED", "RegioS")).
+    Concurrent loads of the same file share one download (see SingleFlight).
+    An endpoint the catalog lists as period partitions is read from the
+    partitions of the periods the filters allow, downloaded concurrently.
+    
+    Args:
+        dataset_id: Dataset ID (e.g., "85236NED")
+        endpoint: Optional endpoint name (e.g., "TypedDataSet", "Bouwjaar")
+        base_url: Base URL for the GitHub Pages data hosting
+        columns: Only read these columns
+        filters: Only read matching rows (pyarrow filter format)
+    
+    Returns:
+        pandas.DataFrame: The loaded data
+    """
+    import asyncio
+    import gzip
+    import io
+    import pandas as pd
+
+    filename = f"{dataset_id}_{endpoint}.parquet" if endpoint else f"{dataset_id}.parquet"
+    data_url = f"{base_url}{filename}"
+
+    async def read(url):
+        content = (await _aget(url)).content
+        if content[:2] == b"\x1f\x8b":
+            content = gzip.decompress(content)
+        return pd.read_parquet(io.BytesIO(content), columns=columns, filters=filters)
+
+    async def load():
+        try:
+            partitions = get_cloud_partitions(await _aget_cloud_catalog(base_url), dataset_id, endpoint) if endpoint else None
+            source_url = data_url if partitions is None else f"{base_url}{dataset_id}/{endpoint}/"
+            print(f"Loading from GitHub Pages: {source_url}")
+            with timer("parquet.read", source="cloud"), span("parquet.read", source="cloud", url=source_url) as s:
+                if partitions is None:
+                    df = await read(data_url)
+                else:
+                    # As read_remote_partitions: the first partition gives the schema if nothing matches
+                    selected = [path for path in partitions if _period_may_match(_partition_period(path), filters)]
+                    frames = await asyncio.gather(*(read(f"{base_url}{path}") for path in selected or partitions[:1]))
+                    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+                s.set_attribute("rows", len(df))
+            count("rows.decoded", len(df), source="cloud")
+            print(f"Loaded from cloud data: {filename} ({len(df)} records)")
+            return df
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error loading data from {data_url}: {e}")
+
+    key = _data_key("cloud", dataset_id, endpoint, columns, filters)
+    return await _single_flight.ado((base_url, key), load, share=_share_frame, name=key)
+
+
 def get_cache_stats() -> Dict[str, Any]:
     """
     Get cache statistics (simplified for compatibility).
@@ -590,9 +3491,10 @@ def get_cache_stats() -> Dict[str, Any]:
     Returns:
         Dict with basic cache info
     """
-    data_dir = Path.cwd() / "data"
+    data_dir = get_data_file_path("").parent
     if data_dir.exists():
-        files = list(data_dir.glob("*.parquet"))
+        # Including the period partitions, but not the pages of interrupted fetches
+        files = [f for f in data_dir.rglob("*.parquet") if ".partial" not in f.relative_to(data_dir).parts]
         total_size = sum(f.stat().st_size for f in files) / (1024 * 1024)
         return {
             "cache_dir": str(data_dir),
@@ -667,6 +3569,8 @@ def check_cloud_data_availability(dataset_id: str, endpoints: List[str],
     Returns:
         Dict with availability status for each endpoint and environment info
     """
+    import requests
+
     results = {}
     env_info = get_execution_environment()
     